@@ -0,0 +1,115 @@
+"""
+Benchmark content reads and moves in walk order against inode order.
+
+Creates a tree of small files whose directory-walk order differs from their
+inode order (files are created in random order across folders), then for
+each mode drops the files from the page cache and times:
+
+- reading the sampled bytes of every file (ContentAnalyzerRegistry.prefetch)
+- moving every file into a target folder and back
+
+Modes: 'walk' (walk order, no read-ahead hints) and 'inode' ((device, inode)
+order with WILLNEED hints). The gain is largest on spinning disks with a
+cold cache; on SSDs and tmpfs both modes perform about the same.
+
+Usage:
+    python benchmarks/io_order.py --files 20000 --dir /mnt/hdd/bench
+    sudo python benchmarks/io_order.py --drop-caches   # also drop directory caches
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from src.core.content_analyzers import ContentAnalyzerRegistry
+from src.core.file_analyzer import FileAnalyzer
+from src.core.folder_manager import FolderManager
+from src.core.io_scheduler import IOScheduler
+
+MODES = {
+    'walk': IOScheduler('none', readahead_window=0),
+    'inode': IOScheduler('inode'),
+}
+
+
+def build_tree(root, files, folders, size):
+    names = [(f"folder{index % folders}", f"notes{index}") for index in range(files)]
+    random.shuffle(names)
+    payload = (b"kaynak kodu belge " * (size // 18 + 1))[:size]
+    for folder, name in names:
+        os.makedirs(os.path.join(root, folder), exist_ok=True)
+        with open(os.path.join(root, folder, name), 'wb') as f:
+            f.write(payload)
+
+
+def evict(files_info, drop_caches):
+    """Remove the files (and with drop_caches, all inodes and dentries) from the cache."""
+    os.sync()
+    if drop_caches:
+        with open('/proc/sys/vm/drop_caches', 'w') as f:
+            f.write('3\n')
+        return
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    for file_info in files_info:
+        fd = os.open(file_info['path'], os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def timed_reads(files_info, scheduler):
+    registry = ContentAnalyzerRegistry()
+    for file_info in files_info:
+        file_info.pop('keywords', None)
+    start = time.perf_counter()
+    registry.prefetch(files_info, scheduler)
+    return time.perf_counter() - start
+
+
+def timed_moves(root, files_info, scheduler):
+    manager = FolderManager(io_scheduler=scheduler)
+    start = time.perf_counter()
+    results = manager.organize_files(root, {'moved': files_info})
+    elapsed = time.perf_counter() - start
+    # Put everything back for the next mode
+    manager.undo_last_operation()
+    return elapsed, results['moved']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--files', type=int, default=5000)
+    parser.add_argument('--folders', type=int, default=50)
+    parser.add_argument('--size', type=int, default=4096, help="Bytes per file")
+    parser.add_argument('--dir', help="Directory to build the tree in (default: a temporary directory)")
+    parser.add_argument('--drop-caches', action='store_true', help="Drop all caches between runs (root only)")
+    args = parser.parse_args(argv)
+
+    root = tempfile.mkdtemp(prefix='io_order_', dir=args.dir)
+    try:
+        build_tree(root, args.files, args.folders, args.size)
+        files_info = FileAnalyzer().scan_directory(root)
+        print(f"{len(files_info)} files in {root}")
+
+        for mode, scheduler in MODES.items():
+            evict(files_info, args.drop_caches)
+            read_time = timed_reads(files_info, scheduler)
+            evict(files_info, args.drop_caches)
+            move_time, moved = timed_moves(root, files_info, scheduler)
+            print(f"{mode:>6}: reads {len(files_info) / read_time:10.0f} files/s, "
+                  f"moves {moved / move_time:10.0f} files/s")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+import os
+import sys
+import json
+import logging
+import argparse
+
+# Add the parent directory to sys.path to resolve imports correctly
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+try:
+    from src.core.engine import get_engine
+    from src.core.progress import CancellationToken, OperationCancelled
+    from src.core.reports import open_report_writer, read_report
+    from src.core.service import Service
+except ImportError:
+    # If direct import fails, try relative import
+    from core.engine import get_engine
+    from core.progress import CancellationToken, OperationCancelled
+    from core.reports import open_report_writer, read_report
+    from core.service import Service
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='filesynapse',
+        description="FileSynapse AI - Akıllı Dosya Düzenleme Sistemi"
+    )
+    parser.add_argument('--path', help="Düzenlenecek klasör")
+    parser.add_argument('--rules', help="Özel kurallar (categories.custom_rules biçiminde JSON dosyası)")
+    parser.add_argument('--report', help="Taranan ve sınıflandırılan dosyaları bu dosyaya yaz (.jsonl/.csv), taşıma yapma")
+    parser.add_argument('--plan', help="Planlanan taşımaları bu dosyaya yaz (.jsonl/.csv), taşıma yapma")
+    parser.add_argument('--apply', help="Daha önce yazılmış bir planı uygula")
+    parser.add_argument('--estimate', action='store_true', help="Klasörü örnekleyerek dosya sayısını, boyutu ve süreyi tahmin et")
+    parser.add_argument('--serve', action='store_true', help="Unix soketi üzerinden hizmet veren arka plan sürecini başlat")
+    parser.add_argument('--socket', help="--serve için soket yolu (varsayılan: settings.json service.socket_path)")
+    return parser
+
+
+def format_estimate(estimate):
+    """Format a ScanEstimator result as lines of text."""
+    def interval(value, scale=1, unit=''):
+        if estimate['exact'] and value.low == value.high:
+            return f"{value.value / scale:,.0f}{unit}"
+        return f"{value.value / scale:,.0f}{unit} ({value.low / scale:,.0f} - {value.high / scale:,.0f})"
+
+    lines = [
+        f"Dosya: {interval(estimate['files'])}" + (" (kesin)" if estimate['exact'] else ""),
+        f"Klasör: {interval(estimate['directories'])}",
+        f"Boyut: {interval(estimate['bytes'], 1024 * 1024, ' MB')}",
+        f"Tarama süresi: {interval(estimate['scan_seconds'], 1, ' sn')}",
+    ]
+    for category, count in sorted(estimate['categories'].items(), key=lambda item: -item[1].value):
+        lines.append(f"  {category}: {interval(count)}")
+    if estimate['depth_limited']:
+        lines.append(f"Uyarı: {estimate['depth_limited']} örnek en fazla derinliğe ulaştı, tahmin düşük olabilir")
+    return lines
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.path and not args.apply and not args.serve:
+        build_parser().error("--path, --apply or --serve is required")
+
+    engine = get_engine()
+    cancel_token = CancellationToken()
+
+    try:
+        if args.rules:
+            with open(args.rules, 'r', encoding='utf-8') as f:
+                engine.update_custom_rules(json.load(f))
+
+        if args.serve:
+            service = Service.from_settings(engine.settings, engine)
+            if args.socket:
+                service.socket_path = args.socket
+            print(f"Dinleniyor: {service.socket_path}")
+            service.serve_forever()
+
+        elif args.apply:
+            results = engine.apply(read_report(args.apply), args.path, cancel_token=cancel_token)
+            print(f"{results['moved']} dosya taşındı, {results['failed']} hata")
+
+        elif args.estimate:
+            for line in format_estimate(engine.estimate(args.path, cancel_token)):
+                print(line)
+
+        elif args.report:
+            # Each record is written as soon as it is classified
+            with open_report_writer(args.report) as writer:
+                for file_info, category in engine.iter_classified(args.path, cancel_token=cancel_token):
+                    writer.write(file_info, category)
+            print(f"{writer.count} kayıt yazıldı: {args.report}")
+
+        elif args.plan:
+            moves = engine.plan(args.path, cancel_token=cancel_token)
+            with open_report_writer(args.plan) as writer:
+                for move in moves:
+                    writer.write(move)
+            print(f"{writer.count} taşıma planlandı: {args.plan}")
+
+        else:
+            results = engine.organize(args.path, cancel_token=cancel_token)
+            print(f"{results['moved']} dosya taşındı, {results['failed']} hata")
+
+    except KeyboardInterrupt:
+        cancel_token.cancel()
+        print("İşlem iptal edildi")
+        return 130
+    except OperationCancelled:
+        print("İşlem iptal edildi")
+        return 130
+    except Exception as e:
+        logging.error(f"Error in command line run: {e}")
+        print(f"Hata: {e}")
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,3 +5,25 @@ FileSynapse AI Core Module
 from . import ai_classifier
 from . import file_analyzer
 from . import folder_manager
+from . import archive_inspector
+from . import content_analyzers
+from . import deadlines
+from . import device_scheduler
+from . import directory_index
+from . import engine
+from . import estimator
+from . import external_grouping
+from . import filesystem
+from . import io_budget
+from . import io_scheduler
+from . import logging_config
+from . import lru_cache
+from . import progress
+from . import project_detector
+from . import reports
+from . import rule_engine
+from . import scan_filter
+from . import service
+from . import settings
+from . import version_grouper
+from . import work_queue
@@ -6,35 +6,51 @@ import logging
 from datetime import datetime
 import random
 
+from .archive_inspector import ArchiveInspector, dominant_category
+from .content_analyzers import ContentAnalyzerRegistry
+from .io_scheduler import IOScheduler
+from .logging_config import configure_logging, EventAggregator
+from .lru_cache import LRUCache
+from .progress import ProgressReporter
+from .rule_engine import RuleEngine
+from .settings import load_settings
+
+# Cache marker: extension and MIME type are inconclusive, the name decides
+_NAME_DEPENDENT = object()
+
+# classify_file result when defer_content is set and the content must be read
+_NEEDS_CONTENT = object()
+
+_DIGITS = re.compile(r'\d+')
+
 class AIClassifier:
-    def __init__(self):
+    def __init__(self, settings=None, content_analyzers=None, io_scheduler=None):
         self.setup_logging()
+        if settings is None:
+            settings = load_settings()
+        # Content is read only for files whose extension, MIME type and name are inconclusive
+        self.content_analyzers = content_analyzers or ContentAnalyzerRegistry.from_settings(settings)
+        # Order in which batch_classify reads those files
+        self.io_scheduler = io_scheduler or IOScheduler.from_settings(settings)
+        cache_size = settings.get('processing', {}).get('classification_cache_size', 4096)
+        self.classification_cache = LRUCache(cache_size)
+        self.custom_rules = settings.get('categories', {}).get('custom_rules', [])
+        self.route_archives = settings.get('categories', {}).get('route_archives', True)
+        self.archive_dominant_share = settings.get('categories', {}).get('archive_dominant_share', 0.6)
+        self.archive_inspector = ArchiveInspector.from_settings(settings, self.content_analyzers.fs)
         self.load_category_mappings()
+        self.classification_log = EventAggregator("Files classified")
         
     def setup_logging(self):
         """Setup logging configuration."""
-        try:
-            if not os.path.exists('logs'):
-                os.makedirs('logs')
-                
-            logging.basicConfig(
-                filename=os.path.join('logs', 'ai_classifier.log'),
-                level=logging.INFO,
-                format='%(asctime)s - %(levelname)s - %(message)s'
-            )
-        except Exception as e:
-            # Fall back to console logging if file logging fails
-            logging.basicConfig(
-                level=logging.INFO,
-                format='%(asctime)s - %(levelname)s - %(message)s'
-            )
-            logging.error(f"Error setting up file logging: {e}")
+        configure_logging()
         
     def load_category_mappings(self):
         """Load category mappings from JSON file."""
         try:
             with open('category_mappings.json', 'r', encoding='utf-8') as f:
                 self.category_mappings = json.load(f)
+            self.invalidate_cache()
             logging.info("Category mappings loaded successfully")
         except Exception as e:
             logging.error(f"Error loading category mappings: {e}")
@@ -65,38 +81,124 @@ class AIClassifier:
                     "extensions": [".zip", ".rar", ".7z", ".tar", ".gz"],
                     "mime_types": ["application/zip", "application/x-rar-compressed", "application/x-7z-compressed"]
                 },
+                "project": {
+                    "name": "Projeler",
+                    "extensions": [],
+                    "mime_types": []
+                },
                 "other": {
                     "name": "Diğer",
                     "extensions": [],
                     "mime_types": []
                 }
             }
+            self.invalidate_cache()
             
-    def classify_file(self, file_info):
-        """Classify a file based on its metadata and content."""
+    def classify_file(self, file_info, defer_content=False):
+        """Classify a file based on its metadata and content.
+        
+        With defer_content, a file whose content would have to be read is
+        not read; _NEEDS_CONTENT is returned instead and nothing is recorded.
+        """
         try:
-            # Get basic classifications
-            ext_category = self._classify_by_extension(file_info['extension'])
-            mime_category = self._classify_by_mime(file_info['mime_type'])
-            name_category = self._classify_by_name(file_info['name'])
+            # Project roots are moved as a whole, never split by file type
+            if file_info.get('is_project'):
+                self.classification_log.record("project")
+                return "project"
+                
+            # User rules take precedence; they may also pick a nested target folder
+            if self.rule_engine:
+                rule = self.rule_engine.match(file_info)
+                if rule is not None:
+                    file_info['target_folder'] = rule.target
+                    self.classification_log.record(rule.category)
+                    return rule.category
+                file_info.pop('target_folder', None)
+                
+            # Priority-based classification (extension > mime > name).
+            # Extension and MIME type alone decide most files, so that result
+            # is memoized per (extension, MIME); the name is only part of the
+            # key when both are inconclusive.
+            extension = file_info['extension'].lower()
+            mime_type = file_info['mime_type']
+            type_key = (extension, mime_type)
             
-            # Priority-based classification (extension > mime > name)
-            if ext_category != "other":
-                final_category = ext_category
-            elif mime_category != "other":
-                final_category = mime_category
-            elif name_category != "other":
-                final_category = name_category
-            else:
-                final_category = "other"
+            final_category = self.classification_cache.get(type_key)
+            if final_category is None:
+                ext_category = self._classify_by_extension(extension)
+                mime_category = self._classify_by_mime(mime_type)
+                if ext_category != "other":
+                    final_category = ext_category
+                elif mime_category != "other":
+                    final_category = mime_category
+                else:
+                    final_category = _NAME_DEPENDENT
+                self.classification_cache.put(type_key, final_category)
+                
+            if final_category is _NAME_DEPENDENT:
+                name_key = (extension, mime_type, self._name_signature(file_info['name']))
+                final_category = self.classification_cache.get(name_key)
+                if final_category is None:
+                    final_category = self._classify_by_name(file_info['name'])
+                    self.classification_cache.put(name_key, final_category)
+                    
+                if final_category == "other" and 'path' in file_info:
+                    if defer_content and file_info.get('keywords') is None:
+                        return _NEEDS_CONTENT
+                    final_category = self._classify_by_content(self.content_analyzers.keywords(file_info))
                 
-            logging.info(f"File classified as: {final_category}")
+            if final_category == "archive" and self.route_archives:
+                final_category = self._classify_archive(file_info)
+                
+            self.classification_log.record(final_category)
             return final_category
             
         except Exception as e:
             logging.error(f"Error classifying file: {e}")
             return "other"
             
+    def _classify_archive(self, file_info):
+        """Route an archive by its dominant member type, or keep it in "archive"."""
+        summary = file_info.get('archive_contents')
+        if summary is None and 'path' in file_info:
+            summary = self.archive_inspector.inspect(file_info['path'])
+            file_info['archive_contents'] = summary
+            
+        category = dominant_category(summary, self._classify_by_extension, self.archive_dominant_share)
+        if category is None or category == "other":
+            return "archive"
+        return category
+            
+    def _name_signature(self, filename):
+        """Normalize a filename to the parts that can affect keyword matching."""
+        filename = filename.lower()
+        if not self._keywords_have_digits:
+            # Digit runs cannot match a keyword, so IMG_0001 and IMG_0002 share an entry
+            filename = _DIGITS.sub('0', filename)
+        return filename
+        
+    def invalidate_cache(self):
+        """Drop memoized classifications and recompile custom rules after the rules changed."""
+        self.classification_cache.clear()
+        self.rule_engine = RuleEngine(self.custom_rules, {
+            info['name']: category
+            for category, info in self.category_mappings.items() if 'name' in info
+        }, self.category_mappings.keys())
+        self._keywords_have_digits = any(
+            any(ch.isdigit() for ch in keyword)
+            for info in self.category_mappings.values()
+            for keyword in info.get('keywords', [])
+        )
+        
+    def update_custom_rules(self, rules):
+        """Replace the custom rules (settings.categories.custom_rules format)."""
+        self.custom_rules = rules
+        self.invalidate_cache()
+        
+    def cache_info(self):
+        """Return classification cache hits, misses and size."""
+        return self.classification_cache.info()
+        
     def _classify_by_extension(self, extension):
         """Classify file by its extension."""
         extension = extension.lower()
@@ -126,24 +228,96 @@ class AIClassifier:
         
         return "other"
     
-    def batch_classify(self, files_info):
-        """Classify multiple files and group them by category."""
+    def _classify_by_content(self, keywords):
+        """Classify file by category keywords found in its content keywords."""
+        if not keywords:
+            return "other"
+        text = ' '.join(keywords)
+        
+        for category, info in self.category_mappings.items():
+            if 'keywords' in info:
+                for keyword in info['keywords']:
+                    if keyword.lower() in text:
+                        return category
+        
+        return "other"
+    
+    def batch_classify(self, files_info, progress_callback=None, cancel_token=None):
+        """Classify multiple files and group them by category.
+        
+        progress_callback receives (done, total); cancel_token, if given, is
+        checked before each file and raises OperationCancelled.
+        """
         categorized = {}
         
         # Initialize categories from mappings
         for category in self.category_mappings.keys():
             categorized[category] = []
         
-        # Classify each file
+        progress = ProgressReporter(progress_callback, len(files_info))
+        
+        # Classify each file; files that need their content read wait for a second pass
+        deferred = []
         for file_info in files_info:
-            category = self.classify_file(file_info)
-            categorized[category].append(file_info)
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            category = self.classify_file(file_info, defer_content=True)
+            if category is _NEEDS_CONTENT:
+                deferred.append(file_info)
+                continue
+            categorized.setdefault(category, []).append(file_info)
+            progress.advance()
+            
+        if deferred:
+            # Read all of them in one pass, in disk order rather than walk order
+            self.content_analyzers.prefetch(deferred, self.io_scheduler, cancel_token)
+            for file_info in deferred:
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                category = self.classify_file(file_info)
+                categorized.setdefault(category, []).append(file_info)
+                progress.advance()
             
+        self.classification_log.flush()
+        progress.finish()
         return categorized
         
+    def classify_into(self, grouper, files_info, total=0, progress_callback=None, cancel_token=None):
+        """Classify files from any iterable into an ExternalGrouper.
+        
+        Unlike batch_classify nothing is kept in memory here, so files_info
+        can be a generator such as FileAnalyzer.iter_directory.
+        """
+        progress = ProgressReporter(progress_callback, total)
+        
+        for file_info in files_info:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            grouper.add(self.classify_file(file_info), file_info)
+            progress.advance()
+            
+        self.classification_log.flush()
+        progress.finish()
+        return grouper
+        
+    def iter_classify(self, files_info, cancel_token=None):
+        """Classify files from any iterable one at a time, yielding (file_info, category).
+        
+        Like classify_into nothing is kept, so a report can be written
+        while FileAnalyzer.iter_directory is still scanning.
+        """
+        try:
+            for file_info in files_info:
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                yield file_info, self.classify_file(file_info)
+        finally:
+            self.classification_log.flush()
+            
     def update_category_mappings(self, new_mappings):
         """Update category mappings with user-provided data."""
         self.category_mappings.update(new_mappings)
+        self.invalidate_cache()
         
         # Save to file
         try:
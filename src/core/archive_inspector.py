@@ -0,0 +1,226 @@
+import io
+import os
+import mmap
+import struct
+import logging
+from collections import Counter
+
+from .filesystem import OS_FILESYSTEM
+
+# Zip records (little endian)
+_ZIP_EOCD = b'PK\x05\x06'
+_ZIP64_LOCATOR = b'PK\x06\x07'
+_ZIP64_EOCD = b'PK\x06\x06'
+_ZIP_CENTRAL = b'PK\x01\x02'
+_ZIP_EOCD_SIZE = 22
+_ZIP_CENTRAL_SIZE = 46
+_ZIP_MAX_COMMENT = 0xFFFF
+_ZIP_UTF8_FLAG = 0x800
+
+_TAR_BLOCK = 512
+_TAR_REGULAR = (b'0', b'\x00', b'7')
+_TAR_LONGNAME = b'L'
+_TAR_PAX = b'x'
+
+
+def _member_extension(name):
+    """Lowercase extension of an archive member name ('' if it has none)."""
+    base = name.rstrip('/').rsplit('/', 1)[-1]
+    dot = base.rfind('.')
+    return base[dot:].lower() if dot > 0 else ''
+
+
+def _tar_number(field):
+    """Decode a tar numeric field (octal text or GNU base-256)."""
+    if field[:1] == b'\x80':
+        return int.from_bytes(field[1:], 'big')
+    field = field.split(b'\x00', 1)[0].strip()
+    return int(field, 8) if field else 0
+
+
+def _tar_checksum_ok(header):
+    try:
+        stored = _tar_number(header[148:156])
+    except ValueError:
+        return False
+    # The checksum field itself counts as eight spaces
+    return stored == sum(header[:148]) + 8 * 32 + sum(header[156:])
+
+
+class ArchiveInspector:
+    """
+    Summarize the members of an archive without extracting it.
+
+    Zip files are read from their central directory at the end of the file,
+    uncompressed tar files by hopping from header to header. The file is
+    memory-mapped, so only the pages holding those headers are ever read,
+    and at most max_members entries (and max_index_bytes of zip central
+    directory) are looked at, which keeps the cost per archive bounded no
+    matter how large it is. Files without a descriptor to map (e.g. from
+    MemoryFileSystem) are read whole instead. Compressed tarballs, rar and 7z archives keep
+    their index inside compressed data and are not inspected.
+    """
+
+    def __init__(self, max_members=2000, max_index_bytes=4 * 1024 * 1024, fs=None):
+        """
+        Args:
+            max_members (int): Maximum number of members read per archive
+            max_index_bytes (int): Maximum bytes of zip central directory read
+            fs: Filesystem backend archives are opened with, the OS if None
+        """
+        self.max_members = max_members
+        self.max_index_bytes = max_index_bytes
+        self.fs = fs or OS_FILESYSTEM
+
+    @classmethod
+    def from_settings(cls, settings, fs=None):
+        """Create an inspector using scan_options.archive_max_members from settings."""
+        return cls(settings.get('scan_options', {}).get('archive_max_members', 2000), fs=fs)
+
+    def inspect(self, file_path):
+        """
+        Summarize the members of an archive
+
+        Args:
+            file_path (str): Path to a zip or tar file
+
+        Returns:
+            dict: Summary with 'format', 'members', 'extensions' (extension ->
+                member count), 'sizes' (extension -> uncompressed bytes) and
+                'truncated', or None if the file is not a readable archive
+        """
+        try:
+            with self.fs.open(file_path, 'rb') as f:
+                try:
+                    fileno = f.fileno()
+                except (AttributeError, io.UnsupportedOperation):
+                    return self._inspect(f.read())
+                if os.fstat(fileno).st_size == 0:
+                    return None
+                with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as data:
+                    return self._inspect(data)
+        except Exception as e:
+            logging.error(f"Error inspecting archive {file_path}: {e}")
+            return None
+
+    def _inspect(self, data):
+        """Summarize an archive held in a bytes-like object (bytes or mmap)."""
+        size = len(data)
+        if size == 0:
+            return None
+        if size >= _TAR_BLOCK and _tar_checksum_ok(data[:_TAR_BLOCK]):
+            return self._inspect_tar(data, size)
+        return self._inspect_zip(data, size)
+
+    def _summary(self, archive_format, members, truncated):
+        extensions = Counter()
+        sizes = Counter()
+        for name, member_size in members:
+            extension = _member_extension(name)
+            extensions[extension] += 1
+            sizes[extension] += member_size
+        return {
+            'format': archive_format,
+            'members': len(members),
+            'extensions': dict(extensions),
+            'sizes': dict(sizes),
+            'truncated': truncated
+        }
+
+    def _inspect_zip(self, data, size):
+        # The end of central directory record sits within the last 64 KiB + 22 bytes
+        tail_start = max(0, size - _ZIP_EOCD_SIZE - _ZIP_MAX_COMMENT)
+        eocd = data.rfind(_ZIP_EOCD, tail_start)
+        if eocd < 0 or eocd + _ZIP_EOCD_SIZE > size:
+            return None
+
+        total, index_size, index_offset = struct.unpack_from('<10xHII', data, eocd)
+        locator = eocd - 20
+        if locator >= 0 and data[locator:locator + 4] == _ZIP64_LOCATOR:
+            record = struct.unpack_from('<8xQ', data, locator)[0]
+            if data[record:record + 4] != _ZIP64_EOCD:
+                return None
+            total, index_size, index_offset = struct.unpack_from('<32xQQQ', data, record)
+        elif 0xFFFFFFFF in (index_size, index_offset):
+            return None
+
+        end = min(index_offset + index_size, index_offset + self.max_index_bytes, size)
+        members = []
+        position = index_offset
+        seen = 0
+        while seen < min(total, self.max_members) and position + _ZIP_CENTRAL_SIZE <= end:
+            if data[position:position + 4] != _ZIP_CENTRAL:
+                break
+            flags, member_size, name_length, extra_length, comment_length = struct.unpack_from(
+                '<8xH14xIHHH', data, position)
+            raw_name = data[position + _ZIP_CENTRAL_SIZE:position + _ZIP_CENTRAL_SIZE + name_length]
+            name = raw_name.decode('utf-8' if flags & _ZIP_UTF8_FLAG else 'cp437', 'replace')
+            if not name.endswith('/'):
+                members.append((name, member_size))
+            position += _ZIP_CENTRAL_SIZE + name_length + extra_length + comment_length
+            seen += 1
+
+        return self._summary('zip', members, seen < total)
+
+    def _inspect_tar(self, data, size):
+        members = []
+        position = 0
+        seen = 0
+        long_name = None
+        while position + _TAR_BLOCK <= size:
+            if seen >= self.max_members:
+                return self._summary('tar', members, True)
+            header = data[position:position + _TAR_BLOCK]
+            if header == bytes(_TAR_BLOCK) or not _tar_checksum_ok(header):
+                break
+
+            member_size = _tar_number(header[124:136])
+            kind = header[156:157]
+            body = position + _TAR_BLOCK
+            if kind == _TAR_LONGNAME:
+                long_name = data[body:body + min(member_size, 4096)].split(b'\x00', 1)[0].decode('utf-8', 'replace')
+            elif kind == _TAR_PAX:
+                for line in data[body:body + min(member_size, 4096)].decode('utf-8', 'replace').splitlines():
+                    _, _, field = line.partition(' ')
+                    if field.startswith('path='):
+                        long_name = field[5:]
+            else:
+                if kind in _TAR_REGULAR:
+                    name = long_name
+                    if name is None:
+                        name = header[:100].split(b'\x00', 1)[0].decode('utf-8', 'replace')
+                        prefix = header[345:500].split(b'\x00', 1)[0]
+                        if header[257:262] == b'ustar' and prefix:
+                            name = prefix.decode('utf-8', 'replace') + '/' + name
+                    members.append((name, member_size))
+                long_name = None
+                seen += 1
+
+            # Skip the member data without reading it
+            position = body + (member_size + _TAR_BLOCK - 1) // _TAR_BLOCK * _TAR_BLOCK
+
+        return self._summary('tar', members, False)
+
+
+def dominant_category(summary, classify_extension, min_share=0.6):
+    """
+    Category holding most members of an archive, if it holds at least min_share of them
+
+    Args:
+        summary (dict): Result of ArchiveInspector.inspect
+        classify_extension (callable): Maps a member extension to a category
+        min_share (float): Required fraction of members
+
+    Returns:
+        str: Dominant category or None
+    """
+    if not summary or not summary['members']:
+        return None
+
+    counts = Counter()
+    for extension, count in summary['extensions'].items():
+        counts[classify_extension(extension)] += count
+    category, count = counts.most_common(1)[0]
+    if count / summary['members'] >= min_share:
+        return category
+    return None
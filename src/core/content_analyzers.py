@@ -0,0 +1,210 @@
+import re
+import logging
+import threading
+
+from collections import deque
+
+from .deadlines import OperationTimeout, Quarantine
+from .filesystem import OS_FILESYSTEM
+
+_WORDS = re.compile(r'\b\w+\b')
+
+# Bytes read from the start of a file by the text analyzer
+DEFAULT_READ_BYTES = 1000
+
+# MIME types whose leading bytes are (mostly) readable text
+TEXT_MIME_TYPES = (
+    'text/',
+    'application/pdf',
+    'application/msword',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+)
+
+
+def _keywords(content):
+    text = content.decode('utf-8', errors='ignore')
+    words = [word.lower() for word in _WORDS.findall(text) if len(word) > 3]
+    return list(set(words))[:20]  # Take up to 20 unique keywords
+
+
+def text_keywords(f, max_bytes=DEFAULT_READ_BYTES):
+    """
+    Extract keywords from the first bytes of a file read as text
+
+    Args:
+        f (file): File opened in binary mode
+        max_bytes (int): Number of bytes to read
+
+    Returns:
+        list: Keywords
+    """
+    return _keywords(f.read(max_bytes))
+
+
+def sniffed_text_keywords(f, max_bytes=DEFAULT_READ_BYTES):
+    """Like text_keywords, but returns no keywords for binary data (NUL bytes)."""
+    content = f.read(max_bytes)
+    if b'\x00' in content:
+        return []
+    return _keywords(content)
+
+
+class ContentAnalyzerRegistry:
+    """
+    Content analyzers looked up by MIME type, run only on request.
+
+    An analyzer is a callable (binary file, max_bytes) -> keywords registered
+    for a MIME type or a MIME prefix ending in '/'; the most specific
+    registration wins. Results are stored in file_info['keywords'], so a
+    file is read at most once, and bytes_read counts every byte read.
+    """
+
+    def __init__(self, max_size=10 * 1024 * 1024, max_bytes=DEFAULT_READ_BYTES, fs=None,
+                 deadline_pool=None):
+        """
+        Args:
+            max_size (int): Files larger than this are never read
+            max_bytes (int): Bytes passed to analyzers as their read limit
+            fs: Filesystem backend files are opened with, the OS if None
+            deadline_pool (DeadlinePool): Bounds the time spent on each file; no limit if None
+        """
+        self.fs = fs or OS_FILESYSTEM
+        self.deadline_pool = deadline_pool
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.analyzers = {}
+        self.bytes_read = 0
+        self._lock = threading.Lock()
+
+        for mime_type in TEXT_MIME_TYPES:
+            self.register(mime_type, text_keywords)
+        self.register('application/octet-stream', sniffed_text_keywords)
+
+    @classmethod
+    def from_settings(cls, settings, fs=None, deadline_pool=None):
+        """Create a registry using scan_options.content_max_size_mb from settings."""
+        max_size_mb = settings.get('scan_options', {}).get('content_max_size_mb', 10)
+        return cls(int(max_size_mb * 1024 * 1024), fs=fs, deadline_pool=deadline_pool)
+
+    def register(self, mime_type, analyzer):
+        """Register an analyzer for a MIME type, or for a prefix such as 'text/'."""
+        self.analyzers[mime_type] = analyzer
+
+    def analyzer_for(self, mime_type):
+        """Return the analyzer for a MIME type, or None."""
+        analyzer = self.analyzers.get(mime_type)
+        if analyzer is None:
+            analyzer = self.analyzers.get(mime_type.split('/', 1)[0] + '/')
+        return analyzer
+
+    def keywords(self, file_info):
+        """
+        Return content keywords of a file, analyzing it on first request
+
+        Args:
+            file_info (dict): File information from FileAnalyzer
+
+        Returns:
+            list: Keywords (empty if no analyzer applies or the file is too large)
+        """
+        keywords = file_info.get('keywords')
+        if keywords is not None:
+            return keywords
+
+        keywords = []
+        if self._analyzer_to_run(file_info) is not None:
+            try:
+                if self._has_deadlines([file_info]):
+                    keywords = self.deadline_pool.run(self._read, file_info)
+                else:
+                    keywords = self._read(file_info)
+            except Exception as e:
+                logging.error(f"Error extracting keywords from {file_info['path']}: {e}")
+                keywords = []
+
+        file_info['keywords'] = keywords
+        return keywords
+
+    def prefetch(self, files_info, io_scheduler, cancel_token=None):
+        """
+        Analyze the content of many files at once, in I/O order with read-ahead
+
+        Files that already have keywords or that no analyzer applies to are
+        skipped without being opened; keywords() then answers from file_info.
+        With a deadline pool, up to readahead_window reads are queued on the
+        pool at once instead of hinted, and reads that miss the deadline are
+        retried after all others.
+
+        Args:
+            files_info (list): File information from FileAnalyzer
+            io_scheduler (IOScheduler): Decides the read order and read-ahead
+            cancel_token (CancellationToken): Optional token to stop reading
+        """
+        pending = [
+            file_info for file_info in files_info
+            if file_info.get('keywords') is None and self._analyzer_to_run(file_info) is not None
+        ]
+        if self._has_deadlines(pending):
+            self._prefetch_with_deadlines(io_scheduler.sorted(pending), io_scheduler.readahead_window,
+                                          cancel_token)
+            return
+        for file_info, f in io_scheduler.read_ahead(self.fs, pending, self.max_bytes):
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            keywords = []
+            if f is not None:
+                try:
+                    keywords = self._run(self._analyzer_to_run(file_info), f)
+                except Exception as e:
+                    logging.error(f"Error extracting keywords from {file_info['path']}: {e}")
+            file_info['keywords'] = keywords
+
+    def _prefetch_with_deadlines(self, files_info, window, cancel_token):
+        quarantine = Quarantine(self.deadline_pool)
+        pending = iter(files_info)
+        in_flight = deque()
+        slow = {}
+
+        def submit_next():
+            file_info = next(pending, None)
+            if file_info is not None:
+                in_flight.append((file_info, self.deadline_pool.submit(self._read, file_info)))
+
+        for _ in range(max(1, window)):
+            submit_next()
+        while in_flight:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            file_info, future = in_flight.popleft()
+            submit_next()
+            try:
+                file_info['keywords'] = quarantine.wait(file_info['path'], future, self._read, file_info)
+            except OperationTimeout:
+                slow[file_info['path']] = file_info
+            except Exception as e:
+                logging.error(f"Error extracting keywords from {file_info['path']}: {e}")
+                file_info['keywords'] = []
+
+        for path, keywords, error in quarantine.retry():
+            slow[path]['keywords'] = keywords if error is None else []
+
+    def _has_deadlines(self, files_info):
+        if self.deadline_pool is None:
+            return False
+        return any(self.deadline_pool.enforced_for(file_info.get('device')) for file_info in files_info)
+
+    def _read(self, file_info):
+        with self.fs.open(file_info['path'], 'rb') as f:
+            return self._run(self._analyzer_to_run(file_info), f)
+
+    def _analyzer_to_run(self, file_info):
+        if file_info.get('size', 0) >= self.max_size:
+            return None
+        return self.analyzer_for(file_info.get('mime_type', ''))
+
+    def _run(self, analyzer, f):
+        keywords = analyzer(f, self.max_bytes)
+        bytes_read = f.tell()
+        with self._lock:
+            self.bytes_read += bytes_read
+        return keywords
@@ -0,0 +1,240 @@
+import queue
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from .filesystem import OS_FILESYSTEM
+
+# Stalled threads tolerated before no replacement workers are started
+DEFAULT_MAX_STALLED = 32
+
+# Device kinds deadlines apply to with scope 'network'
+_REMOTE_KINDS = ('network', 'unknown')
+
+
+class OperationTimeout(TimeoutError):
+    """Raised when a per-file operation misses its deadline."""
+
+
+class StillRunning(OperationTimeout):
+    """Reported by Quarantine.retry for a call that missed its last deadline but may still complete."""
+
+    def __init__(self, message, future):
+        super().__init__(message)
+        # Completes when the abandoned call eventually returns
+        self.future = future
+
+
+class DeadlinePool:
+    """
+    Worker pool that runs per-file operations with a deadline.
+
+    Python cannot interrupt a thread blocked in a syscall, so a call that
+    misses its deadline is abandoned rather than killed: the caller gets
+    OperationTimeout at once, and a replacement worker is started so the
+    stalled one does not reduce the pool. A stalled worker exits when its
+    call eventually returns. At most max_stalled workers may be stalled at
+    a time; beyond that calls wait in the queue (and time out there) until
+    a stalled one comes back. With no timeout, calls run in the caller's
+    thread.
+
+    Handing a call to another thread costs some tens of microseconds, so
+    with scope 'network' deadlines are only enforced for files on network
+    mounts and devices of unknown kind; local disks fail fast on their own.
+    """
+
+    def __init__(self, timeout=30, workers=4, max_stalled=DEFAULT_MAX_STALLED, scope='network', fs=None):
+        """
+        Args:
+            timeout (float): Seconds allowed per call; None or 0 disables deadlines
+            workers (int): Number of workers that are normally running
+            max_stalled (int): Maximum number of extra workers started to replace stalled ones
+            scope (str): 'network' or 'all', see enforced_for
+            fs: Filesystem backend that reports the kind of each device, the OS if None
+        """
+        if scope not in ('network', 'all'):
+            raise ValueError(f"Unknown deadline scope {scope!r}")
+        self.timeout = timeout or None
+        self.workers = max(1, int(workers))
+        self.max_stalled = max_stalled
+        self.scope = scope
+        self.fs = fs or OS_FILESYSTEM
+        self.timeouts = 0
+        self._kinds = {}
+        self._alive = 0
+        self._tasks = queue.Queue()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings, fs=None):
+        """Create a pool using processing.timeout, max_threads and timeout_scope from settings."""
+        processing = settings.get('processing', {})
+        return cls(
+            processing.get('timeout', 30),
+            processing.get('max_threads', 4),
+            scope=processing.get('timeout_scope', 'network'),
+            fs=fs
+        )
+
+    def enforced_for(self, st_dev=None):
+        """
+        Tell whether calls on a device should run under a deadline
+
+        Args:
+            st_dev (int): Device number, None if unknown
+
+        Returns:
+            bool: False if deadlines are disabled or the device is a local disk (scope 'network')
+        """
+        if self.timeout is None:
+            return False
+        if self.scope == 'all' or st_dev is None:
+            return True
+        kind = self._kinds.get(st_dev)
+        if kind is None:
+            kind = self._kinds[st_dev] = self.fs.device_kind(st_dev)
+        return kind in _REMOTE_KINDS
+
+    def submit(self, fn, *args):
+        """Queue a call and return its Future."""
+        future = Future()
+        with self._lock:
+            if self._alive < self.workers:
+                self._start_worker()
+        self._tasks.put((future, fn, args))
+        return future
+
+    def run(self, fn, *args):
+        """
+        Call fn(*args) and return its result within the deadline
+
+        Raises:
+            OperationTimeout: If the call did not finish in time
+        """
+        if self.timeout is None:
+            return fn(*args)
+        future = self.submit(fn, *args)
+        return self.wait(future)
+
+    def wait(self, future, timeout=None):
+        """
+        Wait for a submitted call, at most timeout seconds (default: the pool timeout)
+
+        Raises:
+            OperationTimeout: If the call did not finish in time; it keeps running
+        """
+        try:
+            return future.result(timeout or self.timeout)
+        except FutureTimeout:
+            with self._lock:
+                self.timeouts += 1
+                if future.running() and self._alive < self.workers + self.max_stalled:
+                    # Keep the pool at full strength while this worker is stuck
+                    self._start_worker()
+            raise OperationTimeout(f"operation did not finish within {timeout or self.timeout} seconds")
+
+    def _start_worker(self):
+        self._alive += 1
+        threading.Thread(target=self._work, daemon=True).start()
+
+    def _work(self):
+        while True:
+            future, fn, args = self._tasks.get()
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args))
+                except BaseException as e:
+                    future.set_exception(e)
+            with self._lock:
+                # A worker that was replaced while stalled leaves the pool
+                if self._alive > self.workers:
+                    self._alive -= 1
+                    return
+
+
+class Quarantine:
+    """
+    Per-run list of calls that missed their deadline, retried at the end.
+
+    call() runs an operation on a DeadlinePool; if it times out, the call is
+    quarantined with the caller's key and OperationTimeout is raised, so the
+    run can move on to the next file. retry() then waits once more for every
+    quarantined call. A call that has started is never submitted twice (it
+    may still complete, e.g. a slow move); one that never started because
+    the pool was blocked is submitted again. A call that misses its second
+    deadline is cancelled if it has not started; otherwise it is reported
+    as StillRunning, whose future tells how it eventually ended.
+    """
+
+    def __init__(self, pool, st_dev=None):
+        """
+        Args:
+            pool (DeadlinePool): Pool calls run on
+            st_dev (int): Device the calls work on, if known; calls run
+                directly when the pool does not enforce deadlines for it
+        """
+        self.pool = pool
+        self.enabled = pool.enforced_for(st_dev)
+        self.entries = []
+        self.failed = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def call(self, key, fn, *args):
+        """
+        Call fn(*args) within the pool deadline
+
+        Raises:
+            OperationTimeout: If the call was quarantined
+        """
+        if not self.enabled:
+            return fn(*args)
+        return self.wait(key, self.pool.submit(fn, *args), fn, *args)
+
+    def wait(self, key, future, fn, *args):
+        """
+        Wait for a call already submitted to the pool as fn(*args)
+
+        Raises:
+            OperationTimeout: If the call was quarantined
+        """
+        try:
+            return self.pool.wait(future)
+        except OperationTimeout:
+            if not future.running() and future.cancel():
+                future = None
+            self.entries.append((key, future, fn, args))
+            logging.warning(f"Quarantined slow operation on {key}")
+            raise
+
+    def retry(self, timeout=None):
+        """
+        Wait for or re-run each quarantined call, giving each another deadline
+
+        Args:
+            timeout (float): Seconds per call, the pool timeout if None
+
+        Yields:
+            tuple: (key, result, error) where error is None on success and
+                StillRunning for calls that may still complete; keys that
+                failed again are also collected in failed
+        """
+        entries, self.entries = self.entries, []
+        for key, future, fn, args in entries:
+            try:
+                if future is None:
+                    future = self.pool.submit(fn, *args)
+                yield key, self.pool.wait(future, timeout), None
+            except OperationTimeout as e:
+                if future.cancel():
+                    logging.error(f"Giving up on {key}: {e}")
+                    self.failed.append(key)
+                    yield key, None, e
+                else:
+                    logging.error(f"Stopped waiting for {key}, which is still running: {e}")
+                    yield key, None, StillRunning(str(e), future)
+            except Exception as e:
+                logging.error(f"Giving up on {key}: {e}")
+                self.failed.append(key)
+                yield key, None, e
@@ -0,0 +1,251 @@
+import os
+import queue
+import logging
+import threading
+
+# Filesystem types served over the network; these tolerate (and need)
+# many requests in flight to hide round-trip latency
+NETWORK_FILESYSTEMS = {
+    'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'sshfs', 'fuse.sshfs', '9p',
+    'afs', 'ceph', 'glusterfs', 'fuse.glusterfs', 'davfs', 'fuse.rclone'
+}
+
+# Default number of concurrent directory workers per device kind
+DEFAULT_CONCURRENCY = {
+    'hdd': 1,
+    'ssd': 8,
+    'network': 16,
+    'unknown': 4
+}
+
+# Sentinel a device thread puts on the results queue when it is finished
+_DEVICE_DONE = object()
+
+_mount_types = None
+_mount_lock = threading.Lock()
+
+
+def _read_mount_types():
+    """Map 'major:minor' device numbers to filesystem types using /proc/self/mountinfo."""
+    mount_types = {}
+    try:
+        with open('/proc/self/mountinfo', 'r', encoding='utf-8') as f:
+            for line in f:
+                fields = line.split()
+                if '-' not in fields:
+                    continue
+                separator = fields.index('-')
+                mount_types[fields[2]] = fields[separator + 1]
+    except OSError:
+        pass
+    return mount_types
+
+
+def device_kind(st_dev):
+    """
+    Classify a device as 'hdd', 'ssd', 'network' or 'unknown'
+
+    Uses /proc and /sys where available; other platforms report 'unknown'.
+
+    Args:
+        st_dev (int): Device number from os.stat
+
+    Returns:
+        str: Device kind
+    """
+    global _mount_types
+
+    with _mount_lock:
+        if _mount_types is None:
+            _mount_types = _read_mount_types()
+    device_id = f"{os.major(st_dev)}:{os.minor(st_dev)}" if hasattr(os, 'major') else None
+    if device_id is None:
+        return 'unknown'
+
+    if _mount_types.get(device_id) in NETWORK_FILESYSTEMS:
+        return 'network'
+
+    # Partitions keep their queue settings on the parent block device
+    for candidate in (f'/sys/dev/block/{device_id}/queue/rotational',
+                      f'/sys/dev/block/{device_id}/../queue/rotational'):
+        try:
+            with open(candidate, 'r') as f:
+                return 'hdd' if f.read().strip() == '1' else 'ssd'
+        except OSError:
+            continue
+
+    return 'unknown'
+
+
+def group_roots_by_device(roots, fs=None):
+    """
+    Group scan roots by the device they live on
+
+    Roots nested inside another root are dropped, since the outer root
+    already covers them.
+
+    Args:
+        roots (list): Directory paths
+        fs: Filesystem backend the roots are stat()ed with, the OS if None
+
+    Returns:
+        dict: st_dev -> list of root paths
+    """
+    normalized = sorted({os.path.abspath(root) for root in roots})
+    unique = []
+    for root in normalized:
+        if unique and (root == unique[-1] or root.startswith(unique[-1].rstrip(os.sep) + os.sep)):
+            continue
+        unique.append(root)
+
+    stat = os.stat if fs is None else fs.stat
+    groups = {}
+    for root in unique:
+        try:
+            st_dev = stat(root).st_dev
+        except OSError as e:
+            logging.error(f"Error accessing scan root {root}: {e}")
+            continue
+        groups.setdefault(st_dev, []).append(root)
+    return groups
+
+
+class DeviceScheduler:
+    """
+    Scan several roots in parallel with a separate concurrency limit per device.
+
+    Each device gets its own pool of directory workers sized by its kind
+    (a single worker for spinning disks, many for SSDs and network mounts),
+    and all devices run at the same time, so the total time approaches that
+    of the slowest device rather than the sum of all of them.
+    """
+
+    def __init__(self, concurrency=None, fs=None):
+        """
+        Args:
+            concurrency (dict): Device kind -> number of workers, merged over DEFAULT_CONCURRENCY
+            fs: Filesystem backend that stat()s roots and reports device kinds, the OS if None
+        """
+        self.concurrency = dict(DEFAULT_CONCURRENCY)
+        if concurrency:
+            self.concurrency.update(concurrency)
+        self.fs = fs
+
+    @classmethod
+    def from_settings(cls, settings, fs=None):
+        """Create a scheduler using processing.device_concurrency from settings."""
+        return cls(settings.get('processing', {}).get('device_concurrency'), fs)
+
+    def limit_for(self, st_dev):
+        kind = device_kind(st_dev) if self.fs is None else self.fs.device_kind(st_dev)
+        return max(1, int(self.concurrency.get(kind, self.concurrency['unknown'])))
+
+    def iter_scan(self, roots, scan_filter, analyze, cancel_token=None, max_pending=10000, workers_for=None):
+        """
+        Scan roots and yield analyzed records as workers produce them
+
+        Args:
+            roots (list): Directory paths, possibly on different devices
+            scan_filter (ScanFilter): Filter used to list each directory
+            analyze (callable): Turns a DirEntry/ProjectRoot into a record or None
+            cancel_token (CancellationToken): Optional token to stop all workers
+            max_pending (int): Maximum records buffered ahead of the consumer
+            workers_for (callable): Optional (device roots, limit) -> worker
+                count, to use fewer workers than the device allows
+
+        Yields:
+            dict: Records returned by analyze
+
+        Raises:
+            OperationCancelled: If cancel_token was cancelled during the scan
+        """
+        results = queue.Queue(maxsize=max_pending)
+        stop = threading.Event()
+        threads = []
+
+        for st_dev, device_roots in group_roots_by_device(roots, self.fs).items():
+            limit = self.limit_for(st_dev)
+            if workers_for is not None:
+                limit = max(1, min(limit, workers_for(device_roots, limit)))
+            logging.info(f"Scanning {len(device_roots)} root(s) on device {st_dev} with {limit} worker(s)")
+            thread = threading.Thread(
+                target=self._scan_device,
+                args=(device_roots, limit, scan_filter, analyze, results, stop, cancel_token),
+                daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+
+        remaining = len(threads)
+        try:
+            while remaining:
+                item = results.get()
+                if item is _DEVICE_DONE:
+                    remaining -= 1
+                else:
+                    yield item
+        finally:
+            stop.set()
+
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+
+    def _scan_device(self, roots, limit, scan_filter, analyze, results, stop, cancel_token):
+        """Walk all roots of one device with a bounded pool of directory workers."""
+        directories = queue.Queue()
+        visited = set()
+        for root in roots:
+            directories.put((root, ''))
+
+        def put(item):
+            # Block while the consumer is behind, but give up once it has stopped
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def worker():
+            while True:
+                task = directories.get()
+                if task is None:
+                    directories.task_done()
+                    return
+                try:
+                    if stop.is_set() or (cancel_token is not None and cancel_token.cancelled):
+                        continue
+                    path, rel = task
+                    files, subdirs = scan_filter.scan_dir(path, rel, visited)
+                    for subdir in subdirs:
+                        directories.put(subdir)
+                    for entry in files:
+                        if cancel_token is not None and cancel_token.cancelled:
+                            break
+                        record = analyze(entry)
+                        if record is not None and not put(record):
+                            break
+                except Exception as e:
+                    logging.error(f"Error scanning directory {task[0]}: {e}")
+                finally:
+                    directories.task_done()
+
+        workers = [threading.Thread(target=worker, daemon=True) for _ in range(limit)]
+        for thread in workers:
+            thread.start()
+
+        directories.join()
+        for _ in workers:
+            directories.put(None)
+        for thread in workers:
+            thread.join()
+
+        # Always delivered so the consumer can count finished devices
+        while True:
+            try:
+                results.put(_DEVICE_DONE, timeout=0.1)
+                return
+            except queue.Full:
+                if stop.is_set():
+                    return
@@ -0,0 +1,170 @@
+import os
+import time
+import pickle
+import logging
+import threading
+
+from .filesystem import OS_FILESYSTEM
+
+# Index file format; older or newer files are discarded
+_FORMAT_VERSION = 2
+
+# Directories modified this close to the scan are listed again next time,
+# since a change within the same timestamp tick would not move their mtime
+_RACY_SECONDS = 2
+
+
+class DirectoryIndex:
+    """
+    Per-directory scan summaries that let rescans skip unchanged directories.
+
+    For each directory the index keeps its mtime, the analyzed records of its
+    files and its subdirectories. On rescan a directory whose mtime is
+    unchanged costs one stat: its cached records are reused without listing
+    it or analyzing its files. Changed directories are listed again.
+    Directories modified within _RACY_SECONDS of a scan are stored without
+    an mtime, so filesystems with coarse timestamps list them again.
+
+    A directory's mtime only changes when entries are added, removed or
+    renamed, so a file rewritten in place keeps its cached size and dates
+    until its directory changes. The index is stored with pickle and is
+    discarded when the scan options it was built with change.
+    """
+
+    def __init__(self, path, signature='', fs=None):
+        """
+        Args:
+            path (str): File the index is loaded from and saved to
+            signature (str): Scan options the cached results depend on
+            fs: Filesystem backend used for directory stats
+        """
+        self.path = path
+        self.signature = signature
+        self.fs = fs or OS_FILESYSTEM
+        # (directory path, rel) -> (mtime, records, subdirs)
+        self.entries = None
+        self.listed = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, scan_options, signature='', fs=None):
+        """Create an index at scan_options.directory_index, or return None if it is not set."""
+        path = scan_options.get('directory_index')
+        if not path:
+            return None
+        return cls(os.path.expanduser(path), signature, fs)
+
+    def load(self):
+        """Load the index file, starting empty if it is missing, outdated or unreadable."""
+        with self._lock:
+            if self.entries is not None:
+                return
+            self.entries = {}
+            try:
+                with open(self.path, 'rb') as f:
+                    version, signature, entries = pickle.load(f)
+                if version == _FORMAT_VERSION and signature == self.signature:
+                    self.entries = entries
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logging.error(f"Error loading directory index {self.path}: {e}")
+
+    def save(self):
+        """Write the index file atomically."""
+        with self._lock:
+            if self.entries is None:
+                return
+            temp_path = f"{self.path}.tmp"
+            try:
+                with open(temp_path, 'wb') as f:
+                    pickle.dump((_FORMAT_VERSION, self.signature, self.entries), f, pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, self.path)
+            except Exception as e:
+                logging.error(f"Error saving directory index {self.path}: {e}")
+
+    def cached_total(self, top):
+        """Return the number of cached records below top, or None if top was never scanned."""
+        self.load()
+        prefix = top.rstrip(os.sep) + os.sep
+        with self._lock:
+            if (top, '') not in self.entries:
+                return None
+            return sum(
+                len(records)
+                for (path, _), (_, records, _) in self.entries.items()
+                if path == top or path.startswith(prefix)
+            )
+
+    def walk(self, top, scan_filter, analyze, cancel_token=None):
+        """
+        Walk a tree like ScanFilter.walk, yielding analyzed records
+
+        Args:
+            top (str): Root directory
+            scan_filter (ScanFilter): Filter used to list changed directories
+            analyze (callable): Turns a DirEntry/ProjectRoot into a record or None;
+                may raise TimeoutError for entries the caller retries itself
+            cancel_token (CancellationToken): Optional token checked per directory
+
+        Yields:
+            dict: File records; cached records are yielded as copies
+        """
+        self.load()
+        started = time.time()
+        stack = [(top, '')]
+        visited = set()
+        seen = set()
+
+        while stack:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            path, rel = stack.pop()
+            key = (path, rel)
+            seen.add(key)
+
+            try:
+                stat = self.fs.stat(path)
+                mtime = getattr(stat, 'st_mtime_ns', stat.st_mtime)
+            except OSError as e:
+                logging.error(f"Error accessing directory {path}: {e}")
+                continue
+
+            cached = self.entries.get(key)
+            if cached is not None and cached[0] == mtime:
+                self.reused += 1
+                _, records, subdirs = cached
+                for record in records:
+                    yield dict(record)
+            else:
+                self.listed += 1
+                files, subdirs = scan_filter.scan_dir(path, rel, visited)
+                records = []
+                complete = True
+                for entry in files:
+                    try:
+                        record = analyze(entry)
+                    except TimeoutError:
+                        # Retried by the caller; list this directory again next time
+                        complete = False
+                        continue
+                    if record is not None:
+                        # Copied before the consumer can add keywords or targets
+                        records.append(dict(record))
+                        yield record
+
+                if not complete or stat.st_mtime >= started - _RACY_SECONDS:
+                    mtime = None
+                with self._lock:
+                    self.entries[key] = (mtime, records, subdirs)
+
+            stack.extend(reversed(subdirs))
+
+        # Forget directories below top that no longer exist or are now excluded
+        prefix = top.rstrip(os.sep) + os.sep
+        with self._lock:
+            for key in [key for key in self.entries
+                        if (key[0] == top or key[0].startswith(prefix)) and key not in seen]:
+                del self.entries[key]
+        self.save()
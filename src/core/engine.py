@@ -0,0 +1,306 @@
+import logging
+import threading
+
+from .ai_classifier import AIClassifier
+from .estimator import ScanEstimator
+from .external_grouping import DirectorySet, ExternalGrouper, MoveJournal
+from .file_analyzer import FileAnalyzer
+from .filesystem import OS_FILESYSTEM
+from .folder_manager import FolderManager
+from .io_budget import IOBudget, ThrottledFileSystem
+from .io_scheduler import IOScheduler
+from .logging_config import configure_logging
+from .progress import stage_callback
+from .settings import load_settings
+from .version_grouper import VersionGrouper
+
+_shared_engine = None
+_shared_lock = threading.Lock()
+
+
+class Engine:
+    """
+    Long-lived session owning the analyzer, classifier and folder manager.
+
+    Components, compiled rules and caches are built once and reused by every
+    run, so repeated runs start warm. Runs may be started from several
+    threads at once: each run takes a snapshot of the components, and
+    reload() swaps in new ones without disturbing runs in progress.
+    All filesystem calls draw from one I/O budget (settings io_budget),
+    which set_io_budget() changes for runs already in progress.
+    """
+
+    def __init__(self, settings=None, fs=None):
+        """
+        Args:
+            settings (dict): Application settings, loaded from settings.json if None
+            fs: Filesystem backend for scanning and moving, the OS if None
+        """
+        configure_logging(settings)
+        self.io_budget = IOBudget()
+        # Limits changed with set_io_budget(), kept across reloads
+        self._io_overrides = {}
+        self.fs = ThrottledFileSystem(fs or OS_FILESYSTEM, self.io_budget)
+        self._lock = threading.RLock()
+        self.reload(settings)
+
+    def reload(self, settings=None):
+        """
+        Rebuild all components, e.g. after settings.json or the mappings changed
+
+        I/O limits come from the io_budget section, except those changed
+        with set_io_budget(), which keep their runtime value.
+
+        Args:
+            settings (dict): Application settings, loaded from settings.json if None
+        """
+        if settings is None:
+            settings = load_settings()
+        budget = dict(settings.get('io_budget', {}))
+        with self._lock:
+            budget.update(self._io_overrides)
+            # A limit missing from the settings means no limit, not "keep the current one"
+            self.io_budget.update(budget.get('ops_per_second') or 0, budget.get('bytes_per_second') or 0,
+                                  budget.get('ionice'))
+        io_scheduler = IOScheduler.from_settings(settings)
+        analyzer = FileAnalyzer(settings, self.fs)
+        classifier = AIClassifier(settings, analyzer.content_analyzers, io_scheduler)
+        manager = FolderManager(self.fs, io_scheduler, analyzer.deadline_pool,
+                                settings.get('processing', {}).get('spill_dir'))
+        with self._lock:
+            if getattr(self, 'manager', None) is not None:
+                # Undo history survives a reload
+                manager.history = self.manager.history
+            self.settings = settings
+            self.settings['io_budget'] = self.io_budget.limits()
+            self.analyzer = analyzer
+            self.classifier = classifier
+            self.manager = manager
+        logging.info("Engine components loaded")
+
+    def components(self):
+        """Return a consistent (settings, analyzer, classifier, manager) snapshot."""
+        with self._lock:
+            return self.settings, self.analyzer, self.classifier, self.manager
+
+    def update_custom_rules(self, rules):
+        """Replace the custom rules; cached classifications are dropped."""
+        with self._lock:
+            self.settings.setdefault('categories', {})['custom_rules'] = rules
+            self.classifier.update_custom_rules(rules)
+
+    def set_io_budget(self, ops_per_second=None, bytes_per_second=None, ionice=None):
+        """
+        Change some of the I/O limits, also for runs in progress
+
+        Omitted limits keep their current value. Changed limits survive
+        reload().
+
+        Args:
+            ops_per_second (float): Filesystem operations per second; 0 or 'unlimited' removes the limit
+            bytes_per_second (float): Bytes read per second; 0 or 'unlimited' removes the limit
+            ionice (str): Optional I/O class, 'idle' or 'best_effort'
+
+        Returns:
+            dict: The limits now in effect
+        """
+        with self._lock:
+            self.io_budget.update(ops_per_second, bytes_per_second, ionice)
+            changed = {'ops_per_second': ops_per_second, 'bytes_per_second': bytes_per_second, 'ionice': ionice}
+            self._io_overrides.update((key, value) for key, value in changed.items() if value is not None)
+            self.settings['io_budget'] = self.io_budget.limits()
+        return self.io_budget.limits()
+
+    def cache_info(self):
+        """Return classification cache hits, misses and size."""
+        return self.classifier.cache_info()
+
+    def scan(self, directory_path, progress_callback=None, cancel_token=None):
+        """Scan a directory and return file information records."""
+        _, analyzer, _, _ = self.components()
+        return analyzer.scan_directory(directory_path, progress_callback, cancel_token)
+
+    def estimate(self, directory_path, cancel_token=None):
+        """Estimate files, bytes, categories and scan time of a directory from a sample (see ScanEstimator)."""
+        settings, analyzer, classifier, _ = self.components()
+        return ScanEstimator.from_settings(settings, analyzer, classifier).estimate(directory_path, cancel_token)
+
+    def classify(self, files_info, progress_callback=None, cancel_token=None):
+        """Classify file records and group them by category (empty categories omitted)."""
+        settings, _, classifier, _ = self.components()
+        return self._classify(settings, classifier, files_info, progress_callback, cancel_token)
+
+    def iter_classified(self, directory_path, progress_callback=None, cancel_token=None):
+        """
+        Scan and classify a directory one file at a time
+
+        Nothing is collected, so memory use does not grow with the tree.
+        Versions are not grouped, since that needs every file at once.
+
+        Args:
+            directory_path (str): Directory to scan
+            progress_callback (callable): Optional callback receiving (done, total)
+            cancel_token (CancellationToken): Optional token to stop the run
+
+        Yields:
+            tuple: (file_info, category)
+        """
+        _, analyzer, classifier, _ = self.components()
+        files_info = analyzer.iter_directory(directory_path, progress_callback, cancel_token)
+        yield from classifier.iter_classify(files_info, cancel_token)
+
+    def _classify(self, settings, classifier, files_info, progress_callback, cancel_token):
+        categorized = classifier.batch_classify(files_info, progress_callback, cancel_token)
+
+        # Keep versions, drafts and finals of the same file together
+        categories = settings.get('categories', {})
+        if categories.get('group_versions', True):
+            VersionGrouper(fuzzy=categories.get('fuzzy_versions', False)).assign_targets(files_info)
+
+        return {category: files for category, files in categorized.items() if files}
+
+    def organize(self, directory_path, progress_callback=None, cancel_token=None):
+        """
+        Scan, classify and organize a directory, then remove emptied folders
+
+        Uses the spill-to-disk pipeline when processing.spill_to_disk is set;
+        its results then hold counts and a sample of the errors rather than
+        every moved path (see FolderManager.organize_stream).
+
+        Args:
+            directory_path (str): Directory to organize
+            progress_callback (callable): Receives an integer percentage
+            cancel_token (CancellationToken): Optional token to stop the run
+
+        Returns:
+            dict: Results of FolderManager.organize_files
+
+        Raises:
+            OperationCancelled: If cancel_token was cancelled during scan or classification
+        """
+        settings, analyzer, classifier, manager = self.components()
+        report = progress_callback or (lambda percent: None)
+
+        if settings.get('processing', {}).get('spill_to_disk'):
+            with ExternalGrouper.from_settings(settings) as grouper:
+                # Scan and classify in one pass
+                classifier.classify_into(
+                    grouper,
+                    analyzer.iter_directory(
+                        directory_path,
+                        progress_callback=stage_callback(report, 0, 50),
+                        cancel_token=cancel_token
+                    ),
+                    cancel_token=cancel_token
+                )
+                report(50)
+
+                # Organize files, one target folder at a time; moves go to a journal for undo
+                results = manager.organize_stream(
+                    directory_path,
+                    grouper,
+                    len(grouper),
+                    progress_callback=stage_callback(report, 50, 95),
+                    cancel_token=cancel_token,
+                    journal=MoveJournal.create(grouper.spill_dir)
+                )
+        else:
+            files_info = analyzer.scan_directory(
+                directory_path,
+                progress_callback=stage_callback(report, 0, 50),
+                cancel_token=cancel_token
+            )
+            categorized_files = self._classify(
+                settings,
+                classifier,
+                files_info,
+                progress_callback=stage_callback(report, 50, 60),
+                cancel_token=cancel_token
+            )
+            results = manager.organize_files(
+                directory_path,
+                categorized_files,
+                progress_callback=stage_callback(report, 60, 95),
+                cancel_token=cancel_token
+            )
+
+        manager.cleanup_empty_folders(directory_path, results['source_dirs'])
+        if isinstance(results['source_dirs'], DirectorySet):
+            # Its run files are not needed once emptied folders are removed
+            results['source_dirs'].close()
+        report(100)
+        return results
+
+    def plan(self, directory_path, progress_callback=None, cancel_token=None):
+        """
+        Scan and classify a directory and return the moves organize would make
+
+        Args:
+            directory_path (str): Directory to organize
+            progress_callback (callable): Receives an integer percentage
+            cancel_token (CancellationToken): Optional token to stop the run
+
+        Returns:
+            list: Moves as {'source', 'target', 'category'} dictionaries
+        """
+        settings, analyzer, classifier, manager = self.components()
+        report = progress_callback or (lambda percent: None)
+
+        files_info = analyzer.scan_directory(
+            directory_path,
+            progress_callback=stage_callback(report, 0, 80),
+            cancel_token=cancel_token
+        )
+        categorized_files = self._classify(
+            settings,
+            classifier,
+            files_info,
+            progress_callback=stage_callback(report, 80, 100),
+            cancel_token=cancel_token
+        )
+        return manager.plan_moves(directory_path, categorized_files)
+
+    def apply(self, moves, base_path=None, progress_callback=None, cancel_token=None):
+        """
+        Execute planned moves, then remove folders they emptied below base_path
+
+        Args:
+            moves (iterable): Moves as {'source', 'target'} dictionaries
+            base_path (str): Root for empty-folder cleanup; no cleanup if None
+            progress_callback (callable): Receives an integer percentage
+            cancel_token (CancellationToken): Optional token to stop the run
+
+        Returns:
+            dict: Results of FolderManager.apply_moves
+        """
+        _, _, _, manager = self.components()
+        report = progress_callback or (lambda percent: None)
+
+        results = manager.apply_moves(moves, stage_callback(report, 0, 95), cancel_token)
+        if base_path is not None:
+            manager.cleanup_empty_folders(base_path, results['source_dirs'])
+        report(100)
+        return results
+
+    def undo_last(self, progress_callback=None, cancel_token=None):
+        """Undo the most recent organize or apply run; returns the undo results, or None."""
+        _, _, _, manager = self.components()
+        return manager.undo_last_operation(progress_callback, cancel_token)
+
+
+def get_engine(settings=None):
+    """
+    Return the engine shared by the GUI, CLI and service in this process
+
+    Args:
+        settings (dict): Settings used if the engine does not exist yet
+
+    Returns:
+        Engine: Shared engine
+    """
+    global _shared_engine
+
+    with _shared_lock:
+        if _shared_engine is None:
+            _shared_engine = Engine(settings)
+        return _shared_engine
@@ -0,0 +1,279 @@
+import math
+import time
+import random
+import logging
+import threading
+from collections import deque, namedtuple
+
+# Estimate with a 95% confidence interval
+Interval = namedtuple('Interval', 'value low high')
+
+# Two-sided 95% quantile of the normal distribution
+_Z95 = 1.96
+
+# Directories a worker should have to itself before another thread pays off
+_DIRS_PER_WORKER = 64
+
+
+def _interval(value, variance, floor=0.0):
+    margin = _Z95 * math.sqrt(max(variance, 0.0))
+    return Interval(value, max(floor, value - margin), value + margin)
+
+
+class _Node:
+    """Listing of one directory plus a random sample of its analyzed files."""
+
+    __slots__ = ('subdirs', 'count', 'sizes', 'categories')
+
+    def __init__(self, subdirs, count, sizes, categories):
+        self.subdirs = subdirs
+        # Estimated number of records the scan would produce here
+        self.count = count
+        # Sizes and categories of the sampled records
+        self.sizes = sizes
+        self.categories = categories
+
+    def mean_size(self):
+        return sum(self.sizes) / len(self.sizes) if self.sizes else 0.0
+
+
+class ScanEstimator:
+    """
+    Estimate the size of a tree from a small random sample of it.
+
+    Directories are listed breadth-first up to exact_dirs; if that covers
+    the whole tree the file and directory counts are exact. Otherwise the
+    subtrees below the unlisted frontier are estimated with random probes
+    (Knuth's estimator) until max_probes or the time budget: a probe
+    starts at a random frontier directory and descends through random
+    subdirectories, multiplying the branching factors along its path,
+    which gives an unbiased estimate of everything below the frontier;
+    the spread over all probes gives the confidence interval.
+    In every listed directory up to samples_per_dir files are analyzed to
+    estimate sizes and categories. Probes stop at max_depth; estimates
+    whose probes hit it are reported as depth_limited.
+    """
+
+    def __init__(self, analyzer, classifier=None, max_depth=32, max_probes=2000, time_budget=0.3,
+                 exact_dirs=256, samples_per_dir=8, seed=None):
+        """
+        Args:
+            analyzer (FileAnalyzer): Lists directories and analyzes sampled files
+            classifier (AIClassifier): Classifies sampled files; no categories if None
+            max_depth (int): Deepest level probes descend to
+            max_probes (int): Maximum number of random probes
+            time_budget (float): Seconds after which no further probe is started
+            exact_dirs (int): Directories listed breadth-first before sampling starts
+            samples_per_dir (int): Files analyzed per listed directory
+            seed (int): Random seed, for reproducible estimates
+        """
+        self.analyzer = analyzer
+        self.classifier = classifier
+        self.max_depth = max_depth
+        self.max_probes = max_probes
+        self.time_budget = time_budget
+        self.exact_dirs = exact_dirs
+        self.samples_per_dir = samples_per_dir
+        self.random = random.Random(seed)
+        # One estimate at a time; the listings of a run are kept on the instance
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings, analyzer, classifier=None):
+        """Create an estimator using the estimator section of the settings."""
+        options = settings.get('estimator', {})
+        return cls(
+            analyzer,
+            classifier,
+            max_depth=options.get('max_depth', 32),
+            max_probes=options.get('max_probes', 2000),
+            time_budget=options.get('time_budget_ms', 300) / 1000,
+            exact_dirs=options.get('exact_dirs', 256),
+            samples_per_dir=options.get('samples_per_dir', 8)
+        )
+
+    def estimate(self, root, cancel_token=None, sample_files=True):
+        """
+        Estimate what a scan of root would find
+
+        Args:
+            root (str): Directory to estimate
+            cancel_token (CancellationToken): Optional token checked per directory
+            sample_files (bool): Analyze sampled files; without it only
+                directories are listed and bytes and categories are not estimated
+
+        Returns:
+            dict: 'files', 'bytes', 'directories' and 'scan_seconds' as
+                Interval(value, low, high); 'categories' mapping category
+                names to Intervals of file counts (empty without a
+                classifier); 'exact' if the whole tree was listed;
+                'probes', 'depth_limited' and 'elapsed' (seconds)
+        """
+        with self._lock:
+            return self._estimate(root, cancel_token, sample_files)
+
+    def _estimate(self, root, cancel_token, sample_files):
+        started = time.monotonic()
+        self._nodes = {}
+        self._visited = set()
+        self._list_time = 0.0
+        self._file_time = 0.0
+        self._files_analyzed = 0
+        self._sample_files = sample_files
+
+        frontier = self._list_breadth_first(root, cancel_token)
+        known = self._known_totals()
+        exact = not frontier
+        if exact:
+            result = {
+                'files': Interval(known['files'], known['files'], known['files']),
+                'directories': Interval(known['directories'], known['directories'], known['directories']),
+                'bytes': _interval(known['bytes'], known['bytes_var']),
+                'categories': {name: Interval(count, count, count) for name, count in known['categories'].items()}
+            }
+            probes = depth_limited = 0
+        else:
+            result, probes, depth_limited = self._probe(frontier, known, started, cancel_token)
+
+        listed = len(self._nodes)
+        list_cost = self._list_time / listed if listed else 0.0
+        file_cost = self._file_time / self._files_analyzed if self._files_analyzed else 0.0
+        files, directories = result['files'], result['directories']
+        result['scan_seconds'] = Interval(
+            directories.value * list_cost + files.value * file_cost,
+            directories.low * list_cost + files.low * file_cost,
+            directories.high * list_cost + files.high * file_cost
+        )
+        result.update(exact=exact, probes=probes, depth_limited=depth_limited,
+                      elapsed=time.monotonic() - started)
+        logging.info(f"Estimated {files.value:.0f} files under {root} "
+                     f"({files.low:.0f}-{files.high:.0f}) from {listed} directories")
+        return result
+
+    def suggested_workers(self, estimate, max_workers):
+        """
+        Choose a worker count for scanning the estimated tree
+
+        Args:
+            estimate (dict): Result of estimate()
+            max_workers (int): Upper limit, e.g. the device's concurrency
+
+        Returns:
+            int: Between 1 and max_workers
+        """
+        wanted = int(estimate['directories'].value // _DIRS_PER_WORKER) or 1
+        return max(1, min(max_workers, wanted))
+
+    def _node(self, path, rel):
+        node = self._nodes.get(path)
+        if node is not None:
+            return node
+
+        start = time.perf_counter()
+        entries, subdirs = self.analyzer.scan_filter.scan_dir(path, rel, self._visited)
+        self._list_time += time.perf_counter() - start
+
+        # Analyze a sample; files rejected by the analyzer (e.g. too large) scale the count down
+        sample = []
+        if self._sample_files:
+            sample = entries if len(entries) <= self.samples_per_dir else self.random.sample(entries, self.samples_per_dir)
+        sizes, categories = [], []
+        start = time.perf_counter()
+        for entry in sample:
+            file_info = self.analyzer.analyze_entry(entry)
+            if file_info is None:
+                continue
+            sizes.append(file_info.get('size', 0))
+            if self.classifier is not None:
+                category = self.classifier.classify_file(file_info, defer_content=True)
+                categories.append(category if isinstance(category, str) else 'other')
+        self._file_time += time.perf_counter() - start
+        self._files_analyzed += len(sample)
+
+        count = len(entries) * len(sizes) / len(sample) if sample else len(entries)
+        node = self._nodes[path] = _Node(subdirs, count, sizes, categories)
+        return node
+
+    def _list_breadth_first(self, root, cancel_token):
+        """List up to exact_dirs directories; return the (path, rel, depth) of those left unlisted."""
+        queue = deque([(root, '', 0)])
+        while queue and len(self._nodes) < self.exact_dirs:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            path, rel, depth = queue.popleft()
+            queue.extend((sub_path, sub_rel, depth + 1) for sub_path, sub_rel in self._node(path, rel).subdirs)
+        return list(queue)
+
+    def _known_totals(self):
+        # Counts of listed directories are exact; sizes and categories are
+        # stratified samples of each directory
+        files = bytes_ = bytes_var = 0.0
+        categories = {}
+        for node in self._nodes.values():
+            files += node.count
+            n, k = node.count, len(node.sizes)
+            bytes_ += n * node.mean_size()
+            if 1 < k < n:
+                mean = node.mean_size()
+                variance = sum((size - mean) ** 2 for size in node.sizes) / (k - 1)
+                bytes_var += n * n * variance / k * (1 - k / n)
+            for category in node.categories:
+                categories[category] = categories.get(category, 0.0) + n / len(node.categories)
+        return {
+            'files': files,
+            'directories': float(len(self._nodes)),
+            'bytes': bytes_,
+            'bytes_var': bytes_var,
+            'categories': categories
+        }
+
+    def _probe(self, frontier, known, started, cancel_token):
+        """Add Knuth estimates of the subtrees below the frontier to the known totals."""
+        samples = []
+        depth_limited = 0
+        while len(samples) < self.max_probes and (
+                not samples or time.monotonic() - started < self.time_budget):
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            files = bytes_ = directories = 0.0
+            categories = {}
+            # Start below a random frontier directory, standing for all of them
+            path, rel, depth = self.random.choice(frontier)
+            weight = float(len(frontier))
+            while True:
+                node = self._node(path, rel)
+                directories += weight
+                files += weight * node.count
+                bytes_ += weight * node.count * node.mean_size()
+                for category in node.categories:
+                    categories[category] = categories.get(category, 0.0) + weight * node.count / len(node.categories)
+                if not node.subdirs:
+                    break
+                if depth >= self.max_depth:
+                    depth_limited += 1
+                    break
+                weight *= len(node.subdirs)
+                path, rel = self.random.choice(node.subdirs)
+                depth += 1
+            samples.append((files, bytes_, directories, categories))
+
+        n = len(samples)
+
+        def summarize(values, offset, offset_var=0.0, floor=0.0):
+            mean = sum(values) / n
+            variance = sum((value - mean) ** 2 for value in values) / (n - 1) / n if n > 1 else mean * mean
+            return _interval(offset + mean, offset_var + variance, floor)
+
+        names = set(known['categories']) | {name for sample in samples for name in sample[3]}
+        return {
+            # At least the files and directories actually listed exist
+            'files': summarize([sample[0] for sample in samples], known['files'],
+                               floor=sum(node.count for node in self._nodes.values())),
+            'bytes': summarize([sample[1] for sample in samples], known['bytes'], known['bytes_var']),
+            'directories': summarize([sample[2] for sample in samples], known['directories'],
+                                     floor=len(self._nodes)),
+            'categories': {
+                name: summarize([sample[3].get(name, 0.0) for sample in samples], known['categories'].get(name, 0.0))
+                for name in names
+            }
+        }, n, depth_limited
@@ -0,0 +1,243 @@
+import os
+import heapq
+import pickle
+import shutil
+import logging
+import tempfile
+import threading
+
+# Rough per-item cost of the in-memory buffer beyond the pickled bytes
+_RECORD_OVERHEAD = 200
+
+
+def relative_target(category, file_info):
+    """Target folder of a file relative to the base path (see FolderManager.target_dir)."""
+    return file_info.get('target_folder') or category
+
+
+class ExternalSorter:
+    """
+    Sort (key, value) items on disk with bounded memory.
+
+    Items are buffered in memory with their values pickled. Whenever the
+    buffer exceeds the memory budget it is sorted and written out as a run
+    file; iterating merges all runs, so items come back in key order while
+    memory use stays around the budget whatever the number of items.
+    """
+
+    def __init__(self, memory_budget_mb=256, spill_dir=None):
+        """
+        Args:
+            memory_budget_mb (float): Approximate memory allowed for buffered items
+            spill_dir (str): Directory for run files (defaults to the system temp dir)
+        """
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.spill_dir = spill_dir
+        self.run_dir = None
+        self.runs = []
+        self.buffer = []
+        self.buffer_bytes = 0
+        self.count = 0
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Create a sorter using processing.memory_budget_mb and processing.spill_dir."""
+        processing = settings.get('processing', {})
+        return cls(processing.get('memory_budget_mb', 256), processing.get('spill_dir'))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def push(self, key, value=None):
+        """Add an item; key is a tuple of strings and numbers, value any picklable object."""
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        self.buffer.append((key, data))
+        self.buffer_bytes += len(data) + sum(len(part) for part in key if isinstance(part, str)) + _RECORD_OVERHEAD
+        self.count += 1
+        if self.buffer_bytes >= self.memory_budget:
+            self._spill()
+
+    def _spill(self):
+        """Sort the buffer and write it out as a run file."""
+        if self.run_dir is None:
+            self.run_dir = tempfile.mkdtemp(prefix='filesynapse-runs-', dir=self.spill_dir)
+        path = os.path.join(self.run_dir, f'run-{len(self.runs):05d}')
+
+        self.buffer.sort(key=lambda item: item[0])
+        with open(path, 'wb') as f:
+            pickler = pickle.Pickler(f, pickle.HIGHEST_PROTOCOL)
+            for item in self.buffer:
+                pickler.dump(item)
+        logging.info(f"Spilled {len(self.buffer)} records to {path}")
+
+        self.runs.append(path)
+        self.buffer = []
+        self.buffer_bytes = 0
+
+    def _read_run(self, path):
+        with open(path, 'rb') as f:
+            unpickler = pickle.Unpickler(f)
+            while True:
+                try:
+                    yield unpickler.load()
+                except EOFError:
+                    return
+
+    def items(self):
+        """
+        Yield all items in key order
+
+        Yields:
+            tuple: (key, value)
+        """
+        self.buffer.sort(key=lambda item: item[0])
+        sources = [self._read_run(path) for path in self.runs] + [iter(self.buffer)]
+        for key, data in heapq.merge(*sources, key=lambda item: item[0]):
+            yield key, pickle.loads(data)
+
+    def close(self):
+        """Remove run files and drop buffered items."""
+        self.buffer = []
+        self.buffer_bytes = 0
+        self.runs = []
+        if self.run_dir is not None:
+            shutil.rmtree(self.run_dir, ignore_errors=True)
+            self.run_dir = None
+
+
+class ExternalGrouper(ExternalSorter):
+    """
+    Group classified file records by (category, target folder) on disk.
+
+    Iterating yields the records grouped by category and target folder,
+    and by path inside a folder, with memory bounded as in ExternalSorter.
+    """
+
+    def add(self, category, file_info):
+        """Add a classified file record."""
+        self.push((category, relative_target(category, file_info), file_info['path']), file_info)
+
+    def __iter__(self):
+        """
+        Yield (category, file_info) pairs ordered by category, target folder and path
+
+        Yields:
+            tuple: (category, file information dictionary)
+        """
+        for key, file_info in self.items():
+            yield key[0], file_info
+
+
+class DirectorySet(ExternalSorter):
+    """
+    Set of directory paths kept on disk, e.g. the folders files were moved out of.
+
+    Iterating yields each directory once, deepest first, which is the
+    order FolderManager.cleanup_empty_folders needs.
+    """
+
+    def __init__(self, memory_budget_mb=16, spill_dir=None):
+        super().__init__(memory_budget_mb, spill_dir)
+        self._last = None
+
+    def add(self, path):
+        """Add a directory; paths are made absolute."""
+        path = os.path.abspath(path)
+        # Files usually come several at a time from the same folder
+        if path != self._last:
+            self._last = path
+            self.push((-path.count(os.sep), path))
+
+    def __iter__(self):
+        previous = None
+        for key, _ in self.items():
+            if key != previous:
+                previous = key
+                yield key[1]
+
+
+class MoveJournal:
+    """
+    Moves of one operation appended to a file instead of kept in memory.
+
+    Iterating reads the moves back in the order they were recorded as
+    {'source', 'target'} dictionaries, so an operation of any size can be
+    undone. The file is deleted by remove().
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Journal file, created or appended to
+        """
+        self.path = path
+        self.count = 0
+        self._file = None
+        # Slow moves may be recorded from another thread
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, spill_dir=None):
+        """Create a journal in a new file below spill_dir (the system temp dir if None)."""
+        fd, path = tempfile.mkstemp(prefix='filesynapse-moves-', suffix='.pickle', dir=spill_dir)
+        os.close(fd)
+        return cls(path)
+
+    def __len__(self):
+        return self.count
+
+    def record(self, source, target):
+        """Append a move."""
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'ab')
+            pickle.dump((source, target), self._file, pickle.HIGHEST_PROTOCOL)
+            self.count += 1
+
+    def __iter__(self):
+        self.close()
+        try:
+            with open(self.path, 'rb') as f:
+                unpickler = pickle.Unpickler(f)
+                while True:
+                    try:
+                        source, target = unpickler.load()
+                    except EOFError:
+                        return
+                    yield {'source': source, 'target': target}
+        except FileNotFoundError:
+            return
+
+    def chunks(self, size):
+        """Yield the moves as lists of at most size moves."""
+        chunk = []
+        for move in self:
+            chunk.append(move)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def close(self):
+        """Flush and close the journal file; record() reopens it."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def remove(self):
+        """Delete the journal file."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.error(f"Error removing move journal {self.path}: {e}")
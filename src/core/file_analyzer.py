@@ -1,22 +1,73 @@
 import os
+import json
 import mimetypes
 import logging
 from datetime import datetime
 import re
 
+from .content_analyzers import ContentAnalyzerRegistry
+from .deadlines import DeadlinePool, OperationTimeout, Quarantine
+from .logging_config import configure_logging
+from .device_scheduler import DeviceScheduler
+from .directory_index import DirectoryIndex
+from .estimator import ScanEstimator
+from .filesystem import OS_FILESYSTEM
+from .progress import OperationCancelled, ProgressReporter
+from .project_detector import ProjectRoot
+from .scan_filter import ScanFilter
+from .settings import load_settings
+
 # Initialize mimetypes
 mimetypes.init()
 
+# Regular expressions for extracting information from filenames
+VERSION_REGEX = re.compile(r'v(\d+(\.\d+)*)|version\s*(\d+(\.\d+)*)', re.IGNORECASE)
+DRAFT_REGEX = re.compile(r'draft|taslak', re.IGNORECASE)
+FINAL_REGEX = re.compile(r'final|son', re.IGNORECASE)
+
 class FileAnalyzer:
     """
     A class to analyze files and extract useful information
     """
     
-    def __init__(self):
+    def __init__(self, settings=None, fs=None):
         """
         Initialize the FileAnalyzer with common file extensions and MIME types
+        
+        Args:
+            settings (dict): Application settings, loaded from settings.json if None
+            fs: Filesystem backend (OSFileSystem or MemoryFileSystem), the OS if None
         """
         self.setup_logging()
+        self.fs = fs or OS_FILESYSTEM
+        
+        if settings is None:
+            settings = load_settings()
+        scan_options = settings.get('scan_options', {})
+        
+        # Directory pruning, hidden/symlink handling and the size limit
+        self.scan_filter = ScanFilter.from_settings(scan_options, self.fs)
+        
+        # Summaries of directories already scanned, to skip unchanged ones on rescan
+        self.directory_index = DirectoryIndex.from_settings(
+            scan_options,
+            json.dumps(scan_options, sort_keys=True, default=str),
+            self.fs
+        )
+        
+        # Quick sampled size estimates for progress totals and worker counts
+        self.estimator = None
+        if settings.get('estimator', {}).get('enabled', True):
+            self.estimator = ScanEstimator.from_settings(settings, self)
+        
+        # Per-device worker limits for multi-root scans
+        self.device_scheduler = DeviceScheduler.from_settings(settings, self.fs)
+        
+        # Per-file operations are bounded by processing.timeout
+        self.deadline_pool = DeadlinePool.from_settings(settings, self.fs)
+        
+        # Content is only read on request (see AIClassifier), per MIME type
+        self.content_analyzers = ContentAnalyzerRegistry.from_settings(settings, self.fs, self.deadline_pool)
         
         # Dictionary to store common file types and their extensions
         self.file_extensions = {
@@ -44,60 +95,183 @@ class FileAnalyzer:
         }
         
         # Regular expressions for extracting information from filenames
-        self.version_regex = re.compile(r'v(\d+(\.\d+)*)|version\s*(\d+(\.\d+)*)', re.IGNORECASE)
-        self.draft_regex = re.compile(r'draft|taslak', re.IGNORECASE)
-        self.final_regex = re.compile(r'final|son', re.IGNORECASE)
+        self.version_regex = VERSION_REGEX
+        self.draft_regex = DRAFT_REGEX
+        self.final_regex = FINAL_REGEX
     
     def setup_logging(self):
         """Setup logging configuration."""
-        try:
-            if not os.path.exists('logs'):
-                os.makedirs('logs')
-                
-            logging.basicConfig(
-                filename=os.path.join('logs', 'file_analyzer.log'),
-                level=logging.INFO,
-                format='%(asctime)s - %(levelname)s - %(message)s'
-            )
-        except Exception as e:
-            # Fall back to console logging if file logging fails
-            logging.basicConfig(
-                level=logging.INFO,
-                format='%(asctime)s - %(levelname)s - %(message)s'
-            )
-            logging.error(f"Error setting up file logging: {e}")
-        
-    def scan_directory(self, directory_path):
+        configure_logging()
+        
+    def scan_directory(self, directory_path, progress_callback=None, cancel_token=None):
         """
         Scan a directory and return information about all files
         
         Args:
             directory_path (str): Path to the directory to scan
+            progress_callback (callable): Optional callback receiving (done, total)
+            cancel_token (CancellationToken): Optional token to stop the scan
             
         Returns:
             list: List of dictionaries with file information
+            
+        Raises:
+            OperationCancelled: If cancel_token was cancelled during the scan
+        """
+        files_info = list(self.iter_directory(directory_path, progress_callback, cancel_token))
+        logging.info(f"Found {len(files_info)} files")
+        return files_info
+    
+    def iter_directory(self, directory_path, progress_callback=None, cancel_token=None, total=None):
+        """
+        Scan a directory and yield information about each file as it is analyzed
+        
+        Args:
+            directory_path (str): Path to the directory to scan
+            progress_callback (callable): Optional callback receiving (done, total)
+            cancel_token (CancellationToken): Optional token to stop the scan
+            total (int): Expected number of files; if None, taken from the
+                directory index or the estimator, else reported as unknown (0)
+            
+        Yields:
+            dict: File information dictionary
+            
+        Raises:
+            OperationCancelled: If cancel_token was cancelled during the scan
         """
         logging.info(f"Scanning directory: {directory_path}")
         
-        files_info = []
+        if progress_callback is not None and total is None and self.directory_index is not None:
+            # The previous scan's count is close enough and costs no listing
+            total = self.directory_index.cached_total(directory_path)
+        if progress_callback is not None and total is None and self.estimator is not None:
+            # Exact for small trees, a sampled estimate for large ones
+            total = round(self.estimator.estimate(directory_path, cancel_token, sample_files=False)['files'].value)
+        # Otherwise the total stays unknown; a second walk just to count would double the listing
+        progress = ProgressReporter(progress_callback, total or 0)
+        
+        # Files that miss the processing.timeout deadline are retried at the end
+        quarantine = Quarantine(self.deadline_pool)
+        # Whether deadlines apply is decided per directory, so a network
+        # mount below a local root is covered; entries arrive one directory at a time
+        current = {'directory': None, 'enforced': False}
+        
+        def analyze(entry):
+            directory = os.path.dirname(entry.path)
+            if directory != current['directory']:
+                current['directory'] = directory
+                current['enforced'] = self.deadline_pool.enforced_for(self._device_of(directory))
+            if not current['enforced']:
+                return self.analyze_entry(entry)
+            return quarantine.call(entry.path, self.analyze_entry, entry)
         
         try:
-            for root, dirs, files in os.walk(directory_path):
-                for filename in files:
-                    file_path = os.path.join(root, filename)
+            if self.directory_index is not None:
+                # Unchanged directories are answered from the index
+                for file_info in self.directory_index.walk(
+                        directory_path, self.scan_filter, analyze, cancel_token):
+                    progress.advance()
+                    yield file_info
+            else:
+                # Excluded subtrees are pruned by the filter and never listed
+                for entry in self.scan_filter.walk(directory_path, cancel_token):
+                    if cancel_token is not None:
+                        cancel_token.raise_if_cancelled()
                     
                     # Get file information
-                    file_info = self.analyze_file(file_path)
+                    try:
+                        file_info = analyze(entry)
+                    except OperationTimeout:
+                        continue
+                    progress.advance()
                     
                     if file_info:
-                        files_info.append(file_info)
+                        yield file_info
                         
+            for _, file_info, _ in quarantine.retry():
+                progress.advance()
+                if file_info:
+                    yield file_info
+                    
+        except OperationCancelled:
+            logging.info(f"Scan cancelled: {directory_path}")
+            raise
         except Exception as e:
             logging.error(f"Error scanning directory: {e}")
             
+        progress.finish()
+    
+    def scan_roots(self, roots, progress_callback=None, cancel_token=None):
+        """
+        Scan several directories, possibly on different disks, in parallel
+        
+        Roots are grouped by device; each device is walked by its own pool
+        of workers sized for its kind (see DeviceScheduler), and all devices
+        are scanned concurrently.
+        
+        Args:
+            roots (list): Paths of the directories to scan
+            progress_callback (callable): Optional callback receiving (done, total)
+            cancel_token (CancellationToken): Optional token to stop the scan
+            
+        Returns:
+            list: List of dictionaries with file information, in completion order
+            
+        Raises:
+            OperationCancelled: If cancel_token was cancelled during the scan
+        """
+        logging.info(f"Scanning {len(roots)} root(s)")
+        
+        total = 0
+        workers_for = None
+        if self.estimator is not None:
+            # Small roots do not need a full pool of workers
+            # Keyed like the normalized roots the device scheduler passes back
+            estimates = {}
+            for root in {os.path.abspath(root) for root in roots}:
+                if self.fs.isdir(root):
+                    estimates[root] = self.estimator.estimate(root, cancel_token, sample_files=False)
+            total = round(sum(estimate['files'].value for estimate in estimates.values()))
+            
+            def workers_for(device_roots, limit):
+                counts = [self.estimator.suggested_workers(estimates[root], limit)
+                          for root in device_roots if root in estimates]
+                return min(counts) if counts else limit
+        
+        progress = ProgressReporter(progress_callback, total)
+        files_info = []
+        for file_info in self.device_scheduler.iter_scan(roots, self.scan_filter, self.analyze_entry, cancel_token,
+                                                         workers_for=workers_for):
+            files_info.append(file_info)
+            progress.advance()
+            
+        progress.finish()
         logging.info(f"Found {len(files_info)} files")
         return files_info
     
+    def _device_of(self, path):
+        """Device number of path when the deadline pool needs it to decide, else None."""
+        if self.deadline_pool.timeout is None or self.deadline_pool.scope == 'all':
+            return None
+        try:
+            return self.fs.stat(path).st_dev
+        except OSError:
+            return None
+            
+    def analyze_entry(self, entry):
+        """
+        Analyze an entry produced by the scan filter
+        
+        Args:
+            entry (os.DirEntry or ProjectRoot): File entry or project root
+            
+        Returns:
+            dict: Dictionary with file information
+        """
+        if isinstance(entry, ProjectRoot):
+            return self.analyze_project(entry)
+        return self.analyze_file(entry.path)
+    
     def analyze_file(self, file_path):
         """
         Analyze a file and extract information
@@ -109,22 +283,26 @@ class FileAnalyzer:
             dict: Dictionary with file information
         """
         try:
-            # Skip files that don't exist or are too large
-            if not os.path.exists(file_path) or os.path.getsize(file_path) > 100 * 1024 * 1024:  # Skip files > 100MB
+            # A single stat call provides size and timestamps
+            try:
+                stat = self.fs.stat(file_path)
+            except FileNotFoundError:
+                return None
+            
+            # Skip files larger than scan_options.max_size_mb
+            if not self.scan_filter.accepts_size(stat.st_size):
                 return None
             
             # Basic file information
             filename = os.path.basename(file_path)
             file_extension = os.path.splitext(filename)[1].lower()
-            file_size = os.path.getsize(file_path)
+            file_size = stat.st_size
             
             # Get file modification time
-            modification_time = os.path.getmtime(file_path)
-            modified_date = datetime.fromtimestamp(modification_time)
+            modified_date = datetime.fromtimestamp(stat.st_mtime)
             
             # Get file creation time
-            creation_time = os.path.getctime(file_path)
-            creation_date = datetime.fromtimestamp(creation_time)
+            creation_date = datetime.fromtimestamp(stat.st_ctime)
             
             # Get MIME type
             mime_type = self.get_mime_type(file_path)
@@ -138,23 +316,53 @@ class FileAnalyzer:
                 'name': filename,
                 'extension': file_extension,
                 'size': file_size,
+                'device': stat.st_dev,
+                'inode': stat.st_ino,
                 'modified_date': modified_date,
                 'creation_date': creation_date,
                 'mime_type': mime_type,
                 'version_info': version_info
             }
             
-            # Add file content analysis if possible
-            if file_size < 10 * 1024 * 1024:  # Only analyze files < 10MB
-                keywords = self.extract_keywords(file_path, mime_type)
-                file_info['keywords'] = keywords
-            
             return file_info
             
         except Exception as e:
             logging.error(f"Error analyzing file {file_path}: {e}")
             return None
     
+    def analyze_project(self, project):
+        """
+        Build a file information record for a project root
+        
+        The directory is treated as one unit: its contents are not walked,
+        so the reported size is that of the directory entry only.
+        
+        Args:
+            project (ProjectRoot): Project root found by the scanner
+            
+        Returns:
+            dict: Dictionary with project information
+        """
+        try:
+            stat = self.fs.stat(project.path)
+            return {
+                'path': project.path,
+                'name': project.name,
+                'extension': '',
+                'size': stat.st_size,
+                'device': stat.st_dev,
+                'inode': stat.st_ino,
+                'modified_date': datetime.fromtimestamp(stat.st_mtime),
+                'creation_date': datetime.fromtimestamp(stat.st_ctime),
+                'mime_type': 'inode/directory',
+                'version_info': self.extract_version_info(project.name),
+                'is_project': True,
+                'project_type': project.project_type
+            }
+        except Exception as e:
+            logging.error(f"Error analyzing project {project.path}: {e}")
+            return None
+    
     def get_mime_type(self, file_path):
         """
         Get the MIME type of a file using file extension
@@ -226,6 +434,9 @@ class FileAnalyzer:
         """
         Extract keywords from a file's content
         
+        Scanning no longer calls this; content is analyzed lazily through
+        self.content_analyzers when the classifier needs it.
+        
         Args:
             file_path (str): Path to the file
             mime_type (str): MIME type of the file
@@ -233,29 +444,7 @@ class FileAnalyzer:
         Returns:
             list: List of keywords
         """
-        keywords = []
-        
-        try:
-            # For text files
-            if mime_type.startswith('text/') or mime_type in ['application/pdf', 'application/msword', 
-                                                              'application/vnd.openxmlformats-officedocument.wordprocessingml.document']:
-                # Read the first 1000 bytes as text
-                with open(file_path, 'rb') as f:
-                    content = f.read(1000)
-                
-                # Try to decode as UTF-8, ignore errors
-                try:
-                    text = content.decode('utf-8', errors='ignore')
-                    # Simple keyword extraction - just split by spaces and filter
-                    words = [word.lower() for word in re.findall(r'\b\w+\b', text) if len(word) > 3]
-                    keywords = list(set(words))[:20]  # Take up to 20 unique keywords
-                except Exception:
-                    pass
-        
-        except Exception as e:
-            logging.error(f"Error extracting keywords from {file_path}: {e}")
-        
-        return keywords
+        return self.content_analyzers.keywords({'path': file_path, 'mime_type': mime_type})
 
 
 # Test the class if this file is run directly
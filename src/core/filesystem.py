@@ -0,0 +1,412 @@
+import io
+import os
+import sys
+import stat
+import errno
+import ctypes
+import shutil
+import posixpath
+import threading
+from collections import Counter, namedtuple
+
+from .device_scheduler import device_kind
+
+# Result of MemoryFileSystem.stat; the fields match os.stat_result
+MemoryStat = namedtuple('MemoryStat', 'st_mode st_ino st_dev st_size st_mtime st_ctime')
+
+_DIR_MODE = stat.S_IFDIR | 0o755
+_FILE_MODE = stat.S_IFREG | 0o644
+
+# renameat2() arguments on Linux
+_AT_FDCWD = -100
+_RENAME_NOREPLACE = 1
+
+
+def _load_renameat2():
+    """Return libc's renameat2 on Linux (glibc 2.28+), else None."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except (OSError, AttributeError):
+        return None
+    renameat2.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    renameat2.restype = ctypes.c_int
+    return renameat2
+
+
+_renameat2 = _load_renameat2()
+
+
+class OSFileSystem:
+    """
+    Filesystem operations used by the scanner and organizer, backed by os/shutil.
+    """
+
+    def scandir(self, path):
+        """Return the entries of a directory as a list of os.DirEntry."""
+        with os.scandir(path) as it:
+            return list(it)
+
+    def stat(self, path, follow_symlinks=True):
+        return os.stat(path, follow_symlinks=follow_symlinks)
+
+    def open(self, path, mode='rb'):
+        return open(path, mode)
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def isdir(self, path):
+        return os.path.isdir(path)
+
+    def mkdir(self, path):
+        os.mkdir(path)
+
+    def makedirs(self, path, exist_ok=False):
+        os.makedirs(path, exist_ok=exist_ok)
+
+    def rmdir(self, path):
+        os.rmdir(path)
+
+    def remove(self, path):
+        os.remove(path)
+
+    def move(self, source, target):
+        shutil.move(source, target)
+
+    def rename(self, source, target):
+        os.rename(source, target)
+
+    def rename_noreplace(self, source, target):
+        """
+        Rename source to target on the same device, never replacing an existing target
+
+        Uses renameat2(RENAME_NOREPLACE) where the kernel and filesystem
+        support it. Otherwise the target name is reserved first with an
+        exclusive create (mkdir for directories), and source is renamed over
+        that placeholder.
+
+        Raises:
+            FileExistsError: If target exists
+        """
+        if _renameat2 is not None:
+            if _renameat2(_AT_FDCWD, os.fsencode(source), _AT_FDCWD, os.fsencode(target), _RENAME_NOREPLACE) == 0:
+                return
+            error = ctypes.get_errno()
+            if error not in (errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP):
+                raise OSError(error, os.strerror(error), source, None, target)
+
+        is_dir = stat.S_ISDIR(os.lstat(source).st_mode)
+        if is_dir:
+            os.mkdir(target)
+        else:
+            os.close(os.open(target, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+        try:
+            os.rename(source, target)
+        except OSError:
+            if is_dir:
+                os.rmdir(target)
+            else:
+                os.remove(target)
+            raise
+
+    def copytree(self, source, target):
+        """Copy a directory tree to target, which must not exist."""
+        shutil.copytree(source, target)
+
+    def rmtree(self, path):
+        """Remove a directory tree."""
+        shutil.rmtree(path)
+
+    def device_kind(self, st_dev):
+        """Return 'hdd', 'ssd', 'network' or 'unknown' for a device number (see device_scheduler.device_kind)."""
+        return device_kind(st_dev)
+
+    def walk(self, top):
+        """Walk a tree bottom-up, like os.walk(top, topdown=False)."""
+        return os.walk(top, topdown=False)
+
+
+class _MemoryEntry:
+    """DirEntry-like view of a node of a MemoryFileSystem."""
+
+    __slots__ = ('name', 'path', '_node', '_fs')
+
+    def __init__(self, fs, path, name, node):
+        self._fs = fs
+        self.path = path
+        self.name = name
+        self._node = node
+
+    def is_dir(self, follow_symlinks=True):
+        return isinstance(self._node, dict)
+
+    def is_file(self, follow_symlinks=True):
+        return not isinstance(self._node, dict)
+
+    def is_symlink(self):
+        return False
+
+    def stat(self, follow_symlinks=True):
+        return self._fs.stat(self.path)
+
+
+class MemoryFileSystem:
+    """
+    In-memory filesystem that counts every operation.
+
+    Directories are dictionaries and files are (size, mtime) tuples, so
+    trees with millions of files fit in memory and organize runs complete
+    without touching the disk. ops counts calls per operation name (the
+    number of syscalls the OS backend would make), which lets tests assert
+    exact operation counts. Paths are POSIX-style absolute paths. Every
+    directory lives on one device of the given kind. Calls are counted per
+    thread and lookups do not take the lock, so concurrent scans and moves
+    only serialize on the changes they make.
+    """
+
+    def __init__(self, st_dev=1, kind='ssd'):
+        """
+        Args:
+            st_dev (int): Device number reported by stat()
+            kind (str): Device kind reported by device_kind(), e.g. 'ssd' or 'network'
+        """
+        self.root = {}
+        self.st_dev = st_dev
+        self.kind = kind
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # Per-thread call counters, summed by ops
+        self._counters = []
+
+    @property
+    def ops(self):
+        """Calls per operation name, summed over all threads."""
+        with self._lock:
+            counters = list(self._counters)
+        total = Counter()
+        for counter in counters:
+            # dict() copies in one step, even while the owning thread counts
+            total.update(dict(counter))
+        return total
+
+    def _count(self, name):
+        try:
+            counter = self._local.ops
+        except AttributeError:
+            counter = self._local.ops = Counter()
+            with self._lock:
+                self._counters.append(counter)
+        counter[name] += 1
+
+    def _parts(self, path):
+        if path.startswith('/') and '//' not in path and '/.' not in path and '\\' not in path:
+            # Already normalized, the common case
+            path = path.strip('/')
+            return path.split('/') if path else []
+        return [part for part in path.replace('\\', '/').split('/') if part and part != '.']
+
+    def _lookup(self, path, parts=None):
+        node = self.root
+        try:
+            for part in self._parts(path) if parts is None else parts:
+                node = node[part]
+        except (KeyError, TypeError):
+            # TypeError: a file (tuple) on the way
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path) from None
+        return node
+
+    def _parent(self, path):
+        parts = self._parts(path)
+        if not parts:
+            raise PermissionError(errno.EPERM, os.strerror(errno.EPERM), path)
+        parent = self._lookup(path, parts[:-1])
+        if not isinstance(parent, dict):
+            raise NotADirectoryError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), path)
+        return parent, parts[-1]
+
+    def add_file(self, path, size=0, mtime=0.0):
+        """Create a file and any missing parent directories (not counted as operations)."""
+        parts = self._parts(path)
+        with self._lock:
+            node = self.root
+            for part in parts[:-1]:
+                node = node.setdefault(part, {})
+            node[parts[-1]] = (size, mtime)
+
+    def add_dir(self, path):
+        """Create a directory and any missing parents (not counted as operations)."""
+        with self._lock:
+            node = self.root
+            for part in self._parts(path):
+                node = node.setdefault(part, {})
+
+    def scandir(self, path):
+        self._count('scandir')
+        with self._lock:
+            node = self._lookup(path)
+            if not isinstance(node, dict):
+                raise NotADirectoryError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), path)
+            base = path.rstrip('/')
+            return [_MemoryEntry(self, f"{base}/{name}", name, child) for name, child in node.items()]
+
+    def stat(self, path, follow_symlinks=True):
+        self._count('stat')
+        node = self._lookup(path)
+        if isinstance(node, dict):
+            return MemoryStat(_DIR_MODE, id(node), self.st_dev, 4096, 0.0, 0.0)
+        size, mtime = node
+        return MemoryStat(_FILE_MODE, hash(posixpath.normpath(path)) & 0xFFFFFFFFFFFF,
+                          self.st_dev, size, mtime, mtime)
+
+    def open(self, path, mode='rb'):
+        """Open a file for reading; simulated files read as zero bytes of their size."""
+        if mode != 'rb':
+            raise ValueError(f"MemoryFileSystem only supports mode 'rb', not {mode!r}")
+        self._count('open')
+        node = self._lookup(path)
+        if isinstance(node, dict):
+            raise IsADirectoryError(errno.EISDIR, os.strerror(errno.EISDIR), path)
+        return io.BytesIO(bytes(min(node[0], 1 << 20)))
+
+    def exists(self, path):
+        self._count('exists')
+        try:
+            self._lookup(path)
+            return True
+        except OSError:
+            return False
+
+    def isdir(self, path):
+        self._count('isdir')
+        try:
+            return isinstance(self._lookup(path), dict)
+        except OSError:
+            return False
+
+    def mkdir(self, path):
+        self._count('mkdir')
+        with self._lock:
+            parent, name = self._parent(path)
+            if name in parent:
+                raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), path)
+            parent[name] = {}
+
+    def makedirs(self, path, exist_ok=False):
+        parts = self._parts(path)
+        for depth in range(1, len(parts) + 1):
+            try:
+                self.mkdir('/' + '/'.join(parts[:depth]))
+            except FileExistsError:
+                if depth == len(parts) and not exist_ok:
+                    raise
+
+    def rmdir(self, path):
+        self._count('rmdir')
+        with self._lock:
+            parent, name = self._parent(path)
+            node = parent.get(name)
+            if node is None:
+                raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+            if not isinstance(node, dict):
+                raise NotADirectoryError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), path)
+            if node:
+                raise OSError(errno.ENOTEMPTY, os.strerror(errno.ENOTEMPTY), path)
+            del parent[name]
+
+    def remove(self, path):
+        self._count('remove')
+        with self._lock:
+            parent, name = self._parent(path)
+            node = parent.get(name)
+            if node is None:
+                raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+            if isinstance(node, dict):
+                raise IsADirectoryError(errno.EISDIR, os.strerror(errno.EISDIR), path)
+            del parent[name]
+
+    def move(self, source, target):
+        """Rename source to target; like shutil.move, a directory target receives the source."""
+        self._count('move')
+        with self._lock:
+            source_parent, source_name = self._parent(source)
+            if source_name not in source_parent:
+                raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), source)
+            target_parent, target_name = self._parent(target)
+            existing = target_parent.get(target_name)
+            if isinstance(existing, dict):
+                target_parent, target_name = existing, source_name
+            target_parent[target_name] = source_parent.pop(source_name)
+
+    def rename(self, source, target):
+        """Rename source to target, replacing an existing file like os.rename."""
+        self._count('rename')
+        with self._lock:
+            source_parent, source_name = self._parent(source)
+            if source_name not in source_parent:
+                raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), source)
+            target_parent, target_name = self._parent(target)
+            if isinstance(target_parent.get(target_name), dict):
+                raise IsADirectoryError(errno.EISDIR, os.strerror(errno.EISDIR), target)
+            target_parent[target_name] = source_parent.pop(source_name)
+
+    def rename_noreplace(self, source, target):
+        """Rename source to target, raising FileExistsError if target exists (counted as a rename)."""
+        self._count('rename')
+        with self._lock:
+            source_parent, source_name = self._parent(source)
+            if source_name not in source_parent:
+                raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), source)
+            target_parent, target_name = self._parent(target)
+            if target_name in target_parent:
+                raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), target)
+            target_parent[target_name] = source_parent.pop(source_name)
+
+    def copytree(self, source, target):
+        """Copy a directory tree to target, which must not exist (one operation)."""
+        def copy(node):
+            return {name: copy(child) if isinstance(child, dict) else child for name, child in node.items()}
+
+        self._count('copytree')
+        with self._lock:
+            node = self._lookup(source)
+            if not isinstance(node, dict):
+                raise NotADirectoryError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), source)
+            target_parent, target_name = self._parent(target)
+            if target_name in target_parent:
+                raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), target)
+            target_parent[target_name] = copy(node)
+
+    def rmtree(self, path):
+        """Remove a directory tree (one operation)."""
+        self._count('rmtree')
+        with self._lock:
+            parent, name = self._parent(path)
+            node = parent.get(name)
+            if node is None:
+                raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+            if not isinstance(node, dict):
+                raise NotADirectoryError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), path)
+            del parent[name]
+
+    def device_kind(self, st_dev):
+        """Return the kind given to the constructor; no /proc or /sys lookup is made."""
+        return self.kind
+
+    def walk(self, top):
+        """Walk a tree bottom-up, like os.walk(top, topdown=False)."""
+        try:
+            entries = self.scandir(top)
+        except OSError:
+            return
+        dirs = [entry.name for entry in entries if entry.is_dir()]
+        files = [entry.name for entry in entries if not entry.is_dir()]
+        base = top.rstrip('/')
+        for name in dirs:
+            yield from self.walk(f"{base}/{name}")
+        yield top, dirs, files
+
+
+# Backend used when none is given
+OS_FILESYSTEM = OSFileSystem()
@@ -1,85 +1,390 @@
 import os
-import shutil
+import errno
+import heapq
+import itertools
+import time
+import threading
 from datetime import datetime
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from .deadlines import DeadlinePool, OperationTimeout, Quarantine, StillRunning
+from .external_grouping import DirectorySet, MoveJournal, relative_target
+from .filesystem import OS_FILESYSTEM
+from .io_scheduler import IOScheduler, locality_key
+from .logging_config import configure_logging, EventAggregator
+from .progress import ProgressReporter
+
+# Failed paths kept in the results of journaled operations
+ERROR_SAMPLE_SIZE = 100
+
+# Moves of a journaled operation undone at a time
+UNDO_CHUNK_SIZE = 100000
+
+# Moves the undo history keeps in memory; larger operations go to a journal file
+HISTORY_MAX_MOVES = 100000
 
 class FolderManager:
-    def __init__(self):
+    def __init__(self, fs=None, io_scheduler=None, deadline_pool=None, spill_dir=None):
         self.setup_logging()
+        # Filesystem backend (OSFileSystem or MemoryFileSystem)
+        self.fs = fs or OS_FILESYSTEM
+        # Order in which organize_files moves files
+        self.io_scheduler = io_scheduler or IOScheduler()
+        # Bounds the time of each move in organize_stream; no limit by default
+        self.deadline_pool = deadline_pool or DeadlinePool(timeout=None)
+        self.move_log = EventAggregator("Files moved")
+        # Moves of the most recent operations, newest last, for undo_last_operation
+        self.history = []
+        # Where move journals of large operations are written (the system temp dir if None)
+        self.spill_dir = spill_dir
         
     def setup_logging(self):
         """Setup logging configuration."""
-        try:
-            if not os.path.exists('logs'):
-                os.makedirs('logs')
-                
-            logging.basicConfig(
-                filename=os.path.join('logs', 'folder_manager.log'),
-                level=logging.INFO,
-                format='%(asctime)s - %(levelname)s - %(message)s'
-            )
-        except Exception as e:
-            # Fall back to console logging if file logging fails
-            logging.basicConfig(
-                level=logging.INFO,
-                format='%(asctime)s - %(levelname)s - %(message)s'
-            )
-            logging.error(f"Error setting up file logging: {e}")
+        configure_logging()
         
-    def organize_files(self, base_path, categorized_files):
-        """Organize files into categories."""
-        results = {'success': [], 'error': []}
+    def organize_files(self, base_path, categorized_files, progress_callback=None, cancel_token=None):
+        """Organize files into categories.
         
-        try:
-            # Create category folders
-            for category in categorized_files.keys():
-                category_path = os.path.join(base_path, category)
-                if not os.path.exists(category_path):
-                    os.makedirs(category_path)
-                    logging.info(f"Created category folder: {category_path}")
+        progress_callback receives (done, total). If cancel_token is cancelled,
+        moving stops after the current file and results['cancelled'] is set;
+        files already moved are still reported in results['success'].
+        results['moved'] and results['failed'] count the moved and failed files.
+        """
+        total = sum(len(files) for files in categorized_files.values())
+        
+        # Create every target folder once, parents first, before moving anything
+        known_dirs = self.create_directories(
+            {
+                self.target_dir(base_path, category, file_info)
+                for category, files in categorized_files.items()
+                for file_info in files
+            },
+            base_path
+        )
+        
+        # Move in disk order (by source inode) rather than walk order
+        records = self.io_scheduler.sorted(
+            (
+                (category, file_info)
+                for category, files in categorized_files.items()
+                for file_info in files
+            ),
+            key=lambda record: locality_key(record[1])
+        )
+        return self.organize_stream(base_path, records, total, progress_callback, cancel_token, known_dirs)
+        
+    def organize_stream(self, base_path, records, total=0, progress_callback=None, cancel_token=None,
+                        known_dirs=None, journal=None):
+        """Move files given as an iterable of (category, file_info) pairs.
+        
+        Records grouped by target folder (as produced by ExternalGrouper)
+        are moved one directory at a time. Target folders missing from
+        known_dirs (folders already created) are created on first use;
+        no directory is checked per file. Moves that miss the deadline of
+        deadline_pool are quarantined and waited for again at the end.
+        Moves still running after that are listed in results['in_flight']
+        rather than as errors; when one finishes it is moved out of
+        in_flight into the results and the undo history (or into the
+        errors if it failed).
+        
+        With a MoveJournal, nothing per file is kept in memory: moves are
+        appended to the journal (which undo_last_operation reads back),
+        results['source_dirs'] is a DirectorySet on disk that the caller
+        closes, and results hold counts, the journal and only the first
+        ERROR_SAMPLE_SIZE failed paths in results['error'].
+        """
+        results = {'moved': 0, 'failed': 0, 'error': [], 'cancelled': False, 'in_flight': []}
+        if journal is None:
+            results.update(success=[], source_dirs=set(), moves=[])
+        else:
+            results.update(journal=journal, source_dirs=DirectorySet(spill_dir=os.path.dirname(journal.path)))
+        progress = ProgressReporter(progress_callback, total)
+        known_dirs = set() if known_dirs is None else known_dirs
+        quarantine = Quarantine(self.deadline_pool)
+        slow_moves = {}
+        # Moves still in flight may finish on a pool thread after this returns
+        lock = threading.Lock()
+        
+        def moved(category, source_path, target_path):
+            with lock:
+                results['moved'] += 1
+                if journal is None:
+                    results['success'].append(source_path)
+                    results['moves'].append({'source': source_path, 'target': target_path})
+                else:
+                    journal.record(source_path, target_path)
+                results['source_dirs'].add(os.path.dirname(source_path))
+            self.move_log.record(category)
+            
+        def failed(source_path):
+            with lock:
+                results['failed'] += 1
+                if journal is None or len(results['error']) < ERROR_SAMPLE_SIZE:
+                    results['error'].append(source_path)
                     
-            # Move files to their respective categories
-            for category, files in categorized_files.items():
-                category_path = os.path.join(base_path, category)
+        def still_running(category, source_path, target_path, future):
+            with lock:
+                results['in_flight'].append(source_path)
                 
-                for file_info in files:
-                    try:
-                        source_path = file_info['path']
-                        filename = os.path.basename(source_path)
-                        target_path = os.path.join(category_path, filename)
-                        
-                        # Handle file name conflicts
-                        if os.path.exists(target_path):
-                            base, ext = os.path.splitext(filename)
-                            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                            target_path = os.path.join(category_path, f"{base}_{timestamp}{ext}")
-                            
-                        # Move the file
-                        shutil.move(source_path, target_path)
-                        results['success'].append(source_path)
-                        logging.info(f"Moved file: {source_path} -> {target_path}")
+            def finished(future):
+                with lock:
+                    results['in_flight'].remove(source_path)
+                if future.exception() is None:
+                    logging.info(f"Slow move finished: {source_path} -> {target_path}")
+                    moved(category, source_path, target_path)
+                else:
+                    failed(source_path)
+            future.add_done_callback(finished)
+        
+        try:
+            for category, file_info in records:
+                if cancel_token is not None and cancel_token.cancelled:
+                    results['cancelled'] = True
+                    logging.info("Organizing cancelled")
+                    break
+                try:
+                    source_path = file_info['path']
+                    filename = os.path.basename(source_path)
+                    category_path = self.target_dir(base_path, category, file_info)
+                    if category_path not in known_dirs:
+                        self.create_directories([category_path], base_path, known_dirs)
+                    target_path = os.path.join(category_path, filename)
+                    
+                    # Handle file name conflicts
+                    if self.fs.exists(target_path):
+                        base, ext = os.path.splitext(filename)
+                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                        target_path = os.path.join(category_path, f"{base}_{timestamp}{ext}")
                         
-                    except Exception as e:
-                        results['error'].append(source_path)
-                        logging.error(f"Error moving file {source_path}: {e}")
+                    # Move the file
+                    if self.deadline_pool.enforced_for(file_info.get('device')):
+                        try:
+                            quarantine.call(source_path, self.fs.move, source_path, target_path)
+                        except OperationTimeout:
+                            slow_moves[source_path] = (category, target_path)
+                            continue
+                    else:
+                        self.fs.move(source_path, target_path)
+                    moved(category, source_path, target_path)
+                    
+                except Exception as e:
+                    failed(source_path)
+                    logging.error(f"Error moving file {source_path}: {e}")
+                progress.advance()
                         
         except Exception as e:
             logging.error(f"Error organizing files: {e}")
             
+        # Moves that were still running are waited for, never started twice
+        for source_path, _, error in quarantine.retry():
+            category, target_path = slow_moves[source_path]
+            if error is None:
+                moved(category, source_path, target_path)
+            elif isinstance(error, StillRunning):
+                still_running(category, source_path, target_path, error.future)
+            else:
+                failed(source_path)
+            progress.advance()
+            
+        self.move_log.flush()
+        progress.finish()
+        # Kept even if empty while moves are in flight, so they can be undone later
+        self.record_operation(results['moves'] if journal is None else journal, pending=bool(results['in_flight']))
+        return results
+        
+    def create_directories(self, directories, base_path=None, known_dirs=None):
+        """Create directories and their missing parents, each at most once.
+        
+        All paths are collected first and created in parent-first order with
+        a single mkdir each, tolerating folders that already exist. Parents
+        are not climbed past base_path or past a folder in known_dirs.
+        Returns known_dirs (a new set if none was given) with the created
+        folders added.
+        """
+        known_dirs = set() if known_dirs is None else known_dirs
+        stop = (base_path.rstrip(os.sep) or base_path) if base_path else None
+        
+        pending = set()
+        for dir_path in directories:
+            while dir_path and dir_path not in known_dirs and dir_path not in pending and dir_path != stop:
+                parent = os.path.dirname(dir_path)
+                if parent == dir_path:
+                    # The filesystem root always exists
+                    break
+                pending.add(dir_path)
+                dir_path = parent
+                
+        for dir_path in sorted(pending, key=lambda path: path.count(os.sep)):
+            try:
+                self.fs.mkdir(dir_path)
+                logging.info(f"Created folder: {dir_path}")
+            except FileExistsError:
+                pass
+            except OSError as e:
+                # Moves into this folder will fail and be reported individually
+                logging.error(f"Error creating folder {dir_path}: {e}")
+            known_dirs.add(dir_path)
+            
+        return known_dirs
+        
+    def target_dir(self, base_path, category, file_info):
+        """Folder a file is moved into: its custom-rule target if set, else its category."""
+        return os.path.join(base_path, *relative_target(category, file_info).split('/'))
+        
+    def plan_moves(self, base_path, categorized_files):
+        """Compute the moves organize_files would make, without touching any file.
+        
+        Target names that collide within the plan get a numeric suffix, so
+        the plan can be executed by several workers in any order.
+        """
+        moves = []
+        planned = set()
+        
+        for category, files in categorized_files.items():
+            for file_info in files:
+                category_path = self.target_dir(base_path, category, file_info)
+                filename = os.path.basename(file_info['path'])
+                target_path = os.path.join(category_path, filename)
+                
+                counter = 1
+                base, ext = os.path.splitext(filename)
+                while target_path in planned:
+                    target_path = os.path.join(category_path, f"{base}_{counter}{ext}")
+                    counter += 1
+                planned.add(target_path)
+                moves.append({'source': file_info['path'], 'target': target_path, 'category': category})
+                
+        return moves
+        
+    def apply_moves(self, moves, progress_callback=None, cancel_token=None):
+        """Execute planned moves ({'source', 'target'} dictionaries, e.g. from plan_moves).
+        
+        Target folders are created up front in one batch. Results have the
+        same form as those of organize_files.
+        """
+        moves = list(moves)
+        results = {'moved': 0, 'failed': 0, 'success': [], 'error': [], 'cancelled': False, 'source_dirs': set(),
+                   'moves': []}
+        progress = ProgressReporter(progress_callback, len(moves))
+        self.create_directories({os.path.dirname(move['target']) for move in moves})
+        
+        for move in moves:
+            if cancel_token is not None and cancel_token.cancelled:
+                results['cancelled'] = True
+                logging.info("Applying moves cancelled")
+                break
+            source, target = move['source'], move['target']
+            try:
+                if self.fs.exists(target):
+                    base, ext = os.path.splitext(target)
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    target = f"{base}_{timestamp}{ext}"
+                self.fs.move(source, target)
+                results['moved'] += 1
+                results['success'].append(source)
+                results['moves'].append({'source': source, 'target': target})
+                results['source_dirs'].add(os.path.dirname(source))
+                self.move_log.record(move.get('category') or os.path.basename(os.path.dirname(target)))
+            except Exception as e:
+                results['failed'] += 1
+                results['error'].append(source)
+                logging.error(f"Error moving file {source}: {e}")
+            progress.advance()
+            
+        self.move_log.flush()
+        progress.finish()
+        self.record_operation(results['moves'])
+        return results
+        
+    def process_queue(self, move_queue, worker_id=None, batch_size=100, lease_seconds=300, cancel_token=None,
+                      record_history=True):
+        """Claim and execute batches of moves from a MoveQueue until it is drained.
+        
+        Moves whose source is gone but whose target exists are treated as
+        done, so batches re-claimed after a worker crash are idempotent.
+        Without record_history, as in worker processes, the moves are not
+        kept for undo and results keep only the first ERROR_SAMPLE_SIZE
+        moved and failed paths.
+        """
+        from .work_queue import default_worker_id
+        
+        worker_id = worker_id or default_worker_id()
+        results = {'moved': 0, 'failed': 0, 'success': [], 'error': [], 'cancelled': False, 'source_dirs': set(),
+                   'moves': []}
+        created_dirs = set()
+        
+        while True:
+            if cancel_token is not None and cancel_token.cancelled:
+                results['cancelled'] = True
+                break
+                
+            batch = move_queue.claim(worker_id, batch_size, lease_seconds)
+            if not batch:
+                break
+                
+            self.create_directories({os.path.dirname(move['target']) for move in batch}, known_dirs=created_dirs)
+            
+            lease_start = time.monotonic()
+            completed = []
+            for move in batch:
+                source, target = move['source'], move['target']
+                try:
+                    if not self.fs.exists(source) and self.fs.exists(target):
+                        completed.append(move['id'])
+                        continue
+                        
+                    target_dir = os.path.dirname(target)
+                    if self.fs.exists(target):
+                        base, ext = os.path.splitext(target)
+                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                        target = f"{base}_{timestamp}{ext}"
+                        
+                    self.fs.move(source, target)
+                    completed.append(move['id'])
+                    results['moved'] += 1
+                    if record_history:
+                        results['success'].append(source)
+                        results['moves'].append({'source': source, 'target': target})
+                    elif len(results['success']) < ERROR_SAMPLE_SIZE:
+                        results['success'].append(source)
+                    results['source_dirs'].add(os.path.dirname(source))
+                    self.move_log.record(os.path.basename(target_dir))
+                    
+                except Exception as e:
+                    move_queue.fail(move['id'], e)
+                    results['failed'] += 1
+                    if record_history or len(results['error']) < ERROR_SAMPLE_SIZE:
+                        results['error'].append(source)
+                    logging.error(f"Error moving file {source}: {e}")
+                    
+                # Keep the lease alive for long batches
+                if time.monotonic() - lease_start > lease_seconds / 2:
+                    move_queue.renew([m['id'] for m in batch], lease_seconds)
+                    lease_start = time.monotonic()
+                    
+            move_queue.complete(completed)
+            
+        self.move_log.flush()
+        if record_history:
+            self.record_operation(results['moves'])
+        logging.info(f"Queue worker {worker_id} finished: {results['moved']} moved, {results['failed']} errors")
         return results
         
     def create_folder_structure(self, base_path, structure):
         """Create a folder structure based on a dictionary."""
         try:
-            for folder, subfolders in structure.items():
-                folder_path = os.path.join(base_path, folder)
-                if not os.path.exists(folder_path):
-                    os.makedirs(folder_path)
-                    logging.info(f"Created folder: {folder_path}")
-                    
-                if isinstance(subfolders, dict):
-                    self.create_folder_structure(folder_path, subfolders)
-                    
+            folders = []
+            pending = [(base_path, structure)]
+            while pending:
+                parent, children = pending.pop()
+                for folder, subfolders in children.items():
+                    folder_path = os.path.join(parent, folder)
+                    folders.append(folder_path)
+                    if isinstance(subfolders, dict):
+                        pending.append((folder_path, subfolders))
+                        
+            self.create_directories(folders, base_path)
             return True
             
         except Exception as e:
@@ -89,22 +394,24 @@ class FolderManager:
     def move_file(self, source, target, overwrite=False):
         """Move a file from source to target path."""
         try:
-            # Create target directory if it doesn't exist
-            target_dir = os.path.dirname(target)
-            if not os.path.exists(target_dir):
-                os.makedirs(target_dir)
-                
             # Handle existing files
-            if os.path.exists(target):
+            if self.fs.exists(target):
                 if overwrite:
-                    os.remove(target)
+                    self.fs.remove(target)
                 else:
                     base, ext = os.path.splitext(target)
                     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                     target = f"{base}_{timestamp}{ext}"
                     
-            # Move the file
-            shutil.move(source, target)
+            # Move the file; the target directory is only created when the move
+            # reports it missing
+            try:
+                self.fs.move(source, target)
+            except FileNotFoundError:
+                if not self.fs.exists(source):
+                    raise
+                self.fs.makedirs(os.path.dirname(target), exist_ok=True)
+                self.fs.move(source, target)
             logging.info(f"Moved file: {source} -> {target}")
             return True
             
@@ -112,19 +419,48 @@ class FolderManager:
             logging.error(f"Error moving file {source}: {e}")
             return False
             
-    def cleanup_empty_folders(self, path):
-        """Remove empty folders recursively."""
+    def cleanup_empty_folders(self, path, source_dirs=None):
+        """Remove empty folders below path.
+        
+        With source_dirs (the directories files were moved out of, e.g.
+        results['source_dirs'] from organize_files), only those directories
+        and their ancestors up to path are candidates; otherwise the whole
+        tree is walked. Each candidate gets a single rmdir attempt, deepest
+        first, and the parents of a directory that could not be removed are
+        skipped since they cannot be empty. A DirectorySet is read from disk
+        in its own order, so memory stays bounded by the width of the tree
+        rather than the number of directories.
+        """
         removed = []
+        root = os.path.abspath(path)
         try:
-            for root, dirs, files in os.walk(path, topdown=False):
-                for dir_name in dirs:
-                    dir_path = os.path.join(root, dir_name)
-                    try:
-                        if not os.listdir(dir_path):  # Check if directory is empty
-                            os.rmdir(dir_path)
-                            removed.append(dir_path)
-                            logging.info(f"Removed empty folder: {dir_path}")
-                    except Exception as e:
+            if source_dirs is None:
+                candidates = [
+                    os.path.join(dir_path, dir_name)
+                    for dir_path, dir_names, _ in self.fs.walk(root)
+                    for dir_name in dir_names
+                ]
+            else:
+                if not isinstance(source_dirs, DirectorySet):
+                    source_dirs = sorted({os.path.abspath(dir_path) for dir_path in source_dirs},
+                                         key=lambda dir_path: (-dir_path.count(os.sep), dir_path))
+                candidates = self._with_ancestors(root, source_dirs)
+                
+            not_empty = set()
+            for dir_path in candidates:
+                if dir_path in not_empty:
+                    not_empty.discard(dir_path)
+                    not_empty.add(os.path.dirname(dir_path))
+                    continue
+                try:
+                    self.fs.rmdir(dir_path)
+                    removed.append(dir_path)
+                    logging.info(f"Removed empty folder: {dir_path}")
+                except OSError as e:
+                    if e.errno in (errno.ENOTEMPTY, errno.EEXIST):
+                        not_empty.add(os.path.dirname(dir_path))
+                    elif e.errno != errno.ENOENT:
+                        # Removed by someone else (ENOENT) leaves the parent a candidate
                         logging.error(f"Error removing folder {dir_path}: {e}")
                         
         except Exception as e:
@@ -132,43 +468,221 @@ class FolderManager:
             
         return removed
         
-    def undo_move(self, move_history):
-        """Undo file moves based on history."""
-        results = {'success': [], 'error': []}
+    def _with_ancestors(self, root, dirs):
+        """Yield dirs (absolute, deepest first) and their ancestors below root, each once, deepest first."""
+        prefix = root + os.sep
+        # Ancestors waiting for their depth to come up
+        pending = []
+        queued = set()
+        last = None
+        for dir_path in itertools.chain(dirs, [None]):
+            key = None if dir_path is None else (-dir_path.count(os.sep), dir_path)
+            while pending and (key is None or pending[0] <= key):
+                item = heapq.heappop(pending)
+                queued.discard(item[1])
+                if item != last:
+                    last = item
+                    yield item[1]
+                    parent = os.path.dirname(item[1])
+                    if parent.startswith(prefix) and parent not in queued:
+                        queued.add(parent)
+                        heapq.heappush(pending, (item[0] + 1, parent))
+            if key is not None and key != last and dir_path.startswith(prefix) and dir_path not in queued:
+                heapq.heappush(pending, key)
+                queued.add(dir_path)
+                
+    def record_operation(self, moves, max_operations=10, pending=False, max_moves=HISTORY_MAX_MOVES):
+        """Remember the moves (a list or a MoveJournal) of a finished operation so it can be undone.
+        
+        Lists of more than max_moves moves are written to a MoveJournal, and
+        the oldest operations are forgotten once more than max_operations
+        are kept or the lists kept in memory hold more than max_moves moves.
+        With pending, the operation is recorded even without moves, since
+        moves still in flight will be added to it.
+        """
+        if not moves and not pending:
+            if isinstance(moves, MoveJournal):
+                moves.remove()
+            return
+        if isinstance(moves, list) and len(moves) > max_moves and not pending:
+            journal = MoveJournal.create(self.spill_dir)
+            for move in moves:
+                journal.record(move['source'], move['target'])
+            journal.close()
+            moves = journal
+        self.history.append(moves)
+        
+        in_memory = sum(len(operation) for operation in self.history if isinstance(operation, list))
+        while len(self.history) > 1 and (len(self.history) > max_operations or in_memory > max_moves):
+            dropped = self.history.pop(0)
+            if isinstance(dropped, MoveJournal):
+                dropped.remove()
+            else:
+                in_memory -= len(dropped)
+            
+    def undo_last_operation(self, progress_callback=None, cancel_token=None):
+        """Undo the most recent recorded operation; returns its undo results, or None.
+        
+        Moves that failed or were not reached before a cancel stay in the
+        history, so undoing again finishes the operation.
+        """
+        if not self.history:
+            return None
+        operation = self.history.pop()
+        if isinstance(operation, MoveJournal):
+            return self._undo_journal(operation, progress_callback, cancel_token)
+        results = self.undo_move(operation, progress_callback, cancel_token)
+        if results['error'] or results['cancelled']:
+            # Keep what could not be reverted or was never reached so it can be retried
+            attempted = set(results['success']) | set(results['error'])
+            remaining = results['moves_failed'] + [move for move in operation if move['target'] not in attempted]
+            if remaining:
+                self.history.append(remaining)
+        return results
+        
+    def _undo_journal(self, journal, progress_callback, cancel_token):
+        """Undo a journaled operation UNDO_CHUNK_SIZE moves at a time.
+        
+        Results hold counts, failures by reason and a sample of the failed
+        paths; moves that failed or were not reached are kept in a new
+        journal for another undo.
+        """
+        results = {'moved': 0, 'failed': 0, 'error': [], 'cancelled': False, 'failures': {}}
+        remaining = MoveJournal.create(os.path.dirname(journal.path))
+        total = len(journal)
+        done = 0
+        
+        for chunk in journal.chunks(UNDO_CHUNK_SIZE):
+            if results['cancelled']:
+                for move in chunk:
+                    remaining.record(move['source'], move['target'])
+                continue
+            chunk_callback = None
+            if progress_callback is not None:
+                chunk_callback = lambda count, _, offset=done: progress_callback(offset + count, total)
+            chunk_results = self.undo_move(chunk, chunk_callback, cancel_token)
+            done += len(chunk)
+            
+            results['moved'] += chunk_results['moved']
+            results['failed'] += chunk_results['failed']
+            results['cancelled'] = chunk_results['cancelled']
+            results['error'].extend(chunk_results['error'][:ERROR_SAMPLE_SIZE - len(results['error'])])
+            for reason, count in chunk_results['failures'].items():
+                results['failures'][reason] = results['failures'].get(reason, 0) + count
+            for move in chunk_results['moves_failed']:
+                remaining.record(move['source'], move['target'])
+            if chunk_results['cancelled']:
+                # Moves of this chunk that were never attempted
+                attempted = set(chunk_results['success']) | set(chunk_results['error'])
+                for move in chunk:
+                    if move['target'] not in attempted:
+                        remaining.record(move['source'], move['target'])
+                        
+        journal.remove()
+        remaining.close()
+        self.record_operation(remaining)
+        return results
+        
+    def undo_move(self, move_history, progress_callback=None, cancel_token=None, workers=8):
+        """Undo file moves based on history ({'source', 'target'} dictionaries).
+        
+        Reversals are grouped by current and original folder and sorted by
+        directory. All original folders are recreated in one batch, then
+        the groups run in parallel: renames when both folders are on the
+        same device, a copying move otherwise. A file is never restored
+        over an existing one: renames use rename_noreplace, and a copy goes
+        to a temporary name next to the original and is renamed from there. Results list restored and failed paths, the
+        failed moves, and failures counted by reason; 'moved' and 'failed'
+        count restored and failed files.
+        """
+        results = {'moved': 0, 'failed': 0, 'success': [], 'error': [], 'cancelled': False, 'failures': {},
+                   'moves_failed': []}
+        progress = ProgressReporter(progress_callback, len(move_history))
+        lock = threading.Lock()
         
+        groups = {}
         for move in move_history:
-            try:
-                source = move['target']
-                target = move['source']
+            key = (os.path.dirname(move['target']), os.path.dirname(move['source']))
+            groups.setdefault(key, []).append(move)
+            
+        self.create_directories({original_dir for _, original_dir in groups})
+        
+        devices = {}
+        def device(dir_path):
+            if dir_path not in devices:
+                try:
+                    devices[dir_path] = self.fs.stat(dir_path).st_dev
+                except OSError:
+                    devices[dir_path] = None
+            return devices[dir_path]
+            
+        def fail(move, reason):
+            with lock:
+                results['failed'] += 1
+                results['error'].append(move['target'])
+                results['moves_failed'].append(move)
+                results['failures'][reason] = results['failures'].get(reason, 0) + 1
                 
-                if os.path.exists(source):
-                    # Create target directory if needed
-                    target_dir = os.path.dirname(target)
-                    if not os.path.exists(target_dir):
-                        os.makedirs(target_dir)
-                        
-                    # Move file back
-                    shutil.move(source, target)
-                    results['success'].append(source)
-                    logging.info(f"Undid move: {source} -> {target}")
-                else:
-                    results['error'].append(source)
-                    logging.error(f"Source file not found: {source}")
+        def undo_group(current_dir, original_dir, moves):
+            same_device = device(current_dir) is not None and device(current_dir) == device(original_dir)
+            restore = self.fs.rename_noreplace if same_device else self._move_noreplace
+            for move in sorted(moves, key=lambda move: move['source']):
+                if cancel_token is not None and cancel_token.cancelled:
+                    with lock:
+                        results['cancelled'] = True
+                    return
+                try:
+                    restore(move['target'], move['source'])
+                    with lock:
+                        results['moved'] += 1
+                        results['success'].append(move['target'])
+                except FileExistsError:
+                    fail(move, "target exists")
+                except OSError as e:
+                    fail(move, e.strerror or type(e).__name__)
+                except Exception as e:
+                    fail(move, type(e).__name__)
+                with lock:
+                    progress.advance()
                     
-            except Exception as e:
-                if 'source' in locals():
-                    results['error'].append(source)
-                logging.error(f"Error undoing move: {e}")
+        # Resolve devices up front so worker threads only read the cache
+        for current_dir, original_dir in groups:
+            device(current_dir)
+            device(original_dir)
+            
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for future in [pool.submit(undo_group, current_dir, original_dir, moves)
+                           for (current_dir, original_dir), moves in sorted(groups.items())]:
+                future.result()
                 
+        progress.finish()
+        summary = ', '.join(f"{reason}: {count}" for reason, count in
+                            sorted(results['failures'].items(), key=lambda item: -item[1]))
+        logging.info(f"Undo finished: {len(results['success'])} restored, {len(results['error'])} failed"
+                     + (f" ({summary})" if summary else ""))
         return results
             
+    def _move_noreplace(self, source, target):
+        """Move across devices without replacing target: copy next to it, then rename into place."""
+        if self.fs.exists(target):
+            # Not worth copying; rename_noreplace would refuse anyway
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), target)
+        temp_path = f"{target}.filesynapse-{os.getpid()}-{threading.get_ident()}"
+        self.fs.move(source, temp_path)
+        try:
+            self.fs.rename_noreplace(temp_path, target)
+        except OSError:
+            # Put the file back where it was
+            self.fs.move(temp_path, source)
+            raise
+            
     def create_backup(self, path):
         """Create a backup of the directory."""
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_path = f"{path}_backup_{timestamp}"
             
-            shutil.copytree(path, backup_path)
+            self.fs.copytree(path, backup_path)
             logging.info(f"Created backup: {backup_path}")
             
             return backup_path
@@ -179,10 +693,10 @@ class FolderManager:
     def restore_backup(self, backup_path, original_path):
         """Restore from a backup."""
         try:
-            if os.path.exists(original_path):
-                shutil.rmtree(original_path)
+            if self.fs.exists(original_path):
+                self.fs.rmtree(original_path)
             
-            shutil.copytree(backup_path, original_path)
+            self.fs.copytree(backup_path, original_path)
             logging.info(f"Restored from backup: {backup_path} -> {original_path}")
             return True
         except Exception as e:
@@ -192,7 +706,7 @@ class FolderManager:
     def get_file_info(self, path):
         """Get file information."""
         try:
-            stat = os.stat(path)
+            stat = self.fs.stat(path)
             return {
                 'path': path,
                 'name': os.path.basename(path),
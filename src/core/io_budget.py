@@ -0,0 +1,260 @@
+import time
+import logging
+import threading
+
+# ionice classes accepted in settings; 'realtime' would need root and is not offered
+IONICE_CLASSES = ('idle', 'best_effort')
+
+# Limit value that removes a limit, like 0
+UNLIMITED = 'unlimited'
+
+
+def parse_rate(value):
+    """Return a limit as a float, or None for no limit (None, 0 or 'unlimited')."""
+    if value is None or value == UNLIMITED:
+        return None
+    return float(value) or None
+
+
+class TokenBucket:
+    """
+    Token bucket limiting a rate, safe to share between threads.
+
+    consume() takes tokens and sleeps for as long as the bucket is in debt,
+    so a caller asking for more than the burst size (e.g. one large read)
+    is simply delayed proportionally. A rate of None means unlimited; the
+    rate may be changed at any time with set_rate().
+    """
+
+    def __init__(self, rate=None, burst=None):
+        """
+        Args:
+            rate (float): Tokens per second, None for no limit
+            burst (float): Tokens that may be used at once after an idle period (default: one second's worth)
+        """
+        self._lock = threading.Lock()
+        # Starts full
+        self.tokens = float('inf')
+        self.set_rate(rate, burst)
+
+    def set_rate(self, rate, burst=None):
+        """Change the rate; takes effect for the next consume()."""
+        with self._lock:
+            self.rate = float(rate) if rate else None
+            self.capacity = float(burst or rate or 0)
+            self.tokens = min(self.tokens, self.capacity)
+            self.updated = time.monotonic()
+
+    def consume(self, amount=1):
+        """
+        Take tokens, waiting until the rate allows it
+
+        Args:
+            amount (float): Number of tokens
+
+        Returns:
+            float: Seconds waited
+        """
+        if self.rate is None:
+            return 0.0
+        with self._lock:
+            if self.rate is None:
+                return 0.0
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+def set_ionice(io_class):
+    """
+    Set the I/O scheduling class of this process using psutil, if installed
+
+    Args:
+        io_class (str): 'idle' or 'best_effort'
+
+    Returns:
+        bool: True if the class was applied
+    """
+    if io_class not in IONICE_CLASSES:
+        raise ValueError(f"Unknown ionice class {io_class!r}")
+    try:
+        import psutil
+    except ImportError:
+        logging.warning("psutil is not installed; ionice setting ignored")
+        return False
+
+    if io_class == 'idle':
+        value = getattr(psutil, 'IOPRIO_CLASS_IDLE', getattr(psutil, 'IOPRIO_VERYLOW', None))
+    else:
+        value = getattr(psutil, 'IOPRIO_CLASS_BE', getattr(psutil, 'IOPRIO_NORMAL', None))
+    try:
+        psutil.Process().ionice(value)
+        logging.info(f"I/O priority set to {io_class}")
+        return True
+    except (AttributeError, OSError, ValueError) as e:
+        logging.error(f"Error setting I/O priority: {e}")
+        return False
+
+
+class IOBudget:
+    """
+    Operations-per-second and bytes-per-second limits shared by all stages.
+
+    Every filesystem call of a ThrottledFileSystem costs one operation and
+    every byte read counts against the byte rate, so the scan, content-read
+    and move stages draw from the same budget. Limits can be changed while
+    a run is in progress with update().
+    """
+
+    def __init__(self, ops_per_second=None, bytes_per_second=None, ionice=None):
+        """
+        Args:
+            ops_per_second (float): Filesystem operations per second, None for no limit
+            bytes_per_second (float): Bytes read per second, None for no limit
+            ionice (str): Optional I/O class for the process, 'idle' or 'best_effort'
+        """
+        self.ops = TokenBucket(parse_rate(ops_per_second))
+        self.bytes = TokenBucket(parse_rate(bytes_per_second))
+        self.ionice = None
+        self.update(ionice=ionice)
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Create a budget from the io_budget section of the settings."""
+        options = settings.get('io_budget', {})
+        return cls(options.get('ops_per_second'), options.get('bytes_per_second'), options.get('ionice'))
+
+    def update(self, ops_per_second=None, bytes_per_second=None, ionice=None):
+        """
+        Change some of the limits
+
+        Args:
+            ops_per_second (float): New operations limit; None keeps the current one, 0 or 'unlimited' removes it
+            bytes_per_second (float): New bytes limit; None keeps the current one, 0 or 'unlimited' removes it
+            ionice (str): I/O class to apply; None keeps the current one (a class, once set, stays set)
+        """
+        if ops_per_second is not None:
+            self.ops.set_rate(parse_rate(ops_per_second))
+        if bytes_per_second is not None:
+            self.bytes.set_rate(parse_rate(bytes_per_second))
+        if ionice and ionice != self.ionice and set_ionice(ionice):
+            self.ionice = ionice
+
+    def limits(self):
+        """Return the current limits as a dictionary."""
+        return {'ops_per_second': self.ops.rate, 'bytes_per_second': self.bytes.rate, 'ionice': self.ionice}
+
+    def charge(self, ops=1, nbytes=0):
+        """Wait until the given operations and bytes fit in the budget."""
+        if ops:
+            self.ops.consume(ops)
+        if nbytes:
+            self.bytes.consume(nbytes)
+
+
+class _ThrottledFile:
+    """File wrapper that charges every byte read to an IOBudget."""
+
+    def __init__(self, f, budget):
+        self._file = f
+        self._budget = budget
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._file.close()
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def read(self, size=-1):
+        data = self._file.read(size)
+        self._budget.charge(0, len(data))
+        return data
+
+
+class ThrottledFileSystem:
+    """
+    Filesystem backend wrapper that draws every call from an IOBudget.
+
+    Wraps OSFileSystem or MemoryFileSystem; calls pass through unchanged
+    once the budget allows them. A move, rename, copytree or rmtree costs
+    one operation; data copied by a move across devices or by copytree is
+    not counted.
+    """
+
+    def __init__(self, fs, budget):
+        self.fs = fs
+        self.budget = budget
+
+    def __getattr__(self, name):
+        # Other attributes (e.g. MemoryFileSystem.ops) come from the wrapped backend
+        return getattr(self.fs, name)
+
+    def scandir(self, path):
+        self.budget.charge()
+        return self.fs.scandir(path)
+
+    def stat(self, path, follow_symlinks=True):
+        self.budget.charge()
+        return self.fs.stat(path, follow_symlinks=follow_symlinks)
+
+    def open(self, path, mode='rb'):
+        self.budget.charge()
+        return _ThrottledFile(self.fs.open(path, mode), self.budget)
+
+    def exists(self, path):
+        self.budget.charge()
+        return self.fs.exists(path)
+
+    def isdir(self, path):
+        self.budget.charge()
+        return self.fs.isdir(path)
+
+    def mkdir(self, path):
+        self.budget.charge()
+        self.fs.mkdir(path)
+
+    def makedirs(self, path, exist_ok=False):
+        self.budget.charge()
+        self.fs.makedirs(path, exist_ok=exist_ok)
+
+    def rmdir(self, path):
+        self.budget.charge()
+        self.fs.rmdir(path)
+
+    def remove(self, path):
+        self.budget.charge()
+        self.fs.remove(path)
+
+    def move(self, source, target):
+        self.budget.charge()
+        self.fs.move(source, target)
+
+    def rename(self, source, target):
+        self.budget.charge()
+        self.fs.rename(source, target)
+
+    def rename_noreplace(self, source, target):
+        self.budget.charge()
+        self.fs.rename_noreplace(source, target)
+
+    def copytree(self, source, target):
+        self.budget.charge()
+        self.fs.copytree(source, target)
+
+    def rmtree(self, path):
+        self.budget.charge()
+        self.fs.rmtree(path)
+
+    def walk(self, top):
+        """Walk a tree bottom-up, one operation per directory listed."""
+        for item in self.fs.walk(top):
+            self.budget.charge()
+            yield item
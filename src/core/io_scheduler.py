@@ -0,0 +1,132 @@
+import os
+import io
+import logging
+from collections import deque
+
+# Number of files opened and hinted ahead of the one being read
+DEFAULT_READAHEAD_WINDOW = 32
+
+
+def locality_key(file_info):
+    """
+    Sort key approximating the on-disk position of a file
+
+    On ext4, XFS and similar filesystems inodes are allocated close to the
+    data of their directory, so (device, inode) order turns a random walk
+    over the disk into a mostly forward sweep. Records without the fields
+    (e.g. read back from an old report) sort first, in their original order.
+
+    Args:
+        file_info (dict): File information with 'device' and 'inode'
+
+    Returns:
+        tuple: (device, inode)
+    """
+    return (file_info.get('device', 0), file_info.get('inode', 0))
+
+
+def advise_willneed(f, length, offset=0):
+    """
+    Ask the kernel to start reading a byte range of an open file in the background
+
+    Args:
+        f (file): Open file; files without a descriptor are ignored
+        length (int): Number of bytes that will be read
+        offset (int): Start of the range
+
+    Returns:
+        bool: True if the hint was given
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return False
+    try:
+        os.posix_fadvise(f.fileno(), offset, length, os.POSIX_FADV_WILLNEED)
+        return True
+    except (AttributeError, io.UnsupportedOperation, OSError):
+        return False
+
+
+class IOScheduler:
+    """
+    Orders file reads and moves by physical locality and hints read-ahead.
+
+    With order 'inode' batches of reads and moves are sorted by (device,
+    inode) instead of directory-walk order, which mostly matters on spinning
+    disks and cold caches. read_ahead() keeps a window of files open ahead of
+    the one being read, each with a WILLNEED hint for the bytes that will be
+    sampled, so the kernel can queue and merge those reads in the meantime.
+    """
+
+    def __init__(self, order='inode', readahead_window=DEFAULT_READAHEAD_WINDOW):
+        """
+        Args:
+            order (str): 'inode' to sort by (device, inode), 'none' to keep the given order
+            readahead_window (int): Files opened and hinted ahead; 0 disables hints
+        """
+        if order not in ('inode', 'none'):
+            raise ValueError(f"Unknown I/O order {order!r}")
+        self.order = order
+        self.readahead_window = max(0, int(readahead_window))
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Create a scheduler using processing.io_order and processing.readahead_window."""
+        processing = (settings or {}).get('processing', {})
+        return cls(
+            processing.get('io_order', 'inode'),
+            processing.get('readahead_window', DEFAULT_READAHEAD_WINDOW)
+        )
+
+    def sorted(self, items, key=locality_key):
+        """Return items as a list in I/O order."""
+        if self.order == 'none':
+            return list(items)
+        return sorted(items, key=key)
+
+    def read_ahead(self, fs, files_info, max_bytes):
+        """
+        Open files in I/O order, hinting the first max_bytes of each ahead of time
+
+        Args:
+            fs: Filesystem backend to open files with
+            files_info (iterable): File information dictionaries
+            max_bytes (int): Bytes that will be read from the start of each file
+
+        Yields:
+            tuple: (file_info, open binary file or None if it could not be
+                opened); the file is closed when the next item is requested
+        """
+        window = deque()
+        pending = iter(self.sorted(files_info))
+
+        def open_next():
+            file_info = next(pending, None)
+            if file_info is None:
+                return False
+            try:
+                f = fs.open(file_info['path'], 'rb')
+            except OSError as e:
+                logging.error(f"Error opening {file_info['path']}: {e}")
+                f = None
+            if f is not None and self.readahead_window:
+                advise_willneed(f, max_bytes)
+            window.append((file_info, f))
+            return True
+
+        try:
+            while len(window) < self.readahead_window and open_next():
+                pass
+            while window or open_next():
+                file_info, f = window.popleft()
+                try:
+                    yield file_info, f
+                finally:
+                    if f is not None:
+                        f.close()
+                # Keep the window full
+                if len(window) < self.readahead_window:
+                    open_next()
+        finally:
+            for _, f in window:
+                if f is not None:
+                    f.close()
@@ -0,0 +1,131 @@
+import os
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+import threading
+from collections import Counter
+
+from .settings import load_settings
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_FILE = 'filesynapse.log'
+
+_lock = threading.Lock()
+_listener = None
+_queue_handler = None
+
+
+def configure_logging(settings=None, log_dir='logs'):
+    """
+    Configure application-wide logging once.
+
+    Records are pushed onto an in-memory queue by a QueueHandler and written
+    by a background QueueListener, so callers never block on disk I/O. The
+    file handler rotates according to settings['logging']['max_size'] and
+    ['backup_count']. Like logging.basicConfig, this does nothing if the root
+    logger has already been configured elsewhere.
+
+    Args:
+        settings (dict): Application settings, loaded from settings.json if None
+        log_dir (str): Directory for the log file
+
+    Returns:
+        bool: True if logging is configured by this module
+    """
+    global _listener, _queue_handler
+
+    with _lock:
+        root = logging.getLogger()
+        if _listener is not None:
+            return True
+        if root.handlers:
+            return False
+
+        if settings is None:
+            settings = load_settings()
+        log_settings = settings.get('logging', {})
+        level = getattr(logging, str(log_settings.get('level', 'INFO')).upper(), logging.INFO)
+
+        formatter = logging.Formatter(LOG_FORMAT)
+        try:
+            os.makedirs(log_dir, exist_ok=True)
+            target = logging.handlers.RotatingFileHandler(
+                os.path.join(log_dir, LOG_FILE),
+                maxBytes=int(log_settings.get('max_size', 10 * 1024 * 1024)),
+                backupCount=int(log_settings.get('backup_count', 5)),
+                encoding='utf-8'
+            )
+            file_error = None
+        except Exception as e:
+            # Fall back to console logging if file logging fails
+            target = logging.StreamHandler()
+            file_error = e
+        target.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        _queue_handler = logging.handlers.QueueHandler(log_queue)
+        _listener = logging.handlers.QueueListener(log_queue, target, respect_handler_level=True)
+        _listener.start()
+
+        root.addHandler(_queue_handler)
+        root.setLevel(level)
+        atexit.register(shutdown_logging)
+
+    if file_error is not None:
+        logging.error(f"Error setting up file logging: {file_error}")
+    return True
+
+
+def shutdown_logging():
+    """Flush pending records and stop the background writer."""
+    global _listener, _queue_handler
+
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener = None
+        _queue_handler = None
+
+
+class EventAggregator:
+    """
+    Aggregate high-frequency per-file events into periodic summary records.
+
+    record() only increments a counter; a single summary line is logged at
+    most once per interval and on flush(), keeping logging off the hot path.
+    """
+
+    def __init__(self, name, level=logging.INFO, interval=5.0):
+        self.name = name
+        self.level = level
+        self.interval = interval
+        self.counts = Counter()
+        self._last_flush = time.monotonic()
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def record(self, key):
+        """Count one occurrence of an event."""
+        with self._lock:
+            self.counts[key] += 1
+            self._pending += 1
+            # Only look at the clock every 256 events
+            due = self._pending & 0xFF == 0 and time.monotonic() - self._last_flush >= self.interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Log the aggregated counts since the last flush and reset them."""
+        with self._lock:
+            counts, self.counts = self.counts, Counter()
+            self._pending = 0
+            self._last_flush = time.monotonic()
+        if counts and logging.getLogger().isEnabledFor(self.level):
+            summary = ', '.join(f"{key}={count}" for key, count in counts.most_common())
+            logging.log(self.level, f"{self.name}: {sum(counts.values())} events ({summary})")
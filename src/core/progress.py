@@ -0,0 +1,83 @@
+import time
+import threading
+
+
+class OperationCancelled(Exception):
+    """Raised when a long-running operation is stopped through its CancellationToken."""
+
+
+class CancellationToken:
+    """
+    Thread-safe flag used to ask a running operation to stop.
+
+    Core loops call raise_if_cancelled() once per file or directory, so a
+    cancel request is honoured within the time it takes to process one item.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """Request cancellation."""
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """Raise OperationCancelled if cancellation was requested."""
+        if self._event.is_set():
+            raise OperationCancelled()
+
+
+class ProgressReporter:
+    """
+    Rate-limited progress reporting.
+
+    Calls callback(done, total) at most once per min_interval seconds, plus a
+    final call from finish(), so a UI never receives more updates than it can
+    draw no matter how fast items are processed. A total of 0 means unknown:
+    callbacks then receive (done, 0) until finish() reports (done, done).
+    """
+
+    def __init__(self, callback, total=0, min_interval=0.1):
+        self.callback = callback
+        self.total = total
+        self.done = 0
+        self.min_interval = min_interval
+        self._last_report = 0.0
+
+    def advance(self, count=1):
+        """Mark count more items as processed."""
+        self.done += count
+        if self.callback is None:
+            return
+        now = time.monotonic()
+        if now - self._last_report >= self.min_interval:
+            self._last_report = now
+            self.callback(self.done, max(self.total, self.done) if self.total else 0)
+
+    def finish(self):
+        """Report the final state unconditionally."""
+        if self.callback is not None:
+            self.callback(self.done, max(self.total, self.done))
+
+
+def stage_callback(callback, start, end):
+    """
+    Map (done, total) progress of one stage onto a start..end percentage range
+
+    Args:
+        callback (callable): Receives an integer percentage
+        start (int): Percentage at the beginning of the stage
+        end (int): Percentage at the end of the stage
+
+    Returns:
+        callable: A progress callback accepting (done, total)
+    """
+    def report(done, total):
+        # An unknown total (done, 0) stays at the start of the stage until it finishes
+        fraction = done / total if total else (0.0 if done else 1.0)
+        callback(int(start + (end - start) * fraction))
+    return report
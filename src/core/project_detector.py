@@ -0,0 +1,132 @@
+import os
+import logging
+
+# Marker file or directory name -> project type. Entries starting with
+# '*' match by suffix (e.g. any Visual Studio solution file).
+DEFAULT_MARKERS = {
+    '.git': 'git',
+    '.hg': 'mercurial',
+    '.svn': 'subversion',
+    'package.json': 'node',
+    'pyproject.toml': 'python',
+    'setup.py': 'python',
+    'Cargo.toml': 'rust',
+    'go.mod': 'go',
+    'pom.xml': 'java',
+    'build.gradle': 'java',
+    'build.gradle.kts': 'java',
+    'CMakeLists.txt': 'cmake',
+    'composer.json': 'php',
+    'Gemfile': 'ruby',
+    '*.sln': 'dotnet',
+    '*.csproj': 'dotnet',
+    '*.xcodeproj': 'xcode',
+}
+
+
+class ProjectRoot:
+    """
+    A directory recognised as a project root during a walk.
+
+    Quacks like os.DirEntry for the parts the scanner uses, so walkers can
+    yield it in place of a file entry.
+    """
+
+    __slots__ = ('path', 'name', 'project_type')
+
+    def __init__(self, path, project_type):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.project_type = project_type
+
+    def is_dir(self, follow_symlinks=True):
+        return True
+
+    def is_file(self, follow_symlinks=True):
+        return False
+
+    def __repr__(self):
+        return f"ProjectRoot({self.path!r}, {self.project_type!r})"
+
+
+class ProjectDetector:
+    """
+    Recognise project roots from the names found in a directory listing.
+
+    Detection uses only the listing the walker already has, so it adds no
+    I/O. Markers can be extended with register_marker() and arbitrary
+    checks plugged in with register_detector().
+    """
+
+    def __init__(self, markers=None):
+        self.names = {}
+        self.suffixes = {}
+        self.detectors = []
+        for marker, project_type in (DEFAULT_MARKERS if markers is None else markers).items():
+            self.register_marker(marker, project_type)
+
+    def register_marker(self, marker, project_type):
+        """
+        Add a marker that identifies a project root
+
+        Args:
+            marker (str): Exact entry name, or '*<suffix>' to match by suffix
+            project_type (str): Type reported for matching directories
+        """
+        if marker.startswith('*'):
+            self.suffixes[marker[1:]] = project_type
+        else:
+            self.names[marker] = project_type
+
+    def register_detector(self, detector):
+        """
+        Add a custom detector
+
+        Args:
+            detector (callable): Called as detector(dir_path, names); returns a
+                project type string or None
+        """
+        self.detectors.append(detector)
+
+    def detect(self, dir_path, names):
+        """
+        Return the project type of a directory, or None if it is not a project root
+
+        Args:
+            dir_path (str): Path of the directory
+            names (list): Entry names in the directory
+
+        Returns:
+            str: Project type or None
+        """
+        for name in names:
+            project_type = self.names.get(name)
+            if project_type is not None:
+                return project_type
+
+        if self.suffixes:
+            for name in names:
+                for suffix, project_type in self.suffixes.items():
+                    if name.endswith(suffix):
+                        return project_type
+
+        for detector in self.detectors:
+            try:
+                project_type = detector(dir_path, names)
+            except Exception as e:
+                logging.error(f"Error in project detector for {dir_path}: {e}")
+                continue
+            if project_type:
+                return project_type
+
+        return None
+
+    @classmethod
+    def from_settings(cls, scan_options):
+        """Create a detector from scan_options, or None if detection is disabled."""
+        if not scan_options.get('detect_projects', True):
+            return None
+        detector = cls()
+        for marker, project_type in scan_options.get('project_markers', {}).items():
+            detector.register_marker(marker, project_type)
+        return detector
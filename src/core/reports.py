@@ -0,0 +1,165 @@
+import os
+import csv
+import json
+import logging
+from datetime import datetime
+
+# Fields stored as ISO 8601 text and restored as datetime objects
+DATE_FIELDS = ('modified_date', 'creation_date')
+
+# Columns of CSV reports; other keys are left out
+CSV_FIELDS = [
+    'path', 'name', 'extension', 'size', 'modified_date', 'creation_date', 'mime_type',
+    'category', 'target_folder', 'source', 'target', 'is_project', 'project_type',
+    'version_family', 'version_info', 'keywords', 'archive_contents'
+]
+
+# CSV columns holding JSON-encoded values
+_CSV_JSON_FIELDS = ('size', 'is_project', 'version_info', 'keywords', 'archive_contents')
+
+_BUFFER_SIZE = 1024 * 1024
+
+
+def _encode(value):
+    """JSON fallback for values the json module does not know."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _decode_dates(record):
+    for field in DATE_FIELDS:
+        value = record.get(field)
+        if isinstance(value, str):
+            record[field] = datetime.fromisoformat(value)
+    return record
+
+
+def report_format(path):
+    """Report format implied by a file name: 'csv' or 'jsonl'."""
+    return 'csv' if os.path.splitext(path)[1].lower() == '.csv' else 'jsonl'
+
+
+class JsonlReportWriter:
+    """
+    Write report records as JSON Lines while they are produced.
+
+    Each record is encoded and handed to a large write buffer right away,
+    so memory use does not depend on the number of records.
+    """
+
+    def __init__(self, path, buffer_size=_BUFFER_SIZE):
+        self.path = path
+        self.count = 0
+        self.file = open(path, 'w', encoding='utf-8', newline='\n', buffering=buffer_size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, record, category=None):
+        """
+        Write one record
+
+        Args:
+            record (dict): File information or planned move
+            category (str): Category to store with the record, if any
+        """
+        if category is not None:
+            record = dict(record, category=category)
+        self.file.write(json.dumps(record, default=_encode, ensure_ascii=False))
+        self.file.write('\n')
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+        logging.info(f"Wrote {self.count} records to {self.path}")
+
+
+class CsvReportWriter(JsonlReportWriter):
+    """
+    Write report records as CSV rows while they are produced.
+
+    Columns are fixed (CSV_FIELDS); nested values such as version_info are
+    stored as JSON text in their cell.
+    """
+
+    def __init__(self, path, buffer_size=_BUFFER_SIZE):
+        super().__init__(path, buffer_size)
+        self.writer = csv.DictWriter(self.file, CSV_FIELDS, extrasaction='ignore', lineterminator='\n')
+        self.writer.writeheader()
+
+    def write(self, record, category=None):
+        row = {}
+        for field in CSV_FIELDS:
+            value = record.get(field)
+            if field == 'category' and category is not None:
+                value = category
+            if value is None:
+                continue
+            if field in _CSV_JSON_FIELDS:
+                value = json.dumps(value, default=_encode, ensure_ascii=False)
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            row[field] = value
+        self.writer.writerow(row)
+        self.count += 1
+
+
+def open_report_writer(path, buffer_size=_BUFFER_SIZE):
+    """Open a JSON Lines or CSV writer depending on the file extension."""
+    if report_format(path) == 'csv':
+        return CsvReportWriter(path, buffer_size)
+    return JsonlReportWriter(path, buffer_size)
+
+
+def read_report(path):
+    """
+    Read a JSON Lines or CSV report back one record at a time
+
+    Args:
+        path (str): Report written by JsonlReportWriter or CsvReportWriter
+
+    Yields:
+        dict: Records with dates restored as datetime objects
+    """
+    with open(path, 'r', encoding='utf-8', newline='', buffering=_BUFFER_SIZE) as f:
+        if report_format(path) == 'csv':
+            for row in csv.DictReader(f):
+                record = {}
+                for field, value in row.items():
+                    if value == '' or field is None:
+                        continue
+                    record[field] = json.loads(value) if field in _CSV_JSON_FIELDS else value
+                yield _decode_dates(record)
+        else:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield _decode_dates(json.loads(line))
+                except ValueError as e:
+                    logging.error(f"Skipping malformed line {line_number} of {path}: {e}")
+
+
+def classified_records(records):
+    """
+    Turn classification report records back into (category, file_info) pairs
+
+    The pairs can be passed to FolderManager.organize_stream or
+    ExternalGrouper.add. Records without a category are skipped.
+
+    Args:
+        records (iterable): Records from read_report
+
+    Yields:
+        tuple: (category, file information dictionary)
+    """
+    for record in records:
+        category = record.pop('category', None)
+        if category is not None and 'path' in record:
+            yield category, record
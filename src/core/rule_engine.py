@@ -0,0 +1,167 @@
+import re
+import time
+import heapq
+import logging
+
+from .scan_filter import glob_to_regex
+
+SECONDS_PER_DAY = 86400
+
+
+class CompiledRule:
+    """
+    One custom rule with its conditions precompiled.
+
+    Supported keys of the rule dictionary:
+        target        Nested target folder, e.g. "Belgeler/Faturalar" (required)
+        category      Category key reported for matching files
+        name          Optional label used in logs
+        extensions    List of extensions, e.g. [".pdf"]
+        name_regex    Regular expression searched in the file name (case-insensitive)
+        path_glob     Glob matched against the full path; '**' crosses directories
+        min_size, max_size          Size bounds in bytes
+        min_age_days, max_age_days  Bounds on the age of the last modification
+        is_version, is_draft, is_final  Required values of the filename version flags
+    """
+
+    __slots__ = ('index', 'name', 'target', 'category', 'extensions', 'name_regex',
+                 'path_regex', 'min_size', 'max_size', 'min_age', 'max_age', 'flags')
+
+    def __init__(self, index, rule, category):
+        target = rule['target'].replace('\\', '/').strip('/')
+        if not target or '..' in target.split('/'):
+            raise ValueError(f"invalid target folder: {rule['target']!r}")
+
+        self.index = index
+        self.name = rule.get('name', target)
+        self.target = target
+        self.category = category
+        self.extensions = {ext.lower() for ext in rule.get('extensions', [])}
+        self.name_regex = re.compile(rule['name_regex'], re.IGNORECASE) if rule.get('name_regex') else None
+
+        self.path_regex = None
+        if rule.get('path_glob'):
+            pattern = rule['path_glob'].replace('\\', '/')
+            prefix = '' if pattern.startswith('/') else '(?:.*/)?'
+            self.path_regex = re.compile(prefix + glob_to_regex(pattern.lstrip('/')) + '$', re.IGNORECASE)
+
+        self.min_size = rule.get('min_size')
+        self.max_size = rule.get('max_size')
+        self.min_age = rule['min_age_days'] * SECONDS_PER_DAY if rule.get('min_age_days') is not None else None
+        self.max_age = rule['max_age_days'] * SECONDS_PER_DAY if rule.get('max_age_days') is not None else None
+        self.flags = tuple(
+            (flag, bool(rule[flag])) for flag in ('is_version', 'is_draft', 'is_final') if flag in rule
+        )
+
+    def matches(self, file_info, now):
+        """Check all conditions except the extension, which the index already applied."""
+        # Cheapest checks first
+        if self.min_size is not None or self.max_size is not None:
+            size = file_info.get('size', 0)
+            if self.min_size is not None and size < self.min_size:
+                return False
+            if self.max_size is not None and size > self.max_size:
+                return False
+
+        if self.flags:
+            version_info = file_info.get('version_info') or {}
+            for flag, expected in self.flags:
+                if bool(version_info.get(flag)) != expected:
+                    return False
+
+        if self.min_age is not None or self.max_age is not None:
+            modified = file_info.get('modified_date')
+            if modified is None:
+                return False
+            age = now - modified.timestamp()
+            if self.min_age is not None and age < self.min_age:
+                return False
+            if self.max_age is not None and age > self.max_age:
+                return False
+
+        if self.name_regex is not None and not self.name_regex.search(file_info['name']):
+            return False
+
+        if self.path_regex is not None and not self.path_regex.match(file_info['path'].replace('\\', '/')):
+            return False
+
+        return True
+
+
+class RuleEngine:
+    """
+    Ordered decision table compiled from settings.categories.custom_rules.
+
+    Rules are compiled once. Rules that name extensions are indexed by
+    extension, the rest are kept in a wildcard list; a lookup merges the two
+    (already ordered) candidate lists, so a file is only tested against rules
+    that can apply to its extension and the first matching rule wins.
+    """
+
+    def __init__(self, rules=None, category_names=None, categories=None):
+        """
+        Args:
+            rules (list): Rule dictionaries (see CompiledRule)
+            category_names (dict): Display name -> category key, used to infer
+                the category of a rule from the first segment of its target
+            categories (iterable): Valid category keys; a rule naming any other
+                category is reported as 'other'. Not checked if None
+        """
+        self.rules = []
+        self.by_extension = {}
+        self.wildcard = []
+        category_names = category_names or {}
+        categories = set(categories) if categories is not None else None
+
+        for position, rule in enumerate(rules or []):
+            try:
+                category = rule.get('category') or category_names.get(
+                    rule['target'].replace('\\', '/').strip('/').split('/')[0], 'other')
+                if categories is not None and category not in categories and category != 'other':
+                    logging.warning(f"Custom rule #{position} names unknown category {category!r}; using 'other'")
+                    category = 'other'
+                compiled = CompiledRule(len(self.rules), rule, category)
+            except Exception as e:
+                logging.error(f"Skipping invalid custom rule #{position}: {e}")
+                continue
+
+            self.rules.append(compiled)
+            if compiled.extensions:
+                for extension in compiled.extensions:
+                    self.by_extension.setdefault(extension, []).append(compiled.index)
+            else:
+                self.wildcard.append(compiled.index)
+
+        logging.info(f"Compiled {len(self.rules)} custom rule(s)")
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def match(self, file_info, now=None):
+        """
+        Return the first rule matching a file, or None
+
+        Args:
+            file_info (dict): File information from FileAnalyzer
+            now (float): Reference timestamp for age conditions (defaults to now)
+
+        Returns:
+            CompiledRule: Matching rule or None
+        """
+        indexed = self.by_extension.get(file_info.get('extension', '').lower())
+        if indexed is None:
+            if not self.wildcard:
+                return None
+            candidates = self.wildcard
+        elif self.wildcard:
+            candidates = heapq.merge(indexed, self.wildcard)
+        else:
+            candidates = indexed
+
+        if now is None:
+            now = time.time()
+        for index in candidates:
+            rule = self.rules[index]
+            if rule.matches(file_info, now):
+                return rule
+        return None
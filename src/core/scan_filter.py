@@ -0,0 +1,258 @@
+import os
+import re
+import logging
+
+from .filesystem import OS_FILESYSTEM
+from .project_detector import ProjectDetector, ProjectRoot
+
+# Windows FILE_ATTRIBUTE_HIDDEN
+_HIDDEN_ATTRIBUTE = 0x2
+
+
+def glob_to_regex(pattern):
+    """
+    Translate a gitignore-style glob into a regular expression
+
+    '*' and '?' never cross a '/', '**' matches any number of directories.
+
+    Args:
+        pattern (str): Glob pattern without leading '!' or trailing '/'
+
+    Returns:
+        str: Regular expression source (unanchored)
+    """
+    regex = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith('**/', i):
+            regex.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            regex.append('.*')
+            i += 2
+            continue
+        if char == '*':
+            regex.append('[^/]*')
+        elif char == '?':
+            regex.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                regex.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                regex.append(f'[{body}]')
+                i = end
+        else:
+            regex.append(re.escape(char))
+        i += 1
+    return ''.join(regex)
+
+
+class IgnorePattern:
+    """A single compiled gitignore-style pattern."""
+
+    def __init__(self, pattern):
+        self.source = pattern
+        self.negate = pattern.startswith('!')
+        if self.negate:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+
+        # Patterns containing a slash are relative to the scan root,
+        # others match a name at any depth
+        anchored = '/' in pattern
+        pattern = pattern.lstrip('/')
+        self.literal_name = None if anchored or re.search(r'[*?\[]', pattern) else pattern
+
+        prefix = '' if anchored else '(?:.*/)?'
+        self.regex = re.compile(prefix + glob_to_regex(pattern) + '$')
+
+    def matches(self, rel_path, is_dir):
+        if self.dir_only and not is_dir:
+            return False
+        return self.regex.match(rel_path) is not None
+
+
+class PatternSet:
+    """
+    Ordered gitignore-style pattern list where the last matching pattern wins.
+
+    When no pattern is negated, literal names are answered from a set and the
+    remaining globs from one combined regex, so a lookup is a hash probe plus
+    at most two regex matches regardless of the number of patterns.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = [IgnorePattern(p) for p in patterns or [] if p and not p.startswith('#')]
+        self.ordered = any(p.negate for p in self.patterns)
+
+        self.names = {}
+        any_regex, dir_regex = [], []
+        for pattern in self.patterns:
+            if pattern.literal_name is not None:
+                # Value tells whether the name also matches files
+                self.names[pattern.literal_name] = self.names.get(pattern.literal_name, False) or not pattern.dir_only
+            else:
+                (dir_regex if pattern.dir_only else any_regex).append(pattern.regex.pattern)
+        self.any_regex = re.compile('|'.join(any_regex)) if any_regex else None
+        self.dir_regex = re.compile('|'.join(dir_regex)) if dir_regex else None
+
+    def __bool__(self):
+        return bool(self.patterns)
+
+    def matches(self, rel_path, is_dir):
+        if self.ordered:
+            for pattern in reversed(self.patterns):
+                if pattern.matches(rel_path, is_dir):
+                    return not pattern.negate
+            return False
+
+        name = rel_path.rsplit('/', 1)[-1]
+        if name in self.names and (is_dir or self.names[name]):
+            return True
+        if self.any_regex is not None and self.any_regex.match(rel_path):
+            return True
+        return is_dir and self.dir_regex is not None and self.dir_regex.match(rel_path) is not None
+
+
+class ScanFilter:
+    """
+    Decide which directories are descended into and which files are scanned.
+
+    Built from settings.json scan_options. Excluded and hidden directories are
+    pruned before they are listed, so large subtrees such as node_modules or
+    .git cost a single directory entry. With a project_detector, recognised
+    project roots are reported as a single ProjectRoot and not descended into.
+    """
+
+    def __init__(self, include_hidden=False, follow_symlinks=False, recursive=True,
+                 max_size_mb=100, exclude_patterns=None, include_patterns=None,
+                 project_detector=None, fs=None):
+        self.include_hidden = include_hidden
+        self.follow_symlinks = follow_symlinks
+        self.recursive = recursive
+        self.max_size = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+        self.exclude = PatternSet(exclude_patterns)
+        self.include = PatternSet(include_patterns)
+        self.project_detector = project_detector
+        self.fs = fs or OS_FILESYSTEM
+
+    @classmethod
+    def from_settings(cls, scan_options, fs=None):
+        """Create a filter from the scan_options section of the settings."""
+        return cls(
+            include_hidden=scan_options.get('include_hidden', False),
+            follow_symlinks=scan_options.get('follow_symlinks', False),
+            recursive=scan_options.get('recursive', True),
+            max_size_mb=scan_options.get('max_size_mb', 100),
+            exclude_patterns=scan_options.get('exclude_patterns', []),
+            include_patterns=scan_options.get('include_patterns', []),
+            project_detector=ProjectDetector.from_settings(scan_options),
+            fs=fs
+        )
+
+    def is_hidden(self, entry):
+        if entry.name.startswith('.'):
+            return True
+        if os.name == 'nt':
+            # Attributes come with the directory listing on Windows
+            attributes = getattr(entry.stat(follow_symlinks=False), 'st_file_attributes', 0)
+            return bool(attributes & _HIDDEN_ATTRIBUTE)
+        return False
+
+    def accepts_dir(self, rel_path):
+        return not self.exclude.matches(rel_path, True)
+
+    def accepts_file(self, rel_path):
+        if self.exclude.matches(rel_path, False):
+            return False
+        return not self.include or self.include.matches(rel_path, False)
+
+    def accepts_size(self, size):
+        return self.max_size is None or size <= self.max_size
+
+    def scan_dir(self, path, rel, visited=None):
+        """
+        List one directory and split it into accepted files and subdirectories
+
+        Args:
+            path (str): Directory path
+            rel (str): Path relative to the scan root ('' for the root)
+            visited (set): (st_dev, st_ino) of directories already listed,
+                used to break symlink loops when following symlinks
+
+        Returns:
+            tuple: (files, subdirs) where files is a list of DirEntry (or a
+                single ProjectRoot) and subdirs a list of (path, rel) pairs
+        """
+        if self.follow_symlinks and visited is not None:
+            # Guard against symlink loops
+            try:
+                stat = self.fs.stat(path)
+            except OSError:
+                return [], []
+            key = (stat.st_dev, stat.st_ino)
+            if key in visited:
+                return [], []
+            visited.add(key)
+
+        try:
+            entries = self.fs.scandir(path)
+        except OSError as e:
+            logging.error(f"Error listing directory {path}: {e}")
+            return [], []
+
+        # The scan root itself is never treated as an atomic project
+        if rel and self.project_detector is not None:
+            project_type = self.project_detector.detect(path, [entry.name for entry in entries])
+            if project_type is not None:
+                return [ProjectRoot(path, project_type)], []
+
+        files = []
+        subdirs = []
+        for entry in entries:
+            try:
+                if not self.include_hidden and self.is_hidden(entry):
+                    continue
+                if not self.follow_symlinks and entry.is_symlink():
+                    continue
+                rel_path = f"{rel}/{entry.name}" if rel else entry.name
+                if entry.is_dir():
+                    if self.recursive and self.accepts_dir(rel_path):
+                        subdirs.append((entry.path, rel_path))
+                elif entry.is_file() and self.accepts_file(rel_path):
+                    files.append(entry)
+            except OSError as e:
+                logging.error(f"Error reading entry {entry.path}: {e}")
+
+        return files, subdirs
+
+    def walk(self, top, cancel_token=None):
+        """
+        Walk a directory tree, yielding a DirEntry for every accepted file
+
+        Args:
+            top (str): Root directory
+            cancel_token (CancellationToken): Optional token checked per directory
+
+        Yields:
+            os.DirEntry: Accepted file entries, or a ProjectRoot for each
+                project directory below top (its contents are not walked)
+        """
+        stack = [(top, '')]
+        visited = set()
+
+        while stack:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            path, rel = stack.pop()
+
+            files, subdirs = self.scan_dir(path, rel, visited)
+            yield from files
+            stack.extend(reversed(subdirs))
@@ -0,0 +1,296 @@
+import os
+import json
+import stat
+import queue
+import socket
+import logging
+import threading
+import socketserver
+from concurrent.futures import Future
+
+from .engine import get_engine
+from .folder_manager import ERROR_SAMPLE_SIZE
+from .lru_cache import LRUCache
+
+DEFAULT_SOCKET_PATH = os.path.join(os.path.expanduser('~'), '.filesynapse.sock')
+
+
+class ServiceBusy(Exception):
+    """Raised when the concurrency limit is reached."""
+
+
+class ClassificationBatcher:
+    """
+    Collect classify requests from all connections and process them in batches.
+
+    A single worker thread takes every request already queued (waiting up to
+    batch_delay for more, if set) until batch_size paths are collected, and
+    classifies them together, so concurrent clients share one pass over the
+    warm engine instead of contending for it. With no delay, a lone request
+    is answered immediately and batches form only under load.
+    """
+
+    def __init__(self, engine, batch_size=256, batch_delay=0.0, index_size=100000):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        # (path, mtime, size) -> analyzed file information
+        self.index = LRUCache(index_size)
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, paths):
+        """Queue paths for classification; the returned Future yields a list of results."""
+        future = Future()
+        self.requests.put((list(paths), future))
+        return future
+
+    def stop(self):
+        self.requests.put(None)
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            batch = [request]
+            size = len(request[0])
+            # Gather whatever else arrives shortly after
+            while size < self.batch_size:
+                try:
+                    if self.batch_delay > 0:
+                        request = self.requests.get(timeout=self.batch_delay)
+                    else:
+                        request = self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    self.requests.put(None)
+                    break
+                batch.append(request)
+                size += len(request[0])
+            self._process(batch)
+
+    def _process(self, batch):
+        _, analyzer, classifier, _ = self.engine.components()
+        for paths, future in batch:
+            try:
+                future.set_result([self._classify(analyzer, classifier, path) for path in paths])
+            except Exception as e:
+                future.set_exception(e)
+
+    def _classify(self, analyzer, classifier, path):
+        try:
+            stat = analyzer.fs.stat(path)
+        except OSError as e:
+            return {'path': path, 'error': e.strerror or str(e)}
+
+        key = (path, stat.st_mtime, stat.st_size)
+        file_info = self.index.get(key)
+        if file_info is None:
+            file_info = analyzer.analyze_file(path)
+            if file_info is None:
+                return {'path': path, 'error': "not analyzed"}
+            self.index.put(key, file_info)
+
+        category = classifier.classify_file(file_info)
+        return {'path': path, 'category': category, 'target_folder': file_info.get('target_folder')}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """One connection: newline-delimited JSON requests, one response line each."""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response = self.server.service.dispatch(line)
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class Service:
+    """
+    Local daemon answering classify and organize requests over a Unix socket.
+
+    The shared Engine stays loaded for the lifetime of the process, and
+    recently analyzed paths are kept in an index keyed by (path, mtime,
+    size), so a request costs a stat and a cache lookup instead of a cold
+    start. Requests are JSON objects {"id", "method", "params"} on one line;
+    methods are ping, classify(paths), organize(root), stats and
+    io_budget(ops_per_second, bytes_per_second, ionice), where omitted
+    limits are kept and 0 or "unlimited" removes one. At most
+    max_jobs organize runs execute at once; further ones are rejected as busy.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, engine=None, max_jobs=2,
+                 batch_size=256, batch_delay=0.0):
+        self.socket_path = socket_path
+        self.engine = engine or get_engine()
+        self.jobs = threading.BoundedSemaphore(max_jobs)
+        self.batcher = ClassificationBatcher(self.engine, batch_size, batch_delay)
+        self.server = None
+
+    @classmethod
+    def from_settings(cls, settings, engine=None):
+        """Create a service using the service section of the settings."""
+        options = settings.get('service', {})
+        return cls(
+            os.path.expanduser(options.get('socket_path') or DEFAULT_SOCKET_PATH),
+            engine,
+            options.get('max_jobs', 2),
+            options.get('batch_size', 256),
+            options.get('batch_delay_ms', 0) / 1000
+        )
+
+    def dispatch(self, line):
+        """Handle one request line and return the response object."""
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            method = getattr(self, 'rpc_' + request.get('method', ''), None)
+            if method is None:
+                raise ValueError(f"unknown method {request.get('method')!r}")
+            return {'id': request_id, 'result': method(**request.get('params', {}))}
+        except ServiceBusy as e:
+            return {'id': request_id, 'error': str(e), 'busy': True}
+        except Exception as e:
+            logging.error(f"Error handling service request: {e}")
+            return {'id': request_id, 'error': str(e)}
+
+    def rpc_ping(self):
+        return 'pong'
+
+    def rpc_classify(self, paths):
+        return self.batcher.submit(paths).result()
+
+    def rpc_organize(self, root):
+        if not self.jobs.acquire(blocking=False):
+            raise ServiceBusy("too many organize jobs running")
+        try:
+            results = self.engine.organize(root)
+        finally:
+            self.jobs.release()
+        # One JSON line per response: failed paths are only sampled
+        return {
+            'moved': results['moved'],
+            'failed': results['failed'],
+            'errors': results['error'][:ERROR_SAMPLE_SIZE],
+            'cancelled': results['cancelled']
+        }
+
+    def rpc_stats(self):
+        return {
+            'cache': self.engine.cache_info(),
+            'index': self.batcher.index.info(),
+            'io_budget': self.engine.io_budget.limits()
+        }
+
+    def rpc_io_budget(self, ops_per_second=None, bytes_per_second=None, ionice=None):
+        return self.engine.set_io_budget(ops_per_second, bytes_per_second, ionice)
+
+    def start(self):
+        """Bind the socket and serve requests on a background thread."""
+        if not hasattr(socket, 'AF_UNIX'):
+            raise RuntimeError("Unix domain sockets are not available on this platform")
+        self._remove_stale_socket()
+
+        self.server = _UnixServer(self.socket_path, _RequestHandler)
+        self.server.service = self
+        os.chmod(self.socket_path, 0o600)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        logging.info(f"Service listening on {self.socket_path}")
+
+    def _remove_stale_socket(self):
+        """Remove a socket left by a run that did not shut down cleanly.
+
+        Raises:
+            RuntimeError: If a service still answers on the socket, or the
+                path exists and is not a socket
+        """
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        probe.settimeout(1)
+        try:
+            probe.connect(self.socket_path)
+        except FileNotFoundError:
+            return
+        except OSError:
+            pass
+        else:
+            raise RuntimeError(f"Another service is already listening on {self.socket_path}")
+        finally:
+            probe.close()
+
+        try:
+            mode = os.lstat(self.socket_path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise RuntimeError(f"{self.socket_path} exists and is not a socket")
+        os.remove(self.socket_path)
+
+    def serve_forever(self):
+        """Serve requests until interrupted."""
+        self.start()
+        try:
+            threading.Event().wait()
+        finally:
+            self.stop()
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+        self.batcher.stop()
+        logging.info("Service stopped")
+
+
+class ServiceClient:
+    """Minimal client for the Service protocol."""
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, timeout=None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(socket_path)
+        self.reader = self.sock.makefile('rb')
+        self.next_id = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+    def call(self, method, **params):
+        """Send one request and return its result; raises RuntimeError on errors."""
+        self.next_id += 1
+        request = {'id': self.next_id, 'method': method, 'params': params}
+        self.sock.sendall(json.dumps(request, ensure_ascii=False).encode('utf-8') + b'\n')
+        response = json.loads(self.reader.readline())
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response['result']
+
+    def classify(self, paths):
+        return self.call('classify', paths=list(paths))
+
+    def organize(self, root):
+        return self.call('organize', root=root)
+
+    def io_budget(self, ops_per_second=None, bytes_per_second=None, ionice=None):
+        return self.call('io_budget', ops_per_second=ops_per_second,
+                         bytes_per_second=bytes_per_second, ionice=ionice)
@@ -0,0 +1,120 @@
+import os
+import json
+import copy
+import logging
+
+# Default settings, mirrors settings.json shipped with the application
+DEFAULT_SETTINGS = {
+    "theme": "dark",
+    "language": "tr",
+    "scan_options": {
+        "recursive": True,
+        "follow_symlinks": False,
+        "include_hidden": False,
+        "max_size_mb": 100,
+        "content_max_size_mb": 10,
+        "exclude_patterns": [
+            ".git/", ".svn/", ".hg/", "node_modules/", "__pycache__/", ".cache/",
+            ".venv/", "venv/", ".tox/", ".mypy_cache/", ".pytest_cache/",
+            "Thumbs.db", "desktop.ini"
+        ],
+        "include_patterns": [],
+        "detect_projects": True,
+        "project_markers": {},
+        "archive_max_members": 2000,
+        "directory_index": None
+    },
+    "ai_model": {
+        "model_name": "bert-base-multilingual-cased",
+        "use_gpu": True,
+        "batch_size": 32
+    },
+    "ui": {
+        "window_size": [1024, 768],
+        "show_preview": True,
+        "auto_refresh": True,
+        "show_hidden_files": False
+    },
+    "processing": {
+        "max_threads": 4,
+        "chunk_size": 1024,
+        "timeout": 30,
+        "timeout_scope": "network",
+        "classification_cache_size": 4096,
+        "device_concurrency": {
+            "hdd": 1,
+            "ssd": 8,
+            "network": 16,
+            "unknown": 4
+        },
+        "spill_to_disk": False,
+        "memory_budget_mb": 256,
+        "spill_dir": None,
+        "io_order": "inode",
+        "readahead_window": 32
+    },
+    "estimator": {
+        "enabled": True,
+        "max_depth": 32,
+        "max_probes": 2000,
+        "time_budget_ms": 300,
+        "exact_dirs": 256,
+        "samples_per_dir": 8
+    },
+    "io_budget": {
+        "ops_per_second": None,
+        "bytes_per_second": None,
+        "ionice": None
+    },
+    "service": {
+        "socket_path": None,
+        "max_jobs": 2,
+        "batch_size": 256,
+        "batch_delay_ms": 0
+    },
+    "logging": {
+        "level": "INFO",
+        "max_size": 10485760,
+        "backup_count": 5
+    },
+    "categories": {
+        "default": "other",
+        "custom_rules": [],
+        "group_versions": True,
+        "fuzzy_versions": False,
+        "route_archives": True,
+        "archive_dominant_share": 0.6
+    }
+}
+
+
+def _merge(base, override):
+    """Recursively merge override into a copy of base."""
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_settings(path='settings.json'):
+    """
+    Load application settings, filling in defaults for missing keys
+
+    Args:
+        path (str): Path to the settings JSON file
+
+    Returns:
+        dict: Settings dictionary
+    """
+    if not os.path.exists(path):
+        return copy.deepcopy(DEFAULT_SETTINGS)
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return _merge(DEFAULT_SETTINGS, json.load(f))
+    except Exception as e:
+        logging.error(f"Error loading settings from {path}: {e}")
+        return copy.deepcopy(DEFAULT_SETTINGS)
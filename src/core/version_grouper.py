@@ -0,0 +1,276 @@
+import os
+import re
+import math
+import logging
+from collections import Counter
+
+from .file_analyzer import VERSION_REGEX, DRAFT_REGEX, FINAL_REGEX
+
+# A whole token that is a version, draft or final marker
+# (so "son" in "person" is left alone)
+_MARKER_REGEX = re.compile(
+    r'(?:%s|%s|%s)' % (VERSION_REGEX.pattern, DRAFT_REGEX.pattern, FINAL_REGEX.pattern),
+    re.IGNORECASE
+)
+_DIGIT_RUNS = re.compile(r'\d+')
+_SEPARATORS = re.compile(r'[\s_\-.()\[\]]+')
+_INVALID_FOLDER_CHARS = re.compile(r'[<>:"/\\|?*]')
+
+# Number of set bits of an int (int.bit_count needs Python 3.10)
+_popcount = getattr(int, 'bit_count', None) or (lambda value: bin(value).count('1'))
+
+# Subfolders used inside a family folder
+DRAFT_FOLDER = 'Taslaklar'
+FINAL_FOLDER = 'Final'
+VERSION_FOLDER = 'Versiyonlar'
+
+
+# Token -> whether it is a marker; tokens repeat heavily across a tree,
+# so the regex runs about once per distinct token
+_marker_cache = {}
+_MARKER_CACHE_SIZE = 1 << 16
+
+
+def normalize_stem(filename):
+    """
+    Strip version, draft and final tokens from a filename
+
+    Args:
+        filename (str): File name, e.g. 'Logo_v2_final.psd'
+
+    Returns:
+        tuple: (normalized stem, whether any token was stripped), e.g. ('logo', True)
+    """
+    dot = filename.rfind('.')
+    stem = filename[:dot] if dot > 0 else filename
+    tokens = _SEPARATORS.split(stem.lower())
+
+    kept = []
+    stripped = False
+    after_version = False
+    stripped_version = False
+    for token in tokens:
+        if not token:
+            continue
+        is_marker = _marker_cache.get(token)
+        if is_marker is None:
+            is_marker = _MARKER_REGEX.fullmatch(token) is not None
+            if len(_marker_cache) < _MARKER_CACHE_SIZE:
+                _marker_cache[token] = is_marker
+        if is_marker:
+            stripped = True
+            after_version = token[0] == 'v'
+        elif after_version and token.isdigit():
+            # Remaining parts of 'v1.2' or 'version 2'
+            if kept and kept[-1] == 'version' and not stripped_version:
+                kept.pop()
+            stripped = stripped_version = True
+        else:
+            after_version = token == 'version'
+            stripped_version = False
+            kept.append(token)
+
+    if not kept:
+        # Nothing but version tokens, e.g. 'v2.psd'
+        return ' '.join(token for token in tokens if token), False
+    return ' '.join(kept), stripped
+
+
+class _DisjointSet:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+class VersionGrouper:
+    """
+    Group files into version families without pairwise fuzzy comparison.
+
+    Files are bucketed by their normalized stem (exact hashing). Optionally
+    (settings categories.fuzzy_versions), near-identical stems are merged
+    using character n-gram prefix filtering: each stem indexes only its
+    rarest n-grams, and only stems sharing one of them are compared, first
+    by a 64-bit signature of their n-grams and then with a Jaccard check,
+    so the cost stays close to linear in the number of distinct stems.
+    """
+
+    def __init__(self, fuzzy=False, threshold=0.8, ngram=3, max_block=1000):
+        """
+        Args:
+            fuzzy (bool): Also merge near-identical stems; much slower on large trees
+            threshold (float): Minimum n-gram Jaccard similarity for a near match
+            ngram (int): n-gram length
+            max_block (int): n-grams shared by more stems than this (of a size
+                that could still match) are not used as blocking keys
+        """
+        self.fuzzy = fuzzy
+        self.threshold = threshold
+        self.ngram = ngram
+        self.max_block = max_block
+
+    def group(self, files_info):
+        """
+        Group files into version families
+
+        A family needs at least two files, at least one of which carries a
+        version, draft or final token.
+
+        Args:
+            files_info (iterable): File information dictionaries
+
+        Returns:
+            dict: Family stem -> list of file information dictionaries
+        """
+        buckets = {}
+        tagged = set()
+        for file_info in files_info:
+            stem, stripped = normalize_stem(file_info['name'])
+            buckets.setdefault(stem, []).append(file_info)
+            if stripped:
+                tagged.add(stem)
+
+        stems = list(buckets)
+        merged = {}
+        if self.fuzzy:
+            merged = self._merge_near_stems([stem for stem in stems if stem in tagged])
+
+        families = {}
+        for stem in stems:
+            families.setdefault(merged.get(stem, stem), []).extend(buckets[stem])
+
+        result = {}
+        for stem, members in families.items():
+            # Near matches only merge tagged stems, so checking the family stem is enough
+            if len(members) >= 2 and stem in tagged:
+                result[stem] = members
+
+        logging.info(f"Found {len(result)} version families in {len(stems)} distinct stems")
+        return result
+
+    def _ngrams(self, stem):
+        n = self.ngram
+        padded = f" {stem} "
+        return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+    def _merge_near_stems(self, stems):
+        """Return stem -> representative stem for stems with a near match."""
+        if len(stems) < 2:
+            return {}
+
+        grams = [self._ngrams(stem) for stem in stems]
+        sizes = [len(stem_grams) for stem_grams in grams]
+
+        # Global order of n-grams, rarest first, required by prefix filtering
+        frequency = Counter(gram for stem_grams in grams for gram in stem_grams)
+        rank = {gram: position for position, gram in enumerate(
+            sorted(frequency, key=lambda gram: (frequency[gram], gram)))}
+
+        threshold = self.threshold
+        # Stems are indexed under fewer n-grams than they probe with; this is
+        # enough because every indexed stem is at most as large as the probe
+        index_share = 2 * threshold / (1 + threshold)
+        # Stems only match when their numbers agree ('report 2023' is not
+        # a version of 'report 2024'), so each set of numbers has its own
+        # blocks: n-gram rank -> [first live position, stem indices by size]
+        indexes = {}
+        sets = _DisjointSet(len(stems))
+
+        # Process short stems first so the length filter below is one-sided
+        order = sorted(range(len(stems)), key=sizes.__getitem__)
+        # Ranks compare faster than n-gram strings when verifying candidates
+        grams = [frozenset(map(rank.__getitem__, stem_grams)) for stem_grams in grams]
+        # 64-bit signatures: each bit set in only one of two signatures stands
+        # for at least one n-gram in only one of the stems
+        signatures = []
+        for stem_grams in grams:
+            signature = 0
+            for gram in stem_grams:
+                signature |= 1 << (gram & 63)
+            signatures.append(signature)
+        # Jaccard >= t allows at most this share of |a| + |b| n-grams in only
+        # one of a, b (plus a little for rounding, so no match is filtered out)
+        max_difference = (1 - threshold) / (1 + threshold) + 1e-9
+        for i in order:
+            stem_grams = grams[i]
+            size = sizes[i]
+            min_size = threshold * size
+            # Rounding must not shorten a prefix (8/9 * 63 comes out just above 56)
+            prefix = sorted(stem_grams)[:size - math.ceil(min_size - 1e-9) + 1]
+            indexed = size - math.ceil(index_share * size - 1e-9) + 1
+            blocks = indexes.setdefault(tuple(_DIGIT_RUNS.findall(stems[i])), {})
+
+            candidates = set()
+            for position, gram in enumerate(prefix):
+                block = blocks.get(gram)
+                if block is None:
+                    if position < indexed:
+                        blocks[gram] = [1, i]
+                    continue
+                start = block[0]
+                # Jaccard >= t requires |other| >= t * |this|; stems come in
+                # order of size, so entries too small now stay too small
+                while start < len(block) and sizes[block[start]] < min_size:
+                    start += 1
+                block[0] = start
+                if len(block) - start < self.max_block:
+                    candidates.update(block[start:])
+                    if position < indexed:
+                        block.append(i)
+
+            signature = signatures[i]
+            for j in candidates:
+                other_size = sizes[j]
+                if _popcount(signature ^ signatures[j]) > max_difference * (size + other_size):
+                    continue
+                intersection = len(stem_grams & grams[j])
+                if intersection / (size + other_size - intersection) >= threshold:
+                    sets.union(i, j)
+
+        merged = {}
+        for i, stem in enumerate(stems):
+            root = sets.find(i)
+            if root != i:
+                merged[stem] = stems[root]
+        return merged
+
+    def assign_targets(self, files_info):
+        """
+        Set target folders for files that belong to a version family
+
+        Members go to '<Family>/Versiyonlar', '<Family>/Taslaklar' or
+        '<Family>/Final'. Files that already have a target folder (from a
+        custom rule) keep it.
+
+        Args:
+            files_info (list): File information dictionaries
+
+        Returns:
+            dict: Family stem -> list of file information dictionaries
+        """
+        families = self.group(files_info)
+        for stem, members in families.items():
+            family_name = _INVALID_FOLDER_CHARS.sub('', stem.title()).strip() or 'Dosyalar'
+            for file_info in members:
+                file_info['version_family'] = family_name
+                if file_info.get('target_folder'):
+                    continue
+                version_info = file_info.get('version_info') or {}
+                if version_info.get('is_draft'):
+                    subfolder = DRAFT_FOLDER
+                elif version_info.get('is_final'):
+                    subfolder = FINAL_FOLDER
+                else:
+                    subfolder = VERSION_FOLDER
+                file_info['target_folder'] = f"{family_name}/{subfolder}"
+        return families
@@ -0,0 +1,200 @@
+import os
+import time
+import socket
+import sqlite3
+import logging
+import multiprocessing
+from contextlib import contextmanager
+
+PENDING = 'pending'
+CLAIMED = 'claimed'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS moves (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_moves_state ON moves (state, lease_until);
+"""
+
+
+class MoveQueue:
+    """
+    Persistent queue of planned file moves stored in a local SQLite file.
+
+    Workers claim batches under a time-limited lease and record completions.
+    A batch whose lease expires (for example because its worker crashed) is
+    handed out again, so a job can be resumed or spread over several
+    processes without any external service. When several hosts share the
+    queue file over a network mount, open it with journal_mode='DELETE',
+    since WAL requires shared memory on a single host.
+    """
+
+    def __init__(self, path, max_attempts=3, journal_mode='WAL'):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute(f"PRAGMA journal_mode={journal_mode}")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        # Take the write lock up front so concurrent claimers never interleave
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def enqueue(self, moves):
+        """
+        Add planned moves to the queue
+
+        Args:
+            moves (iterable): Dictionaries with 'source' and 'target' keys
+
+        Returns:
+            int: Number of moves added
+        """
+        with self._transaction():
+            cursor = self.conn.executemany(
+                "INSERT INTO moves (source, target) VALUES (?, ?)",
+                ((move['source'], move['target']) for move in moves)
+            )
+        return cursor.rowcount
+
+    def claim(self, worker_id, batch_size=100, lease_seconds=300):
+        """
+        Claim a batch of pending moves, including moves whose lease expired
+
+        Moves whose lease expired on their last allowed attempt (their
+        worker died) are marked failed with a "lease expired" error.
+
+        Args:
+            worker_id (str): Identifier recorded with the claim
+            batch_size (int): Maximum number of moves to claim
+            lease_seconds (float): How long the claim stays valid
+
+        Returns:
+            list: Dictionaries with 'id', 'source' and 'target'
+        """
+        now = time.time()
+        with self._transaction():
+            self.conn.execute(
+                "UPDATE moves SET state = ?, lease_until = NULL, error = ? "
+                "WHERE state = ? AND lease_until < ? AND attempts >= ?",
+                (FAILED, "lease expired", CLAIMED, now, self.max_attempts)
+            )
+            rows = self.conn.execute(
+                "SELECT id, source, target FROM moves "
+                "WHERE (state = ? OR (state = ? AND lease_until < ?)) AND attempts < ? "
+                "ORDER BY target LIMIT ?",
+                (PENDING, CLAIMED, now, self.max_attempts, batch_size)
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE moves SET state = ?, worker = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                ((CLAIMED, worker_id, now + lease_seconds, row[0]) for row in rows)
+            )
+        return [{'id': row[0], 'source': row[1], 'target': row[2]} for row in rows]
+
+    def renew(self, ids, lease_seconds=300):
+        """Extend the lease of moves still being processed."""
+        with self._transaction():
+            self.conn.executemany(
+                "UPDATE moves SET lease_until = ? WHERE id = ? AND state = ?",
+                ((time.time() + lease_seconds, move_id, CLAIMED) for move_id in ids)
+            )
+
+    def complete(self, ids):
+        """Mark moves as done."""
+        with self._transaction():
+            self.conn.executemany(
+                "UPDATE moves SET state = ?, lease_until = NULL, error = NULL WHERE id = ?",
+                ((DONE, move_id) for move_id in ids)
+            )
+
+    def fail(self, move_id, error):
+        """Record a failed attempt; the move is retried until max_attempts is reached."""
+        with self._transaction():
+            self.conn.execute(
+                "UPDATE moves SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "lease_until = NULL, error = ? WHERE id = ?",
+                (self.max_attempts, FAILED, PENDING, str(error), move_id)
+            )
+
+    def stats(self):
+        """Return the number of moves in each state."""
+        counts = {PENDING: 0, CLAIMED: 0, DONE: 0, FAILED: 0}
+        for state, count in self.conn.execute("SELECT state, COUNT(*) FROM moves GROUP BY state"):
+            counts[state] = count
+        return counts
+
+    def failures(self):
+        """Return moves that failed permanently."""
+        rows = self.conn.execute("SELECT source, target, error FROM moves WHERE state = ?", (FAILED,))
+        return [{'source': row[0], 'target': row[1], 'error': row[2]} for row in rows]
+
+
+def default_worker_id():
+    """Worker identifier unique across hosts and processes."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _queue_worker(queue_path, batch_size, lease_seconds):
+    """
+    Process entry point: drain the queue with a fresh FolderManager
+
+    No undo history is recorded, since the manager is gone once the
+    process exits, and only counts and a sample of failed paths are sent
+    back to the parent.
+    """
+    from .folder_manager import FolderManager
+
+    move_queue = MoveQueue(queue_path)
+    try:
+        results = FolderManager().process_queue(move_queue, batch_size=batch_size, lease_seconds=lease_seconds,
+                                                record_history=False)
+    finally:
+        move_queue.close()
+    return {'moved': results['moved'], 'failed': results['failed'], 'error': results['error']}
+
+
+def run_queue_workers(queue_path, workers=4, batch_size=100, lease_seconds=300):
+    """
+    Drain a move queue with several worker processes
+
+    Additional hosts mounting the same share can call FolderManager.process_queue
+    on the same queue file at the same time.
+
+    Args:
+        queue_path (str): Path of the SQLite queue file
+        workers (int): Number of worker processes
+        batch_size (int): Moves claimed per batch
+        lease_seconds (float): Lease duration of a claimed batch
+
+    Returns:
+        dict: Number of moves in each state after all workers finished
+    """
+    with multiprocessing.Pool(workers) as pool:
+        pool.starmap(_queue_worker, [(queue_path, batch_size, lease_seconds)] * workers)
+
+    move_queue = MoveQueue(queue_path)
+    try:
+        stats = move_queue.stats()
+    finally:
+        move_queue.close()
+    logging.info(f"Queue {queue_path} finished: {stats}")
+    return stats
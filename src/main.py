@@ -7,15 +7,15 @@ if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
 try:
-    from src.core.ai_classifier import AIClassifier
-    from src.core.file_analyzer import FileAnalyzer
-    from src.core.folder_manager import FolderManager
+    from src.core.engine import get_engine
+    from src.core.logging_config import configure_logging
+    from src.core.progress import CancellationToken, OperationCancelled
 except ImportError:
     # If direct import fails, try relative import
     try:
-        from core.ai_classifier import AIClassifier
-        from core.file_analyzer import FileAnalyzer
-        from core.folder_manager import FolderManager
+        from core.engine import get_engine
+        from core.logging_config import configure_logging
+        from core.progress import CancellationToken, OperationCancelled
     except ImportError as e:
         print(f"Error importing core modules: {e}")
         print("Please make sure all required modules are installed.")
@@ -47,42 +47,32 @@ class WorkerThread(QThread):
     progress = pyqtSignal(int)
     finished = pyqtSignal(dict)
     error = pyqtSignal(str)
+    cancelled = pyqtSignal()
     
-    def __init__(self, folder_path):
+    def __init__(self, folder_path, engine):
         super().__init__()
         self.folder_path = folder_path
+        self.engine = engine
+        self.cancel_token = CancellationToken()
+        
+    def cancel(self):
+        """Ask the worker to stop after the file it is currently processing."""
+        self.cancel_token.cancel()
         
     def run(self):
         try:
-            # Initialize components
-            analyzer = FileAnalyzer()
-            classifier = AIClassifier()
-            manager = FolderManager()
-            
-            # Analyze files
-            self.progress.emit(20)
-            files_info = analyzer.scan_directory(self.folder_path)
-            
-            # Classify files
-            self.progress.emit(40)
-            categorized_files = {}
-            for file_info in files_info:
-                category = classifier.classify_file(file_info)
-                if category not in categorized_files:
-                    categorized_files[category] = []
-                categorized_files[category].append(file_info)
-                
-            # Organize files
-            self.progress.emit(60)
-            results = manager.organize_files(self.folder_path, categorized_files)
-            
-            # Clean up empty folders
-            self.progress.emit(80)
-            manager.cleanup_empty_folders(self.folder_path)
-            
-            self.progress.emit(100)
+            # Scan, classify, organize and clean up with the shared, already warm engine
+            results = self.engine.organize(
+                self.folder_path,
+                progress_callback=self.progress.emit,
+                cancel_token=self.cancel_token
+            )
             self.finished.emit(results)
             
+        except OperationCancelled:
+            self.cancelled.emit()
+            logging.info("Worker thread cancelled")
+            
         except Exception as e:
             self.error.emit(str(e))
             logging.error(f"Error in worker thread: {e}")
@@ -96,22 +86,7 @@ class MainWindow(QMainWindow):
         
     def setup_logging(self):
         """Setup logging configuration."""
-        try:
-            if not os.path.exists('logs'):
-                os.makedirs('logs')
-                
-            logging.basicConfig(
-                filename=os.path.join('logs', 'main.log'),
-                level=logging.INFO,
-                format='%(asctime)s - %(levelname)s - %(message)s'
-            )
-        except Exception as e:
-            # Fall back to console logging if file logging fails
-            logging.basicConfig(
-                level=logging.INFO,
-                format='%(asctime)s - %(levelname)s - %(message)s'
-            )
-            logging.error(f"Error setting up file logging: {e}")
+        configure_logging()
         
     def load_settings(self):
         """Load application settings."""
@@ -196,6 +171,11 @@ class MainWindow(QMainWindow):
         self.start_button.setEnabled(False)
         folder_layout.addWidget(self.start_button)
         
+        self.cancel_button = QPushButton('⏹ İptal')
+        self.cancel_button.clicked.connect(self.cancel_processing)
+        self.cancel_button.setEnabled(False)
+        folder_layout.addWidget(self.cancel_button)
+        
         layout.addLayout(folder_layout)
         
         # Create file tree view
@@ -237,11 +217,13 @@ class MainWindow(QMainWindow):
             self.progress_bar.setValue(0)
             
             # Create and start worker thread
-            self.worker = WorkerThread(self.folder_path)
+            self.worker = WorkerThread(self.folder_path, get_engine())
             self.worker.progress.connect(self.update_progress)
             self.worker.finished.connect(self.process_completed)
             self.worker.error.connect(self.process_error)
+            self.worker.cancelled.connect(self.process_cancelled)
             self.worker.start()
+            self.cancel_button.setEnabled(True)
             
             self.status_bar.showMessage('İşlem devam ediyor...')
             logging.info("Started processing files")
@@ -249,6 +231,21 @@ class MainWindow(QMainWindow):
         except Exception as e:
             self.process_error(str(e))
             
+    def cancel_processing(self):
+        """Request cancellation of the running worker."""
+        if getattr(self, 'worker', None) is not None:
+            self.worker.cancel()
+            self.cancel_button.setEnabled(False)
+            self.status_bar.showMessage('İptal ediliyor...')
+            
+    def process_cancelled(self):
+        """Handle worker cancellation."""
+        self.folder_button.setEnabled(True)
+        self.start_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        self.progress_bar.setVisible(False)
+        self.status_bar.showMessage('İşlem iptal edildi')
+        
     def update_progress(self, value):
         """Update progress bar value."""
         self.progress_bar.setValue(value)
@@ -258,6 +255,7 @@ class MainWindow(QMainWindow):
         # Re-enable buttons
         self.folder_button.setEnabled(True)
         self.start_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
         
         # Hide progress bar
         self.progress_bar.setVisible(False)
@@ -267,6 +265,8 @@ class MainWindow(QMainWindow):
         error_count = len(results.get('error', []))
         
         message = f'İşlem tamamlandı. {success_count} dosya başarıyla taşındı.'
+        if results.get('cancelled'):
+            message = f'İşlem iptal edildi. {success_count} dosya taşındı.'
         if error_count > 0:
             message += f' {error_count} dosyada hata oluştu.'
             
@@ -283,6 +283,7 @@ class MainWindow(QMainWindow):
         # Re-enable buttons
         self.folder_button.setEnabled(True)
         self.start_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
         
         # Hide progress bar
         self.progress_bar.setVisible(False)
@@ -1,31 +1,70 @@
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QFileDialog, QProgressBar,
-    QTreeWidget, QTreeWidgetItem, QMessageBox, QTabWidget,
+    QTreeView, QMessageBox, QTabWidget,
     QComboBox, QCheckBox, QSpinBox, QGroupBox, QStyleFactory
 )
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSize
 from PyQt5.QtGui import QIcon, QFont, QPalette, QColor
 from typing import Dict, List
 import os
+import time
+
+from ..core.progress import CancellationToken, OperationCancelled
+from .results_model import ScanResultsModel
 
 class ScanWorker(QThread):
     finished = pyqtSignal(dict)
     progress = pyqtSignal(int)
+    batch_ready = pyqtSignal(list)
+    cancelled = pyqtSignal()
+    
+    # Minimum seconds between two result batches sent to the GUI thread
+    batch_interval = 0.25
     
     def __init__(self, file_analyzer, ai_classifier, path):
         super().__init__()
         self.file_analyzer = file_analyzer
         self.ai_classifier = ai_classifier
         self.path = path
+        self.cancel_token = CancellationToken()
         
-    def run(self):
-        # Scan files
-        files_info = self.file_analyzer.scan_directory(self.path)
-        self.progress.emit(50)
+    def cancel(self):
+        self.cancel_token.cancel()
         
-        # Classify files
-        categorized = self.ai_classifier.batch_classify(files_info)
+    def report_progress(self, done, total):
+        # An unknown total (estimator disabled) keeps the bar at 0 until the scan ends
+        self.progress.emit(int(done * 100 / total) if total else 0)
+        
+    def run(self):
+        categorized = {}
+        batch = []
+        last_emit = time.monotonic()
+        
+        # Scan and classify files, streaming results to the view in batches
+        try:
+            for file_info in self.file_analyzer.iter_directory(
+                self.path,
+                progress_callback=self.report_progress,
+                cancel_token=self.cancel_token
+            ):
+                category = self.ai_classifier.classify_file(file_info)
+                categorized.setdefault(category, []).append(file_info)
+                batch.append((category, file_info))
+                
+                now = time.monotonic()
+                if now - last_emit >= self.batch_interval:
+                    self.batch_ready.emit(batch)
+                    batch = []
+                    last_emit = now
+        except OperationCancelled:
+            self.cancelled.emit()
+            return
+        finally:
+            self.ai_classifier.classification_log.flush()
+                
+        if batch:
+            self.batch_ready.emit(batch)
         self.progress.emit(100)
         
         self.finished.emit(categorized)
@@ -60,6 +99,11 @@ class MainWindow(QMainWindow):
         self.start_btn.setEnabled(False)
         top_layout.addWidget(self.start_btn)
         
+        self.cancel_btn = QPushButton("⏹ İptal")
+        self.cancel_btn.clicked.connect(self.cancel_scan)
+        self.cancel_btn.setEnabled(False)
+        top_layout.addWidget(self.cancel_btn)
+        
         layout.addLayout(top_layout)
         
         # Create progress bar
@@ -67,9 +111,15 @@ class MainWindow(QMainWindow):
         self.progress_bar.setVisible(False)
         layout.addWidget(self.progress_bar)
         
-        # Create tree widget for results
-        self.tree = QTreeWidget()
-        self.tree.setHeaderLabels(["Dosya", "Kategori", "Boyut"])
+        # Create tree view for results, backed by a lazily populated model
+        category_names = {
+            category: info.get('name', category)
+            for category, info in self.ai_classifier.category_mappings.items()
+        }
+        self.results_model = ScanResultsModel(category_names)
+        self.tree = QTreeView()
+        self.tree.setUniformRowHeights(True)
+        self.tree.setModel(self.results_model)
         layout.addWidget(self.tree)
         
         # Create bottom buttons
@@ -102,7 +152,8 @@ class MainWindow(QMainWindow):
             return
             
         # Clear previous results
-        self.tree.clear()
+        self.results_model.clear()
+        self.categorized_files = None
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
         
@@ -113,8 +164,20 @@ class MainWindow(QMainWindow):
         # Start scan in background
         self.scan_worker = ScanWorker(self.file_analyzer, self.ai_classifier, self.selected_path)
         self.scan_worker.progress.connect(self.update_progress)
+        self.scan_worker.batch_ready.connect(self.results_model.append_results)
         self.scan_worker.finished.connect(self.scan_finished)
+        self.scan_worker.cancelled.connect(self.scan_cancelled)
         self.scan_worker.start()
+        self.cancel_btn.setEnabled(True)
+        
+    def cancel_scan(self):
+        self.scan_worker.cancel()
+        self.cancel_btn.setEnabled(False)
+        
+    def scan_cancelled(self):
+        self.progress_bar.setVisible(False)
+        self.start_btn.setEnabled(True)
+        self.select_folder_btn.setEnabled(True)
         
     def update_progress(self, value):
         self.progress_bar.setValue(value)
@@ -122,22 +185,7 @@ class MainWindow(QMainWindow):
     def scan_finished(self, categorized_files):
         self.categorized_files = categorized_files
         self.progress_bar.setVisible(False)
-        
-        # Populate tree with results
-        for category, files in categorized_files.items():
-            if not files:
-                continue
-                
-            category_item = QTreeWidgetItem(self.tree)
-            category_item.setText(0, self.folder_manager.category_folders[category])
-            
-            for file_info in files:
-                file_item = QTreeWidgetItem(category_item)
-                file_item.setText(0, file_info['name'])
-                file_item.setText(1, category)
-                file_item.setText(2, f"{file_info['size'] / 1024:.1f} KB")
-                
-        self.tree.expandAll()
+        self.cancel_btn.setEnabled(False)
         
         # Enable buttons
         self.start_btn.setEnabled(True)
@@ -157,30 +205,33 @@ class MainWindow(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
-            # Create folder structure
-            created_folders = self.folder_manager.create_folder_structure(
+            # Move files; target folders are created in one batch first
+            results = self.folder_manager.organize_files(
                 self.selected_path,
                 self.categorized_files
             )
-            
-            # Move files
-            moved_files = self.folder_manager.move_files(
-                self.categorized_files,
-                created_folders
-            )
+            self.folder_manager.cleanup_empty_folders(self.selected_path, results['source_dirs'])
             
             # Show success message
             QMessageBox.information(
                 self,
                 "Başarılı",
-                f"{len(moved_files)} dosya başarıyla düzenlendi."
+                f"{results['moved']} dosya başarıyla düzenlendi."
             )
             
             # Enable undo button
             self.undo_btn.setEnabled(True)
             
     def undo_last(self):
-        if self.folder_manager.undo_last_operation():
+        results = self.folder_manager.undo_last_operation()
+        if results and results['error']:
+            failures = ", ".join(f"{reason}: {count}" for reason, count in results['failures'].items())
+            QMessageBox.warning(
+                self,
+                "Kısmen Geri Alındı",
+                f"{results['moved']} dosya geri alındı, {results['failed']} dosya geri alınamadı ({failures})."
+            )
+        elif results:
             QMessageBox.information(
                 self,
                 "Başarılı",
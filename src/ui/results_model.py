@@ -0,0 +1,125 @@
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex
+from typing import Dict, List, Tuple
+
+# Number of file rows materialized per fetchMore call
+FETCH_CHUNK = 500
+
+HEADERS = ["Dosya", "Kategori", "Boyut"]
+
+
+class ScanResultsModel(QAbstractItemModel):
+    """
+    Two-level item model (category -> files) backed directly by scan results.
+
+    File rows are not created up front: each category reports only the rows
+    loaded so far and the view pulls more through canFetchMore/fetchMore as
+    the user expands or scrolls. Results can be appended in batches while the
+    scan is still running.
+    """
+
+    def __init__(self, category_names=None, parent=None):
+        super().__init__(parent)
+        self.category_names = category_names or {}
+        self.categories: List[str] = []
+        self.files: Dict[str, List[dict]] = {}
+        self.loaded: Dict[str, int] = {}
+
+    def clear(self):
+        self.beginResetModel()
+        self.categories = []
+        self.files = {}
+        self.loaded = {}
+        self.endResetModel()
+
+    def append_results(self, batch: List[Tuple[str, dict]]):
+        """Add a batch of (category, file_info) pairs produced by the scan."""
+        changed = set()
+        for category, file_info in batch:
+            if category not in self.files:
+                row = len(self.categories)
+                self.beginInsertRows(QModelIndex(), row, row)
+                self.categories.append(category)
+                self.files[category] = []
+                self.loaded[category] = 0
+                self.endInsertRows()
+            self.files[category].append(file_info)
+            changed.add(category)
+
+        # Only the category rows change visibly; new file rows are fetched lazily
+        for category in changed:
+            row = self.categories.index(category)
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(HEADERS) - 1))
+
+    def categorized_files(self) -> Dict[str, List[dict]]:
+        return self.files
+
+    # QAbstractItemModel interface
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, 0)
+        # File rows store their category row (+1) as internal id
+        return self.createIndex(row, column, parent.row() + 1)
+
+    def parent(self, index):
+        if not index.isValid() or index.internalId() == 0:
+            return QModelIndex()
+        return self.createIndex(index.internalId() - 1, 0, 0)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.categories)
+        if parent.internalId() == 0:
+            return self.loaded[self.categories[parent.row()]]
+        return 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(HEADERS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self.categories)
+        return parent.internalId() == 0 and bool(self.files[self.categories[parent.row()]])
+
+    def canFetchMore(self, parent):
+        if not parent.isValid() or parent.internalId() != 0:
+            return False
+        category = self.categories[parent.row()]
+        return self.loaded[category] < len(self.files[category])
+
+    def fetchMore(self, parent):
+        category = self.categories[parent.row()]
+        start = self.loaded[category]
+        end = min(start + FETCH_CHUNK, len(self.files[category]))
+        if end <= start:
+            return
+        self.beginInsertRows(parent, start, end - 1)
+        self.loaded[category] = end
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+
+        if index.internalId() == 0:
+            category = self.categories[index.row()]
+            if index.column() == 0:
+                name = self.category_names.get(category, category)
+                return f"{name} ({len(self.files[category])})"
+            return None
+
+        category = self.categories[index.internalId() - 1]
+        file_info = self.files[category][index.row()]
+        column = index.column()
+        if column == 0:
+            return file_info['name']
+        if column == 1:
+            return category
+        return f"{file_info['size'] / 1024:.1f} KB"
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return HEADERS[section]
+        return None
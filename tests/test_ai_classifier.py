@@ -132,4 +132,40 @@ def test_update_category_mappings(classifier, tmp_path):
     assert 'test' in classifier.category_mappings
     assert '.test' in classifier.category_mappings['test']['extensions']
     assert 'application/test' in classifier.category_mappings['test']['mime_types']
-    assert 'test' in classifier.category_mappings['test']['keywords'] 
\ No newline at end of file
+    assert 'test' in classifier.category_mappings['test']['keywords'] 
+
+def test_classification_cache_hits(classifier):
+    files_info = [
+        {'name': f'photo_{i}.jpg', 'extension': '.jpg', 'mime_type': 'image/jpeg'}
+        for i in range(10)
+    ]
+    
+    for file_info in files_info:
+        assert classifier.classify_file(file_info) == 'media'
+    
+    info = classifier.cache_info()
+    assert info['misses'] == 1
+    assert info['hits'] == 9
+
+def test_classification_cache_name_signature(classifier):
+    first = {'name': 'rapor_2023.dat', 'extension': '.dat', 'mime_type': 'application/dat'}
+    second = {'name': 'rapor_2024.dat', 'extension': '.dat', 'mime_type': 'application/dat'}
+    
+    assert classifier.classify_file(first) == 'document'
+    hits = classifier.cache_info()['hits']
+    assert classifier.classify_file(second) == 'document'
+    
+    # Type lookup and name lookup both hit
+    assert classifier.cache_info()['hits'] == hits + 2
+
+def test_classification_cache_invalidated_on_update(classifier, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    file_info = {'name': 'model.stl', 'extension': '.stl', 'mime_type': 'model/stl'}
+    
+    assert classifier.classify_file(file_info) == 'other'
+    
+    classifier.update_category_mappings({
+        'model3d': {'name': '3D', 'extensions': ['.stl'], 'mime_types': ['model/']}
+    })
+    
+    assert classifier.classify_file(file_info) == 'model3d'
@@ -0,0 +1,74 @@
+import io
+import tarfile
+import zipfile
+
+from src.core.ai_classifier import AIClassifier
+from src.core.archive_inspector import ArchiveInspector, dominant_category
+
+def make_zip(path, names):
+    with zipfile.ZipFile(path, 'w') as archive:
+        for name in names:
+            archive.writestr(name, b'x' * 10)
+    return str(path)
+
+def make_tar(path, names):
+    with tarfile.open(path, 'w', format=tarfile.GNU_FORMAT) as archive:
+        for name in names:
+            info = tarfile.TarInfo(name)
+            info.size = 700
+            archive.addfile(info, io.BytesIO(b'x' * 700))
+    return str(path)
+
+def test_inspect_zip(tmp_path):
+    path = make_zip(tmp_path / 'photos.zip', ['a.JPG', 'b.jpg', 'trip/c.png', 'trip/', 'readme'])
+    
+    summary = ArchiveInspector().inspect(path)
+    
+    assert summary['format'] == 'zip'
+    assert summary['members'] == 4
+    assert summary['extensions'] == {'.jpg': 2, '.png': 1, '': 1}
+    assert summary['sizes']['.jpg'] == 20
+    assert not summary['truncated']
+
+def test_inspect_tar_with_long_names(tmp_path):
+    long_name = 'deep/' * 30 + 'song.mp3'
+    path = make_tar(tmp_path / 'music.tar', ['a.mp3', long_name, 'cover.jpg'])
+    
+    summary = ArchiveInspector().inspect(path)
+    
+    assert summary['format'] == 'tar'
+    assert summary['extensions'] == {'.mp3': 2, '.jpg': 1}
+    assert summary['sizes']['.mp3'] == 1400
+
+def test_inspect_is_bounded(tmp_path):
+    names = [f'{i}.txt' for i in range(50)]
+    inspector = ArchiveInspector(max_members=10)
+    
+    for summary in (inspector.inspect(make_zip(tmp_path / 'many.zip', names)),
+                    inspector.inspect(make_tar(tmp_path / 'many.tar', names))):
+        assert summary['members'] == 10
+        assert summary['truncated']
+
+def test_inspect_rejects_other_files(tmp_path):
+    path = tmp_path / 'fake.zip'
+    path.write_bytes(b'not an archive' * 100)
+    
+    assert ArchiveInspector().inspect(str(path)) is None
+
+def test_dominant_category():
+    summary = {'members': 10, 'extensions': {'.jpg': 7, '.txt': 3}}
+    categories = {'.jpg': 'media', '.txt': 'document'}
+    
+    assert dominant_category(summary, categories.get) == 'media'
+    assert dominant_category(summary, categories.get, min_share=0.8) is None
+
+def test_classifier_routes_archive_by_content(tmp_path):
+    classifier = AIClassifier()
+    photos = make_zip(tmp_path / 'photos.zip', ['a.jpg', 'b.png', 'c.jpg'])
+    mixed = make_zip(tmp_path / 'mixed.zip', ['a.jpg', 'b.pdf', 'c.py'])
+    
+    def info(path):
+        return {'name': path, 'path': path, 'extension': '.zip', 'mime_type': 'application/zip'}
+    
+    assert classifier.classify_file(info(photos)) == 'media'
+    assert classifier.classify_file(info(mixed)) == 'archive'
@@ -0,0 +1,45 @@
+from src.core.ai_classifier import AIClassifier
+from src.core.content_analyzers import ContentAnalyzerRegistry
+from src.core.file_analyzer import FileAnalyzer
+
+def test_scan_reads_no_content(tmp_path):
+    for name in ('photo.jpg', 'script.py', 'report.pdf', 'notes.txt'):
+        (tmp_path / name).write_text('some content words ' * 50)
+    analyzer = FileAnalyzer()
+    classifier = AIClassifier(content_analyzers=analyzer.content_analyzers)
+    
+    files_info = analyzer.scan_directory(str(tmp_path))
+    classifier.batch_classify(files_info)
+    
+    assert len(files_info) == 4
+    assert all('keywords' not in file_info for file_info in files_info)
+    assert analyzer.content_analyzers.bytes_read == 0
+
+def test_content_decides_only_inconclusive_files(tmp_path):
+    (tmp_path / 'README').write_text('Bu belge projenin kaynak kodunu açıklar')
+    (tmp_path / 'blob').write_bytes(b'\x00\x01kaynak' * 10)
+    analyzer = FileAnalyzer()
+    classifier = AIClassifier(content_analyzers=analyzer.content_analyzers)
+    
+    readme, blob = sorted(analyzer.scan_directory(str(tmp_path)), key=lambda info: info['name'])
+    
+    assert classifier.classify_file(readme) == 'document'
+    assert readme['keywords']
+    assert classifier.classify_file(blob) == 'other'
+    assert blob['keywords'] == []
+
+def test_registry_lookup_and_custom_analyzers(tmp_path):
+    path = tmp_path / 'scan.tiff'
+    path.write_bytes(b'II*\x00')
+    registry = ContentAnalyzerRegistry(max_size=100)
+    calls = []
+    registry.register('image/', lambda f, max_bytes: calls.append(f.read(max_bytes)) or ['fatura'])
+    info = {'path': str(path), 'mime_type': 'image/tiff', 'size': 4}
+    
+    assert registry.analyzer_for('text/x-python') is registry.analyzers['text/']
+    assert registry.analyzer_for('video/mp4') is None
+    assert registry.keywords(info) == ['fatura']
+    assert registry.keywords(info) == ['fatura']
+    assert calls == [b'II*\x00']
+    assert registry.bytes_read == 4
+    assert registry.keywords({'path': str(path), 'mime_type': 'image/tiff', 'size': 1000}) == []
@@ -0,0 +1,133 @@
+import threading
+import time
+import pytest
+from src.core.deadlines import DeadlinePool, OperationTimeout, Quarantine, StillRunning
+from src.core.file_analyzer import FileAnalyzer
+from src.core.filesystem import MemoryFileSystem
+from src.core.folder_manager import FolderManager
+from src.core.settings import load_settings
+
+class StallingFileSystem(MemoryFileSystem):
+    """Memory filesystem where moving one path blocks until released."""
+    
+    def __init__(self, stall_path):
+        super().__init__()
+        self.stall_path = stall_path
+        self.release = threading.Event()
+        self.release_after = None
+        
+    def move(self, source, target):
+        if source == self.stall_path:
+            self.release.wait()
+        super().move(source, target)
+        if source == self.release_after:
+            self.release.set()
+
+class MountedFileSystem(MemoryFileSystem):
+    """Memory filesystem with a second device mounted at /data/share."""
+    
+    def stat(self, path, follow_symlinks=True):
+        result = super().stat(path, follow_symlinks)
+        if path.startswith('/data/share'):
+            result = result._replace(st_dev=2)
+        return result
+
+def test_stalled_call_times_out_without_blocking_pool():
+    pool = DeadlinePool(timeout=0.05, workers=1)
+    release = threading.Event()
+    
+    with pytest.raises(OperationTimeout):
+        pool.run(release.wait)
+    
+    # The stalled worker was replaced
+    assert pool.run(lambda: 42) == 42
+    assert pool.timeouts == 1
+    release.set()
+
+def test_quarantine_waits_for_started_call_again():
+    pool = DeadlinePool(timeout=0.05, workers=2)
+    quarantine = Quarantine(pool)
+    release = threading.Event()
+    calls = []
+    
+    def slow():
+        calls.append(1)
+        release.wait()
+        return 'done'
+    
+    with pytest.raises(OperationTimeout):
+        quarantine.call('slow', slow)
+    threading.Timer(0.02, release.set).start()
+    
+    assert list(quarantine.retry(timeout=1)) == [('slow', 'done', None)]
+    assert calls == [1]
+
+def test_organize_continues_past_stalled_move():
+    fs = StallingFileSystem('/data/stuck.jpg')
+    files = []
+    for name in ('a.jpg', 'stuck.jpg', 'b.jpg'):
+        fs.add_file(f"/data/{name}")
+        files.append({'path': f"/data/{name}"})
+    # The stuck move completes once the last file has been moved
+    fs.release_after = '/data/b.jpg'
+    pool = DeadlinePool(timeout=0.1)
+    manager = FolderManager(fs, deadline_pool=pool)
+    
+    results = manager.organize_files('/data', {'image': files})
+    
+    # b.jpg could only move while the stuck move was still blocked
+    assert results['success'] == ['/data/a.jpg', '/data/b.jpg', '/data/stuck.jpg']
+    assert fs.isdir('/data/image') and len(fs.scandir('/data/image')) == 3
+    assert pool.timeouts == 1
+
+def test_gives_up_after_second_deadline():
+    fs = StallingFileSystem('/data/stuck.jpg')
+    fs.add_file('/data/stuck.jpg')
+    manager = FolderManager(fs, deadline_pool=DeadlinePool(timeout=0.05))
+    
+    results = manager.organize_files('/data', {'image': [{'path': '/data/stuck.jpg'}]})
+    
+    # Still running, so neither moved nor failed yet
+    assert results['success'] == [] and results['error'] == []
+    assert results['in_flight'] == ['/data/stuck.jpg']
+    
+    fs.release.set()
+    for _ in range(500):
+        if not results['in_flight']:
+            break
+        time.sleep(0.01)
+        
+    assert results['success'] == ['/data/stuck.jpg']
+    assert manager.history == [[{'source': '/data/stuck.jpg', 'target': '/data/image/stuck.jpg'}]]
+
+def test_move_that_never_started_is_cancelled_after_second_deadline():
+    pool = DeadlinePool(timeout=0.05, workers=1, max_stalled=0)
+    quarantine = Quarantine(pool)
+    release = threading.Event()
+    
+    # Occupies the only worker, so the second call never starts
+    pool.submit(release.wait)
+    with pytest.raises(OperationTimeout):
+        quarantine.call('queued', lambda: 'late')
+    
+    [(key, result, error)] = list(quarantine.retry())
+    release.set()
+    
+    assert key == 'queued' and result is None
+    assert isinstance(error, OperationTimeout) and not isinstance(error, StillRunning)
+    assert quarantine.failed == ['queued']
+
+def test_deadlines_apply_to_network_mount_below_local_root():
+    fs = MountedFileSystem()
+    fs.add_file('/data/local.txt')
+    fs.add_file('/data/share/remote.txt')
+    analyzer = FileAnalyzer(load_settings(), fs)
+    analyzer.deadline_pool._kinds.update({1: 'ssd', 2: 'network'})
+    submitted = []
+    submit = analyzer.deadline_pool.submit
+    analyzer.deadline_pool.submit = lambda fn, entry: submitted.append(entry.path) or submit(fn, entry)
+    
+    files = analyzer.scan_directory('/data')
+    
+    assert sorted(file_info['name'] for file_info in files) == ['local.txt', 'remote.txt']
+    assert submitted == ['/data/share/remote.txt']
@@ -0,0 +1,53 @@
+import os
+import pytest
+from src.core.device_scheduler import DeviceScheduler, device_kind, group_roots_by_device
+from src.core.file_analyzer import FileAnalyzer
+from src.core.progress import CancellationToken, OperationCancelled
+from src.core.settings import load_settings
+
+@pytest.fixture
+def roots(tmp_path):
+    paths = []
+    for root_name in ('disk_a', 'disk_b'):
+        root = tmp_path / root_name
+        for sub in range(3):
+            folder = root / f"folder{sub}"
+            folder.mkdir(parents=True)
+            for index in range(5):
+                (folder / f"file{index}.txt").write_text("x")
+        paths.append(str(root))
+    return paths
+
+def test_group_roots_drops_nested(roots):
+    nested = os.path.join(roots[0], 'folder1')
+    
+    groups = group_roots_by_device(roots + [nested])
+    
+    assert sorted(root for device_roots in groups.values() for root in device_roots) == sorted(roots)
+
+def test_device_kind_is_known_value(roots):
+    assert device_kind(os.stat(roots[0]).st_dev) in ('hdd', 'ssd', 'network', 'unknown')
+
+def test_scan_roots_finds_every_file(roots):
+    settings = load_settings()
+    settings['processing']['device_concurrency'] = {'hdd': 3, 'ssd': 3, 'network': 3, 'unknown': 3}
+    analyzer = FileAnalyzer(settings)
+    
+    files = analyzer.scan_roots(roots)
+    
+    assert len(files) == 30
+    assert len({file_info['path'] for file_info in files}) == 30
+
+def test_scan_roots_cancellation(roots):
+    token = CancellationToken()
+    token.cancel()
+    
+    with pytest.raises(OperationCancelled):
+        FileAnalyzer().scan_roots(roots, cancel_token=token)
+
+def test_scan_roots_accepts_relative_and_trailing_slash_roots(roots, monkeypatch):
+    monkeypatch.chdir(os.path.dirname(roots[0]))
+    
+    files = FileAnalyzer().scan_roots(['disk_a', roots[1] + os.sep])
+    
+    assert len(files) == 30
@@ -0,0 +1,66 @@
+import os
+from src.core.directory_index import DirectoryIndex
+from src.core.file_analyzer import FileAnalyzer
+from src.core.settings import load_settings
+
+PAST = 1_600_000_000
+
+def make_tree(root):
+    for folder in ('a', 'b', 'b/c'):
+        os.makedirs(root / folder, exist_ok=True)
+        for index in range(3):
+            (root / folder / f"file{index}.txt").write_text("x" * index)
+    age(root)
+
+def age(root):
+    # Directories modified just now are never trusted, so date them back
+    for path, _, _ in os.walk(root):
+        os.utime(path, (PAST, PAST))
+
+def make_analyzer(tmp_path):
+    settings = load_settings()
+    settings['scan_options']['detect_projects'] = False
+    settings['scan_options']['directory_index'] = str(tmp_path / 'index.pickle')
+    return FileAnalyzer(settings)
+
+def test_rescan_skips_unchanged_directories(tmp_path):
+    root = tmp_path / 'data'
+    make_tree(root)
+    first = make_analyzer(tmp_path).scan_directory(str(root))
+
+    analyzer = make_analyzer(tmp_path)
+    second = analyzer.scan_directory(str(root))
+
+    assert sorted(info['path'] for info in second) == sorted(info['path'] for info in first)
+    assert analyzer.directory_index.listed == 0
+    assert analyzer.directory_index.reused == 4
+
+def test_rescan_lists_only_changed_directories(tmp_path):
+    root = tmp_path / 'data'
+    make_tree(root)
+    make_analyzer(tmp_path).scan_directory(str(root))
+    (root / 'b' / 'c' / 'new.txt').write_text("new")
+    (root / 'a' / 'file0.txt').unlink()
+    for folder in ('a', 'b/c'):
+        os.utime(root / folder, (PAST + 10, PAST + 10))
+
+    analyzer = make_analyzer(tmp_path)
+    names = sorted(os.path.relpath(info['path'], root) for info in analyzer.scan_directory(str(root)))
+
+    assert os.path.join('b', 'c', 'new.txt') in names
+    assert os.path.join('a', 'file0.txt') not in names
+    assert len(names) == 9
+    assert analyzer.directory_index.listed == 2
+
+def test_recently_modified_directories_are_listed_again(tmp_path):
+    root = tmp_path / 'data'
+    make_tree(root)
+    # Touched within the racy window, so its mtime cannot be trusted yet
+    os.utime(root / 'b' / 'c')
+    index = DirectoryIndex(str(tmp_path / 'index.pickle'))
+    analyzer = make_analyzer(tmp_path)
+    list(index.walk(str(root), analyzer.scan_filter, analyzer.analyze_entry))
+
+    list(index.walk(str(root), analyzer.scan_filter, analyzer.analyze_entry))
+
+    assert index.listed == 5 and index.reused == 3
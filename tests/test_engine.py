@@ -0,0 +1,93 @@
+import os
+import threading
+import pytest
+
+from src.core.engine import Engine, get_engine
+from src.core.settings import load_settings
+
+@pytest.fixture(scope='module')
+def engine():
+    return Engine(load_settings())
+
+def make_tree(base, *names):
+    for name in names:
+        path = base / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(name)
+
+def test_repeat_runs_reuse_warm_components(tmp_path, engine):
+    classifier = engine.classifier
+    make_tree(tmp_path / 'one', 'a.jpg', 'b.jpg')
+    make_tree(tmp_path / 'two', 'c.jpg', 'd.jpg')
+    
+    engine.organize(str(tmp_path / 'one'))
+    hits = engine.cache_info()['hits']
+    engine.organize(str(tmp_path / 'two'))
+    
+    assert engine.classifier is classifier
+    assert engine.cache_info()['hits'] >= hits + 2
+    assert sorted(os.listdir(tmp_path / 'two' / 'media')) == ['c.jpg', 'd.jpg']
+
+def test_concurrent_runs(tmp_path, engine):
+    roots = [tmp_path / str(i) for i in range(4)]
+    for root in roots:
+        make_tree(root, 'x/report.pdf', 'x/photo.png', 'song.mp3')
+    results = {}
+    
+    threads = [threading.Thread(target=lambda root=root: results.update({root: engine.organize(str(root))}))
+               for root in roots]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+        
+    for root in roots:
+        assert len(results[root]['success']) == 3
+        assert not (root / 'x').exists()
+
+def test_plan_then_apply(tmp_path, engine):
+    make_tree(tmp_path, 'inbox/a.pdf', 'inbox/b.py')
+    
+    moves = engine.plan(str(tmp_path))
+    assert (tmp_path / 'inbox/a.pdf').exists()
+    
+    results = engine.apply(moves, str(tmp_path))
+    
+    assert len(results['success']) == 2
+    assert (tmp_path / 'document/a.pdf').exists()
+    assert not (tmp_path / 'inbox').exists()
+
+def test_iter_classified_streams_records(tmp_path, engine):
+    make_tree(tmp_path, 'inbox/a.pdf', 'inbox/b.py', 'c.jpg')
+    
+    records = sorted((os.path.basename(file_info['path']), category)
+                     for file_info, category in engine.iter_classified(str(tmp_path)))
+    
+    assert records == [('a.pdf', 'document'), ('b.py', 'code'), ('c.jpg', 'media')]
+    assert (tmp_path / 'inbox/a.pdf').exists()
+
+def test_get_engine_is_shared():
+    assert get_engine() is get_engine()
+
+def test_spill_to_disk_keeps_counts_and_undoes_from_journal(tmp_path):
+    settings = load_settings()
+    settings['processing'].update(spill_to_disk=True, spill_dir=str(tmp_path / 'spill'))
+    (tmp_path / 'spill').mkdir()
+    make_tree(tmp_path / 'data', 'inbox/a.jpg', 'inbox/deep/b.pdf', 'c.mp3')
+    engine = Engine(settings)
+    percents = []
+    
+    results = engine.organize(str(tmp_path / 'data'), percents.append)
+    
+    assert (results['moved'], results['failed']) == (3, 0)
+    assert 'success' not in results and 'moves' not in results
+    assert not (tmp_path / 'data/inbox').exists()
+    assert any(0 < percent < 50 for percent in percents)
+    # Only the move journal is left in the spill directory
+    assert os.listdir(tmp_path / 'spill') == [os.path.basename(results['journal'].path)]
+    
+    undo = engine.undo_last()
+    
+    assert (undo['moved'], undo['failed']) == (3, 0)
+    assert (tmp_path / 'data/inbox/deep/b.pdf').exists()
+    assert os.listdir(tmp_path / 'spill') == []
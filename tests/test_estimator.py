@@ -0,0 +1,53 @@
+import random
+from src.core.ai_classifier import AIClassifier
+from src.core.estimator import Interval, ScanEstimator
+from src.core.file_analyzer import FileAnalyzer
+from src.core.filesystem import MemoryFileSystem
+from src.core.settings import load_settings
+
+def make_analyzer(fs):
+    settings = load_settings()
+    settings['scan_options']['detect_projects'] = False
+    return FileAnalyzer(settings, fs)
+
+def test_small_tree_is_counted_exactly():
+    fs = MemoryFileSystem()
+    for i in range(12):
+        fs.add_file(f'/data/folder{i % 3}/photo{i}.jpg', size=1000)
+    fs.add_file('/data/readme.pdf', size=500)
+    analyzer = make_analyzer(fs)
+    
+    estimate = ScanEstimator(analyzer, AIClassifier(content_analyzers=analyzer.content_analyzers)).estimate('/data')
+    
+    assert estimate['exact']
+    assert estimate['files'] == (13, 13, 13)
+    assert estimate['directories'].value == 4
+    assert estimate['bytes'].value == 12500
+    assert estimate['categories']['media'].value == 12
+
+def test_large_tree_interval_contains_truth():
+    fs = MemoryFileSystem()
+    rng = random.Random(7)
+    total = 0
+    for top in range(20):
+        for sub in range(rng.randint(5, 40)):
+            for leaf in range(rng.randint(0, 4)):
+                for i in range(rng.randint(1, 30)):
+                    fs.add_file(f'/data/t{top}/s{sub}/l{leaf}/f{i}.txt', size=100)
+                    total += 1
+    analyzer = make_analyzer(fs)
+    
+    estimate = ScanEstimator(analyzer, exact_dirs=50, seed=1).estimate('/data')
+    
+    assert not estimate['exact']
+    assert estimate['files'].low <= total <= estimate['files'].high
+    assert abs(estimate['files'].value - total) < 0.3 * total
+    # Listing was far from complete
+    assert fs.ops['scandir'] < len(list(fs.walk('/data')))
+
+def test_suggested_workers_follow_directory_count():
+    estimator = ScanEstimator(make_analyzer(MemoryFileSystem()))
+    
+    assert estimator.suggested_workers({'directories': Interval(3, 3, 3)}, 8) == 1
+    assert estimator.suggested_workers({'directories': Interval(200, 150, 250)}, 8) == 3
+    assert estimator.suggested_workers({'directories': Interval(10000, 9000, 11000)}, 8) == 8
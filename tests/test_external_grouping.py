@@ -0,0 +1,66 @@
+import os
+from datetime import datetime
+
+from src.core.external_grouping import DirectorySet, ExternalGrouper, MoveJournal
+from src.core.folder_manager import FolderManager
+
+def record(path, **extra):
+    return dict({'path': path, 'name': os.path.basename(path), 'modified_date': datetime(2024, 1, 1)}, **extra)
+
+def test_spills_and_merges_in_directory_order():
+    categories = ['media', 'document', 'code']
+    with ExternalGrouper(memory_budget_mb=0.001) as grouper:
+        for i in range(300):
+            grouper.add(categories[i % 3], record(f'/src/{299 - i:03d}.bin'))
+        grouper.add('document', record('/src/invoice.pdf', target_folder='Belgeler/Faturalar'))
+        
+        assert len(grouper.runs) > 1
+        merged = list(grouper)
+        run_dir = grouper.run_dir
+        
+    keys = [(category, info.get('target_folder') or category, info['path']) for category, info in merged]
+    assert len(merged) == 301
+    assert keys == sorted(keys)
+    assert merged[0][1]['modified_date'] == datetime(2024, 1, 1)
+    assert not os.path.exists(run_dir)
+
+def test_small_input_stays_in_memory():
+    with ExternalGrouper() as grouper:
+        grouper.add('media', record('/src/b.jpg'))
+        grouper.add('media', record('/src/a.jpg'))
+        
+        assert grouper.runs == []
+        assert [info['name'] for _, info in grouper] == ['a.jpg', 'b.jpg']
+
+def test_organize_stream_from_grouper(tmp_path):
+    for name in ('a.jpg', 'b.pdf', 'c.jpg'):
+        (tmp_path / name).write_text(name)
+        
+    with ExternalGrouper(memory_budget_mb=0.0001) as grouper:
+        grouper.add('media', record(str(tmp_path / 'a.jpg')))
+        grouper.add('document', record(str(tmp_path / 'b.pdf')))
+        grouper.add('media', record(str(tmp_path / 'c.jpg')))
+        results = FolderManager().organize_stream(str(tmp_path), grouper, len(grouper))
+        
+    assert len(results['success']) == 3
+    assert sorted(os.listdir(tmp_path / 'media')) == ['a.jpg', 'c.jpg']
+    assert os.listdir(tmp_path / 'document') == ['b.pdf']
+
+def test_directory_set_yields_each_directory_deepest_first():
+    with DirectorySet(memory_budget_mb=0.0001) as directories:
+        for path in ['/a', '/a/b/c', '/a/b', '/a/b/c', '/z/y', '/a']:
+            directories.add(path)
+            
+        assert len(directories.runs) > 1
+        assert list(directories) == ['/a/b/c', '/a/b', '/z/y', '/a']
+
+def test_move_journal_round_trip(tmp_path):
+    journal = MoveJournal.create(str(tmp_path))
+    for i in range(5):
+        journal.record(f'/src/{i}', f'/dst/{i}')
+        
+    assert len(journal) == 5
+    assert [move['source'] for move in journal] == [f'/src/{i}' for i in range(5)]
+    assert [len(chunk) for chunk in journal.chunks(2)] == [2, 2, 1]
+    journal.remove()
+    assert not os.path.exists(journal.path)
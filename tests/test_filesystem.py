@@ -0,0 +1,134 @@
+import os
+import errno
+import threading
+import pytest
+
+from src.core import filesystem
+from src.core.archive_inspector import ArchiveInspector
+from src.core.deadlines import DeadlinePool
+from src.core.device_scheduler import group_roots_by_device
+from src.core.engine import Engine
+from src.core.filesystem import MemoryFileSystem, OSFileSystem
+from src.core.folder_manager import FolderManager
+from src.core.scan_filter import ScanFilter
+from src.core.settings import load_settings
+
+def test_memory_filesystem_semantics():
+    fs = MemoryFileSystem()
+    fs.add_file('/a/b/file.txt', size=5, mtime=100.0)
+    
+    assert fs.stat('/a/b/file.txt').st_size == 5
+    with pytest.raises(FileExistsError):
+        fs.mkdir('/a/b')
+    with pytest.raises(OSError) as error:
+        fs.rmdir('/a/b')
+    assert error.value.errno == errno.ENOTEMPTY
+    with pytest.raises(FileNotFoundError):
+        fs.stat('/a/missing')
+        
+    fs.mkdir('/a/c')
+    fs.move('/a/b/file.txt', '/a/c')
+    fs.rmdir('/a/b')
+    
+    assert [entry.name for entry in fs.scandir('/a')] == ['c']
+    assert fs.exists('/a/c/file.txt')
+    assert fs.ops == {'stat': 2, 'mkdir': 2, 'rmdir': 2, 'move': 1, 'scandir': 1, 'exists': 1}
+
+def test_organize_operation_counts():
+    fs = MemoryFileSystem()
+    for i in range(4):
+        fs.add_file(f'/data/inbox/photo{i}.jpg')
+        fs.add_file(f'/data/inbox/old/report{i}.pdf')
+    fs.add_file('/data/keep/notes.md')
+    engine = Engine(load_settings(), fs)
+    
+    results = engine.organize('/data')
+    
+    assert len(results['success']) == 9
+    assert fs.ops['move'] == 9
+    # One stat per file plus one per listed directory with files (inbox,
+    # inbox/old, keep) to pick its deadline policy, one exists check per
+    # target name, no per-file directory checks
+    assert fs.ops['stat'] == 12
+    assert fs.ops['exists'] == 9
+    # media, document and other (notes.md needed a content read to decide)
+    assert fs.ops['mkdir'] == 3
+    assert fs.ops['open'] == 1
+    # Cleanup tries each moved-from directory once: inbox/old, inbox, keep
+    assert fs.ops['rmdir'] == 3
+    assert not fs.exists('/data/inbox')
+
+def test_create_directories_counts():
+    fs = MemoryFileSystem()
+    fs.add_dir('/base/Belgeler')
+    manager = FolderManager(fs)
+    
+    manager.create_directories(['/base/Belgeler/Faturalar/2024', '/base/Belgeler/Faturalar', '/base/Medya'], '/base')
+    
+    assert fs.ops == {'mkdir': 4}
+    assert fs.isdir('/base/Belgeler/Faturalar/2024')
+
+def test_bulk_undo_uses_renames():
+    fs = MemoryFileSystem()
+    for i in range(6):
+        fs.add_file(f'/data/sorted/file{i}.txt')
+    manager = FolderManager(fs)
+    moves = [{'source': f'/data/original/{i % 2}/file{i}.txt', 'target': f'/data/sorted/file{i}.txt'}
+             for i in range(6)]
+    
+    results = manager.undo_move(moves, workers=3)
+    
+    assert len(results['success']) == 6
+    assert fs.ops['rename'] == 6 and fs.ops['move'] == 0
+    # One mkdir per folder on the way: /data, /data/original and the two targets
+    assert fs.ops['mkdir'] == 4
+    assert fs.exists('/data/original/1/file5.txt')
+
+@pytest.mark.parametrize('use_renameat2', [True, False])
+def test_rename_noreplace_never_overwrites(tmp_path, monkeypatch, use_renameat2):
+    if not use_renameat2:
+        monkeypatch.setattr(filesystem, '_renameat2', None)
+    fs = OSFileSystem()
+    (tmp_path / 'a.txt').write_text('a')
+    (tmp_path / 'b.txt').write_text('b')
+    (tmp_path / 'dir').mkdir()
+    
+    with pytest.raises(FileExistsError):
+        fs.rename_noreplace(str(tmp_path / 'a.txt'), str(tmp_path / 'b.txt'))
+    fs.rename_noreplace(str(tmp_path / 'a.txt'), str(tmp_path / 'c.txt'))
+    fs.rename_noreplace(str(tmp_path / 'dir'), str(tmp_path / 'moved'))
+    
+    assert (tmp_path / 'b.txt').read_text() == 'b'
+    assert (tmp_path / 'c.txt').read_text() == 'a'
+    assert sorted(os.listdir(tmp_path)) == ['b.txt', 'c.txt', 'moved']
+
+def test_memory_filesystem_serves_every_caller():
+    fs = MemoryFileSystem(kind='ssd')
+    for i in range(3):
+        fs.add_file(f'/data/sub/file{i}.zip', size=10)
+    fs.add_dir('/other')
+    
+    assert len(list(ScanFilter.from_settings({}, fs).walk('/data'))) == 3
+    assert group_roots_by_device(['/data', '/data/sub', '/other'], fs) == {1: ['/data', '/other']}
+    assert not DeadlinePool(fs=fs).enforced_for(1)
+    # Simulated files hold zero bytes, so this is not an archive, but it was opened through fs
+    assert ArchiveInspector(fs=fs).inspect('/data/sub/file0.zip') is None
+    
+    manager = FolderManager(fs)
+    backup = manager.create_backup('/data')
+    fs.remove('/data/sub/file0.zip')
+    assert manager.restore_backup(backup, '/data')
+    
+    assert fs.exists('/data/sub/file0.zip') and fs.exists(backup + '/sub/file0.zip')
+    assert fs.ops['open'] == 1 and fs.ops['copytree'] == 2 and fs.ops['rmtree'] == 1
+
+def test_memory_filesystem_counts_calls_from_all_threads():
+    fs = MemoryFileSystem()
+    fs.add_file('/data/file.txt')
+    threads = [threading.Thread(target=lambda: [fs.stat('/data/file.txt') for _ in range(1000)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert fs.ops == {'stat': 4000}
@@ -0,0 +1,174 @@
+import os
+import pytest
+
+from src.core.external_grouping import MoveJournal
+from src.core.folder_manager import FolderManager
+from src.core.progress import CancellationToken
+
+@pytest.fixture
+def manager():
+    return FolderManager()
+
+def make_tree(base, *files):
+    for name in files:
+        path = base / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(name)
+
+def test_organize_reports_source_dirs(tmp_path, manager):
+    make_tree(tmp_path, 'inbox/a/photo.jpg', 'inbox/b/notes.txt')
+    categorized = {
+        'media': [{'path': str(tmp_path / 'inbox/a/photo.jpg')}],
+        'document': [{'path': str(tmp_path / 'inbox/b/notes.txt')}]
+    }
+    
+    results = manager.organize_files(str(tmp_path), categorized)
+    
+    assert results['source_dirs'] == {str(tmp_path / 'inbox/a'), str(tmp_path / 'inbox/b')}
+
+def test_cleanup_only_walks_source_dirs(tmp_path, manager):
+    make_tree(tmp_path, 'inbox/keep.txt', 'old/x/y/.keep')
+    (tmp_path / 'inbox/a/b').mkdir(parents=True)
+    (tmp_path / 'inbox/c').mkdir()
+    (tmp_path / 'untouched/empty').mkdir(parents=True)
+    os.remove(tmp_path / 'old/x/y/.keep')
+    
+    removed = manager.cleanup_empty_folders(str(tmp_path), {
+        str(tmp_path / 'inbox/a/b'), str(tmp_path / 'inbox/c'), str(tmp_path / 'old/x/y')
+    })
+    
+    assert sorted(os.path.relpath(path, tmp_path) for path in removed) == sorted([
+        os.path.join('inbox', 'a', 'b'), os.path.join('inbox', 'a'), os.path.join('inbox', 'c'),
+        os.path.join('old', 'x', 'y'), os.path.join('old', 'x'), 'old'
+    ])
+    assert (tmp_path / 'inbox/keep.txt').exists()
+    assert (tmp_path / 'untouched/empty').exists()
+
+def test_cleanup_treats_vanished_folder_as_removed(tmp_path, manager):
+    # inbox/gone was already removed by someone else, so inbox is empty
+    (tmp_path / 'inbox').mkdir()
+    
+    removed = manager.cleanup_empty_folders(str(tmp_path), {str(tmp_path / 'inbox/gone')})
+    
+    assert removed == [str(tmp_path / 'inbox')]
+
+def test_cleanup_without_source_dirs_walks_everything(tmp_path, manager):
+    make_tree(tmp_path, 'docs/readme.txt')
+    (tmp_path / 'a/b/c').mkdir(parents=True)
+    
+    removed = manager.cleanup_empty_folders(str(tmp_path))
+    
+    assert len(removed) == 3
+    assert os.listdir(tmp_path) == ['docs']
+
+def test_create_directories_once_parent_first(tmp_path, manager, monkeypatch):
+    (tmp_path / 'Belgeler').mkdir()
+    calls = []
+    real_mkdir = os.mkdir
+    monkeypatch.setattr(os, 'mkdir', lambda path, *args: calls.append(path) or real_mkdir(path, *args))
+    base = str(tmp_path)
+    
+    known = manager.create_directories([
+        os.path.join(base, 'Belgeler', 'Faturalar', '2024'),
+        os.path.join(base, 'Belgeler', 'Faturalar'),
+        os.path.join(base, 'Medya')
+    ], base)
+    
+    assert sorted(calls, key=lambda path: path.count(os.sep)) == calls
+    assert len(calls) == len(set(calls)) == 4
+    assert os.path.isdir(os.path.join(base, 'Belgeler', 'Faturalar', '2024'))
+    
+    calls.clear()
+    manager.create_directories([os.path.join(base, 'Belgeler', 'Faturalar')], base, known)
+    assert calls == []
+
+def test_organize_files_creates_nested_targets(tmp_path, manager):
+    make_tree(tmp_path, 'invoice.pdf', 'photo.jpg')
+    categorized = {
+        'document': [{'path': str(tmp_path / 'invoice.pdf'), 'target_folder': 'Belgeler/Faturalar'}],
+        'media': [{'path': str(tmp_path / 'photo.jpg')}]
+    }
+    
+    results = manager.organize_files(str(tmp_path), categorized)
+    
+    assert len(results['success']) == 2
+    assert (tmp_path / 'Belgeler/Faturalar/invoice.pdf').exists()
+    assert (tmp_path / 'media/photo.jpg').exists()
+
+def test_create_folder_structure_and_move_file(tmp_path, manager):
+    assert manager.create_folder_structure(str(tmp_path), {'a': {'b': {'c': None}}, 'd': None})
+    assert (tmp_path / 'a/b/c').is_dir() and (tmp_path / 'd').is_dir()
+    
+    make_tree(tmp_path, 'file.txt')
+    assert manager.move_file(str(tmp_path / 'file.txt'), str(tmp_path / 'x/y/file.txt'))
+    assert (tmp_path / 'x/y/file.txt').exists()
+    assert not manager.move_file(str(tmp_path / 'missing.txt'), str(tmp_path / 'z/missing.txt'))
+
+def test_undo_last_operation_restores_tree(tmp_path, manager):
+    make_tree(tmp_path, 'inbox/a/photo.jpg', 'inbox/b/notes.txt', 'inbox/b/song.mp3')
+    categorized = {
+        'media': [{'path': str(tmp_path / 'inbox/a/photo.jpg')}, {'path': str(tmp_path / 'inbox/b/song.mp3')}],
+        'document': [{'path': str(tmp_path / 'inbox/b/notes.txt')}]
+    }
+    results = manager.organize_files(str(tmp_path), categorized)
+    manager.cleanup_empty_folders(str(tmp_path), results['source_dirs'])
+    assert not (tmp_path / 'inbox').exists()
+    
+    undo = manager.undo_last_operation()
+    
+    assert len(undo['success']) == 3 and undo['error'] == []
+    assert (tmp_path / 'inbox/a/photo.jpg').read_text() == 'inbox/a/photo.jpg'
+    assert (tmp_path / 'inbox/b/song.mp3').exists()
+    assert manager.undo_last_operation() is None
+
+def test_undo_reports_failures_and_keeps_them(tmp_path, manager):
+    make_tree(tmp_path, 'a.txt', 'b.txt', 'c.txt')
+    results = manager.organize_files(str(tmp_path), {
+        'document': [{'path': str(tmp_path / name)} for name in ('a.txt', 'b.txt', 'c.txt')]
+    })
+    make_tree(tmp_path, 'a.txt')
+    os.remove(tmp_path / 'document/b.txt')
+    
+    undo = manager.undo_last_operation()
+    
+    assert undo['success'] == [str(tmp_path / 'document/c.txt')]
+    assert undo['failures'] == {'target exists': 1, 'No such file or directory': 1}
+    assert len(manager.history[-1]) == 2
+
+def test_cancelled_undo_can_be_finished(tmp_path, manager):
+    make_tree(tmp_path, 'a.txt', 'b.txt', 'c.txt')
+    manager.organize_files(str(tmp_path), {
+        'document': [{'path': str(tmp_path / name)} for name in ('a.txt', 'b.txt', 'c.txt')]
+    })
+    token = CancellationToken()
+    
+    # Cancel once the first file has been restored
+    undo = manager.undo_last_operation(lambda done, total: token.cancel(), token)
+    
+    assert undo['cancelled'] and undo['success'] == [str(tmp_path / 'document/a.txt')]
+    assert len(manager.history[-1]) == 2
+    
+    undo = manager.undo_last_operation()
+    
+    assert len(undo['success']) == 2 and undo['error'] == []
+    assert sorted(os.listdir(tmp_path)) == ['a.txt', 'b.txt', 'c.txt', 'document']
+    assert manager.history == []
+    
+def test_history_is_bounded_by_move_count(tmp_path, manager):
+    manager.spill_dir = str(tmp_path)
+    small = [{'source': f'/a/{i}', 'target': f'/b/{i}'} for i in range(3)]
+    large = [{'source': f'/a/{i}', 'target': f'/b/{i}'} for i in range(6)]
+    
+    manager.record_operation(small, max_moves=5)
+    manager.record_operation(list(small), max_moves=5)
+    # Over the limit together, so the oldest operation is forgotten
+    assert manager.history == [small]
+    
+    manager.record_operation(large, max_moves=5)
+    journal = manager.history[-1]
+    assert isinstance(journal, MoveJournal) and list(journal) == large
+    assert os.path.dirname(journal.path) == str(tmp_path)
+    
+    for _ in range(10):
+        manager.record_operation(list(small), max_moves=5)
+    assert not os.path.exists(journal.path)
@@ -0,0 +1,99 @@
+import pytest
+from src.core import io_budget
+from src.core.engine import Engine
+from src.core.filesystem import MemoryFileSystem, OS_FILESYSTEM
+from src.core.io_budget import IOBudget, ThrottledFileSystem, TokenBucket
+from src.core.settings import load_settings
+
+class FakeClock:
+    """Stands in for the time module; sleep() advances the clock instantly."""
+    
+    def __init__(self):
+        self.now = 0.0
+        self.slept = 0.0
+        
+    def monotonic(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.now += seconds
+        self.slept += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(io_budget, 'time', clock)
+    return clock
+
+def test_token_bucket_limits_rate(clock):
+    bucket = TokenBucket(rate=1000, burst=10)
+    
+    for _ in range(60):
+        bucket.consume()
+    
+    # 10 tokens of burst, the remaining 50 at 1000 per second
+    assert clock.slept == pytest.approx(0.05)
+
+def test_token_bucket_rate_change_applies_immediately(clock):
+    bucket = TokenBucket(rate=1)
+    bucket.consume()
+    bucket.set_rate(None)
+    
+    waits = [bucket.consume() for _ in range(1000)]
+    
+    assert clock.slept == 0 and not any(waits)
+
+def test_reads_are_charged_by_bytes(tmp_path, clock):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(b'x' * 30000)
+    fs = ThrottledFileSystem(OS_FILESYSTEM, IOBudget(bytes_per_second=20000))
+    
+    with fs.open(str(path)) as f:
+        assert len(f.read()) == 30000
+        assert f.tell() == 30000
+    
+    # 20000 bytes of burst, the remaining 10000 at 20000 bytes/s
+    assert clock.slept == pytest.approx(0.5)
+
+def test_engine_budget_covers_every_operation():
+    fs = MemoryFileSystem()
+    for i in range(5):
+        fs.add_file(f'/data/photo{i}.jpg')
+    settings = load_settings()
+    settings['io_budget'] = {'ops_per_second': 10, 'bytes_per_second': None, 'ionice': None}
+    engine = Engine(settings, fs)
+    
+    assert engine.io_budget.limits()['ops_per_second'] == 10
+    limits = engine.set_io_budget(ops_per_second=1000000)
+    engine.organize('/data')
+    
+    assert limits['ops_per_second'] == 1000000
+    assert engine.settings['io_budget']['ops_per_second'] == 1000000
+    # The wrapped backend still sees (and counts) every call
+    assert fs.ops['move'] == 5
+
+def test_update_keeps_omitted_limits():
+    budget = IOBudget(ops_per_second=100, bytes_per_second=5000)
+    
+    budget.update(ops_per_second=200)
+    assert budget.limits()['ops_per_second'] == 200
+    assert budget.limits()['bytes_per_second'] == 5000
+    
+    budget.update(bytes_per_second='unlimited')
+    budget.update(ops_per_second=0)
+    assert budget.limits()['ops_per_second'] is None
+    assert budget.limits()['bytes_per_second'] is None
+
+def test_reload_keeps_runtime_limits():
+    settings = load_settings()
+    settings['io_budget'] = {'ops_per_second': 10, 'bytes_per_second': 5000, 'ionice': None}
+    engine = Engine(settings, MemoryFileSystem())
+    engine.set_io_budget(ops_per_second=50)
+    
+    settings = load_settings()
+    settings['io_budget'] = {'ops_per_second': 10, 'bytes_per_second': 8000, 'ionice': None}
+    engine.reload(settings)
+    
+    assert engine.io_budget.limits()['ops_per_second'] == 50
+    assert engine.io_budget.limits()['bytes_per_second'] == 8000
+    assert engine.settings['io_budget']['ops_per_second'] == 50
@@ -0,0 +1,65 @@
+from src.core.ai_classifier import AIClassifier
+from src.core.file_analyzer import FileAnalyzer
+from src.core.filesystem import MemoryFileSystem
+from src.core.folder_manager import FolderManager
+from src.core.io_scheduler import IOScheduler, locality_key
+from src.core.settings import load_settings
+
+def test_sorted_by_device_and_inode():
+    files = [
+        {'path': 'c', 'device': 2, 'inode': 1},
+        {'path': 'a', 'device': 1, 'inode': 9},
+        {'path': 'b', 'device': 1, 'inode': 3},
+    ]
+
+    assert [info['path'] for info in IOScheduler().sorted(files)] == ['b', 'a', 'c']
+    assert [info['path'] for info in IOScheduler('none').sorted(files)] == ['c', 'a', 'b']
+    assert locality_key({'path': 'old report record'}) == (0, 0)
+
+def test_read_ahead_keeps_window_open(tmp_path):
+    files = []
+    for index in range(10):
+        path = tmp_path / f"file{index}.txt"
+        path.write_text(str(index))
+        files.append({'path': str(path), 'device': 1, 'inode': 10 - index})
+    scheduler = IOScheduler(readahead_window=3)
+
+    contents = []
+    opened = []
+    for file_info, f in scheduler.read_ahead(FileAnalyzer().fs, files, 10):
+        contents.append(f.read())
+        opened.append(f)
+
+    assert contents == [str(index).encode() for index in reversed(range(10))]
+    assert all(f.closed for f in opened)
+
+def test_content_reads_and_moves_follow_inode_order(tmp_path):
+    for index in range(6):
+        (tmp_path / f"notes{index}").write_text("kaynak kodu ve belge açıklaması")
+    settings = load_settings()
+    # Without deadlines, files are read one at a time in the caller's thread
+    settings['processing']['timeout'] = 0
+    analyzer = FileAnalyzer(settings)
+    classifier = AIClassifier(content_analyzers=analyzer.content_analyzers)
+    files_info = analyzer.scan_directory(str(tmp_path))
+
+    read_order = []
+    original = analyzer.content_analyzers._run
+    analyzer.content_analyzers._run = lambda analyzer_, f: read_order.append(f.name) or original(analyzer_, f)
+    categorized = classifier.batch_classify(files_info)
+
+    by_inode = [info['path'] for info in sorted(files_info, key=lambda info: info['inode'])]
+    assert read_order == by_inode
+    assert sum(len(files) for files in categorized.values()) == 6
+
+def test_organize_moves_in_inode_order():
+    fs = MemoryFileSystem()
+    files = []
+    for index, inode in enumerate([5, 1, 3]):
+        fs.add_file(f"/data/file{index}.jpg")
+        files.append({'path': f"/data/file{index}.jpg", 'device': 1, 'inode': inode})
+    manager = FolderManager(fs)
+
+    results = manager.organize_files('/data', {'image': files})
+
+    assert results['success'] == ['/data/file1.jpg', '/data/file2.jpg', '/data/file0.jpg']
@@ -0,0 +1,34 @@
+import logging
+from src.core.logging_config import EventAggregator
+from src.core.settings import load_settings, DEFAULT_SETTINGS
+
+def test_event_aggregator_summarizes(caplog):
+    aggregator = EventAggregator("Files classified")
+    
+    with caplog.at_level(logging.INFO):
+        for _ in range(3):
+            aggregator.record('document')
+        aggregator.record('media')
+        aggregator.flush()
+    
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages == ["Files classified: 4 events (document=3, media=1)"]
+    assert not aggregator.counts
+
+def test_event_aggregator_skips_empty_flush(caplog):
+    aggregator = EventAggregator("Files moved")
+    
+    with caplog.at_level(logging.INFO):
+        aggregator.flush()
+    
+    assert not caplog.records
+
+def test_load_settings_merges_defaults(tmp_path):
+    settings_file = tmp_path / "settings.json"
+    settings_file.write_text('{"logging": {"backup_count": 2}}', encoding='utf-8')
+    
+    settings = load_settings(str(settings_file))
+    
+    assert settings['logging']['backup_count'] == 2
+    assert settings['logging']['max_size'] == DEFAULT_SETTINGS['logging']['max_size']
+    assert settings['scan_options'] == DEFAULT_SETTINGS['scan_options']
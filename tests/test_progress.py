@@ -0,0 +1,54 @@
+import pytest
+from src.core.file_analyzer import FileAnalyzer
+from src.core.filesystem import MemoryFileSystem
+from src.core.progress import CancellationToken, OperationCancelled, ProgressReporter
+from src.core.settings import load_settings
+
+@pytest.fixture
+def sample_tree(tmp_path):
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "report.pdf").write_bytes(b"%PDF")
+    (tmp_path / "docs" / "notes.txt").write_text("meeting notes")
+    (tmp_path / "photo.jpg").write_bytes(b"\xff\xd8")
+    return tmp_path
+
+def test_scan_without_estimate_lists_each_directory_once():
+    fs = MemoryFileSystem()
+    for name in ('docs/report.pdf', 'docs/notes.txt', 'photo.jpg'):
+        fs.add_file(f'/data/{name}')
+    settings = load_settings()
+    settings['estimator']['enabled'] = False
+    calls = []
+    
+    files = FileAnalyzer(settings, fs).scan_directory(
+        '/data', progress_callback=lambda done, total: calls.append((done, total)))
+    
+    assert len(files) == 3
+    # The total is unknown until the scan ends
+    assert calls[0] == (1, 0) and calls[-1] == (3, 3)
+    assert fs.ops['scandir'] == 2
+
+def test_progress_reporter_rate_limits():
+    calls = []
+    reporter = ProgressReporter(lambda done, total: calls.append((done, total)), total=1000, min_interval=60)
+    
+    for _ in range(1000):
+        reporter.advance()
+    reporter.finish()
+    
+    # One report for the first item, one final report
+    assert calls == [(1, 1000), (1000, 1000)]
+
+def test_scan_reports_real_progress(sample_tree):
+    calls = []
+    files = FileAnalyzer().scan_directory(str(sample_tree), progress_callback=lambda done, total: calls.append((done, total)))
+    
+    assert len(files) == 3
+    assert calls[-1] == (3, 3)
+
+def test_scan_cancellation(sample_tree):
+    token = CancellationToken()
+    token.cancel()
+    
+    with pytest.raises(OperationCancelled):
+        FileAnalyzer().scan_directory(str(sample_tree), cancel_token=token)
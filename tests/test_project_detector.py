@@ -0,0 +1,42 @@
+import pytest
+from src.core.ai_classifier import AIClassifier
+from src.core.file_analyzer import FileAnalyzer
+from src.core.project_detector import ProjectDetector
+from src.core.settings import load_settings
+
+def test_detect_by_name_and_suffix():
+    detector = ProjectDetector()
+    
+    assert detector.detect('web', ['src', 'package.json']) == 'node'
+    assert detector.detect('app', ['App.sln', 'App']) == 'dotnet'
+    assert detector.detect('photos', ['a.jpg', 'b.jpg']) is None
+
+def test_custom_marker_and_detector():
+    detector = ProjectDetector(markers={})
+    detector.register_marker('*.kicad_pro', 'kicad')
+    detector.register_detector(lambda path, names: 'latex' if 'main.tex' in names else None)
+    
+    assert detector.detect('board', ['board.kicad_pro']) == 'kicad'
+    assert detector.detect('thesis', ['main.tex']) == 'latex'
+    assert detector.detect('misc', ['.git']) is None
+
+@pytest.fixture
+def developer_tree(tmp_path):
+    project = tmp_path / "webapp"
+    (project / ".git").mkdir(parents=True)
+    (project / "node_modules" / "lib").mkdir(parents=True)
+    (project / "node_modules" / "lib" / "index.js").write_text("x")
+    (project / "main.py").write_text("print('x')")
+    (tmp_path / "photo.jpg").write_bytes(b"\xff\xd8")
+    return tmp_path
+
+def test_scan_treats_project_as_one_unit(developer_tree):
+    analyzer = FileAnalyzer(load_settings())
+    classifier = AIClassifier()
+    
+    files = analyzer.scan_directory(str(developer_tree))
+    by_name = {file_info['name']: file_info for file_info in files}
+    
+    assert sorted(by_name) == ['photo.jpg', 'webapp']
+    assert by_name['webapp']['project_type'] == 'git'
+    assert classifier.classify_file(by_name['webapp']) == 'project'
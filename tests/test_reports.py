@@ -0,0 +1,47 @@
+import pytest
+from datetime import datetime
+
+from src.core.folder_manager import FolderManager
+from src.core.reports import classified_records, open_report_writer, read_report
+
+@pytest.fixture
+def file_info():
+    return {
+        'path': '/data/Logo_v2.psd',
+        'name': 'Logo_v2.psd',
+        'extension': '.psd',
+        'size': 2048,
+        'modified_date': datetime(2024, 5, 1, 12, 30),
+        'creation_date': datetime(2024, 4, 1, 8, 0),
+        'mime_type': 'image/vnd.adobe.photoshop',
+        'version_info': {'has_version': True, 'version': 'v2', 'is_draft': False, 'is_final': False},
+        'keywords': ['logo', 'brand']
+    }
+
+@pytest.mark.parametrize('filename', ['report.jsonl', 'report.csv'])
+def test_round_trip(tmp_path, file_info, filename):
+    path = str(tmp_path / filename)
+    with open_report_writer(path) as writer:
+        writer.write(file_info, category='design')
+        writer.write(dict(file_info, path='/data/notes.txt', name='notes.txt'), category='document')
+        
+    records = list(classified_records(read_report(path)))
+    
+    assert [category for category, _ in records] == ['design', 'document']
+    assert records[0][1] == file_info
+    assert 'category' not in file_info
+
+def test_plan_report_reloads_as_moves(tmp_path, file_info):
+    moves = FolderManager().plan_moves('/organized', {'design': [file_info]})
+    path = str(tmp_path / 'plan.csv')
+    with open_report_writer(path) as writer:
+        for move in moves:
+            writer.write(move)
+            
+    assert list(read_report(path)) == moves
+
+def test_malformed_lines_are_skipped(tmp_path):
+    path = tmp_path / 'report.jsonl'
+    path.write_text('{"path": "/a"}\nnot json\n\n{"path": "/b"}\n', encoding='utf-8')
+    
+    assert [record['path'] for record in read_report(str(path))] == ['/a', '/b']
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+import pytest
+from src.core.ai_classifier import AIClassifier
+from src.core.rule_engine import CompiledRule, RuleEngine
+from src.core.settings import load_settings
+
+def make_file(name, size=1024, days_old=0, path=None):
+    extension = '.' + name.rsplit('.', 1)[1] if '.' in name else ''
+    return {
+        'path': path or f'/data/{name}',
+        'name': name,
+        'extension': extension,
+        'size': size,
+        'modified_date': datetime.now() - timedelta(days=days_old),
+        'mime_type': 'application/octet-stream',
+        'version_info': {'is_version': False, 'version_number': None, 'is_draft': 'draft' in name, 'is_final': False}
+    }
+
+def test_first_matching_rule_wins():
+    engine = RuleEngine([
+        {'target': 'Belgeler/Faturalar', 'extensions': ['.pdf'], 'name_regex': r'fatura|invoice'},
+        {'target': 'Belgeler/PDF', 'extensions': ['.pdf']},
+        {'target': 'Eski', 'min_age_days': 365},
+    ], {'Belgeler': 'document'})
+    
+    invoice = engine.match(make_file('Invoice_2024.pdf'))
+    assert invoice.target == 'Belgeler/Faturalar'
+    assert invoice.category == 'document'
+    assert engine.match(make_file('manual.pdf')).target == 'Belgeler/PDF'
+    assert engine.match(make_file('old.txt', days_old=400)).target == 'Eski'
+    assert engine.match(make_file('new.txt')) is None
+
+def test_wildcard_rules_keep_their_order():
+    engine = RuleEngine([
+        {'target': 'Taslaklar', 'is_draft': True},
+        {'target': 'Buyuk', 'extensions': ['.psd'], 'min_size': 1000},
+    ])
+    
+    assert engine.match(make_file('logo_draft.psd', size=5000)).target == 'Taslaklar'
+    assert engine.match(make_file('logo.psd', size=5000)).target == 'Buyuk'
+    assert engine.match(make_file('logo.psd', size=10)) is None
+
+def test_path_glob_and_invalid_rules():
+    engine = RuleEngine([
+        {'target': '../escape'},
+        {'target': 'Indirilenler', 'path_glob': '**/Downloads/*'},
+    ])
+    
+    assert len(engine.rules) == 1
+    assert engine.match(make_file('a.bin', path='/home/u/Downloads/a.bin')).target == 'Indirilenler'
+    assert engine.match(make_file('a.bin', path='/home/u/Downloads/sub/a.bin')) is None
+
+def test_many_rules_are_cheap_per_file(monkeypatch):
+    rules = [{'target': f'Ext/{i}', 'extensions': [f'.e{i}']} for i in range(5000)]
+    rules.append({'target': 'Buyuk', 'min_size': 1 << 30})
+    engine = RuleEngine(rules)
+    files = [make_file(f'file{i}.e{i % 5000}') for i in range(20000)]
+    evaluated = []
+    matches = CompiledRule.matches
+    monkeypatch.setattr(CompiledRule, 'matches', lambda rule, *args: evaluated.append(rule.index) or matches(rule, *args))
+    
+    for file_info in files:
+        assert engine.match(file_info).target == f"Ext/{file_info['extension'][2:]}"
+    
+    # Only the rule indexed under the file's extension is evaluated, never the other 4999 or the wildcard after it
+    assert len(evaluated) == len(files)
+    assert engine.match(make_file('file.unknown')) is None
+    assert evaluated[-1] == 5000
+
+def test_classifier_applies_custom_rules():
+    settings = load_settings()
+    settings['categories']['custom_rules'] = [
+        {'target': 'Belgeler/Faturalar', 'extensions': ['.pdf'], 'name_regex': 'fatura'}
+    ]
+    classifier = AIClassifier(settings)
+    file_info = make_file('fatura_ocak.pdf')
+    file_info['mime_type'] = 'application/pdf'
+    
+    assert classifier.classify_file(file_info) == 'document'
+    assert file_info['target_folder'] == 'Belgeler/Faturalar'
+
+def test_unknown_category_is_reported_as_other(caplog):
+    engine = RuleEngine([{'target': 'Foo/Bar', 'extensions': ['.foo'], 'category': 'nope'}],
+                        categories=['document', 'other'])
+    
+    assert engine.match(make_file('a.foo')).category == 'other'
+    assert "unknown category 'nope'" in caplog.text
+
+def test_batch_classify_with_unknown_rule_category():
+    settings = load_settings()
+    settings['categories']['custom_rules'] = [{'extensions': ['.foo'], 'target': 'Foo/Bar', 'category': 'nope'}]
+    classifier = AIClassifier(settings)
+    
+    categorized = classifier.batch_classify([make_file('a.foo'), make_file('b.txt')])
+    
+    assert [file_info['name'] for file_info in categorized['other']] == ['a.foo']
+    assert categorized['other'][0]['target_folder'] == 'Foo/Bar'
+
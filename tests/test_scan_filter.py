@@ -0,0 +1,63 @@
+import os
+import pytest
+from src.core.scan_filter import ScanFilter, PatternSet
+
+def test_pattern_set_name_and_dir_only():
+    patterns = PatternSet(['node_modules/', '*.tmp', 'Thumbs.db'])
+    
+    assert patterns.matches('web/node_modules', True)
+    assert not patterns.matches('web/node_modules', False)
+    assert patterns.matches('a/b/cache.tmp', False)
+    assert patterns.matches('Thumbs.db', False)
+    assert not patterns.matches('notes.txt', False)
+
+def test_pattern_set_anchored_and_globstar():
+    patterns = PatternSet(['/build', 'docs/**/draft_*.md'])
+    
+    assert patterns.matches('build', True)
+    assert not patterns.matches('src/build', True)
+    assert patterns.matches('docs/draft_a.md', False)
+    assert patterns.matches('docs/x/y/draft_b.md', False)
+    assert not patterns.matches('other/docs/draft_a.md', False)
+
+def test_pattern_set_negation_last_match_wins():
+    patterns = PatternSet(['*.log', '!keep.log'])
+    
+    assert patterns.matches('debug.log', False)
+    assert not patterns.matches('logs/keep.log', False)
+
+@pytest.fixture
+def project_tree(tmp_path):
+    (tmp_path / "node_modules" / "pkg").mkdir(parents=True)
+    (tmp_path / "node_modules" / "pkg" / "index.js").write_text("x")
+    (tmp_path / ".hidden").mkdir()
+    (tmp_path / ".hidden" / "secret.txt").write_text("x")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("x")
+    (tmp_path / "big.bin").write_bytes(b"0" * 2048)
+    (tmp_path / "readme.txt").write_text("x")
+    return tmp_path
+
+def test_walk_prunes_excluded_and_hidden(project_tree, monkeypatch):
+    listed = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(os, 'scandir', lambda path: listed.append(os.path.relpath(path, project_tree)) or real_scandir(path))
+    
+    scan_filter = ScanFilter(exclude_patterns=['node_modules/'])
+    names = sorted(entry.name for entry in scan_filter.walk(str(project_tree)))
+    
+    assert names == ['app.py', 'big.bin', 'readme.txt']
+    assert sorted(listed) == ['.', 'src']
+
+def test_walk_non_recursive_with_include(project_tree):
+    scan_filter = ScanFilter(recursive=False, include_patterns=['*.txt'])
+    
+    names = [entry.name for entry in scan_filter.walk(str(project_tree))]
+    
+    assert names == ['readme.txt']
+
+def test_size_limit():
+    scan_filter = ScanFilter(max_size_mb=1)
+    
+    assert scan_filter.accepts_size(1024 * 1024)
+    assert not scan_filter.accepts_size(1024 * 1024 + 1)
@@ -0,0 +1,90 @@
+import os
+import socket
+import threading
+import pytest
+
+from src.core.engine import Engine
+from src.core.service import Service, ServiceClient
+from src.core.settings import load_settings
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="needs Unix domain sockets")
+
+@pytest.fixture
+def service(tmp_path):
+    service = Service(str(tmp_path / 'fs.sock'), Engine(load_settings()), max_jobs=1)
+    service.start()
+    yield service
+    service.stop()
+
+def test_classify_and_index(service, tmp_path):
+    for name in ('a.jpg', 'b.pdf'):
+        (tmp_path / name).write_text(name)
+    paths = [str(tmp_path / 'a.jpg'), str(tmp_path / 'b.pdf'), str(tmp_path / 'missing.txt')]
+    
+    with ServiceClient(service.socket_path, timeout=10) as client:
+        assert client.call('ping') == 'pong'
+        first = client.classify(paths)
+        client.classify(paths)
+        stats = client.call('stats')
+        
+    assert [result.get('category') for result in first] == ['media', 'document', None]
+    assert 'error' in first[2]
+    assert stats['index']['hits'] == 2
+
+def test_concurrent_clients_are_batched(service, tmp_path):
+    (tmp_path / 'x.py').write_text('print()')
+    results = []
+    
+    def run():
+        with ServiceClient(service.socket_path, timeout=10) as client:
+            results.append(client.classify([str(tmp_path / 'x.py')] * 10))
+            
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+        
+    assert len(results) == 8
+    assert all(result['category'] == 'code' for batch in results for result in batch)
+
+def test_organize_respects_job_limit(service, tmp_path):
+    root = tmp_path / 'root'
+    root.mkdir()
+    (root / 'song.mp3').write_text('x')
+    
+    with ServiceClient(service.socket_path, timeout=10) as client:
+        assert service.jobs.acquire(blocking=False)
+        with pytest.raises(RuntimeError, match='too many'):
+            client.organize(str(root))
+        service.jobs.release()
+        
+        assert client.organize(str(root))['moved'] == 1
+        with pytest.raises(RuntimeError, match='unknown method'):
+            client.call('shutdown')
+            
+    assert os.path.exists(root / 'media' / 'song.mp3')
+
+def test_start_does_not_take_over_sockets_or_files(service, tmp_path):
+    other = Service(service.socket_path, service.engine)
+    with pytest.raises(RuntimeError, match='already listening'):
+        other.start()
+    other.stop()
+    
+    regular_file = tmp_path / 'settings.json'
+    regular_file.write_text('{}')
+    other = Service(str(regular_file), service.engine)
+    with pytest.raises(RuntimeError, match='not a socket'):
+        other.start()
+    other.stop()
+    assert regular_file.read_text() == '{}'
+    
+    # A socket nobody listens on any more is replaced
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(tmp_path / 'stale.sock'))
+    stale.close()
+    other = Service(str(tmp_path / 'stale.sock'), service.engine)
+    other.start()
+    with ServiceClient(other.socket_path, timeout=10) as client:
+        assert client.call('ping') == 'pong'
+    other.stop()
@@ -0,0 +1,75 @@
+import random
+import pytest
+from src.core.version_grouper import VersionGrouper, normalize_stem
+
+@pytest.mark.parametrize('filename, expected', [
+    ('logo_v1.psd', ('logo', True)),
+    ('Logo-V2.psd', ('logo', True)),
+    ('banner_final.psd', ('banner', True)),
+    ('banner_taslak.psd', ('banner', True)),
+    ('report version 2.1.docx', ('report', True)),
+    ('person.txt', ('person', False)),
+    ('version_notes.txt', ('version notes', False)),
+])
+def test_normalize_stem(filename, expected):
+    assert normalize_stem(filename) == expected
+
+def files(*names):
+    return [{'name': name, 'path': f'/designs/{name}'} for name in names]
+
+def test_group_exact_families():
+    families = VersionGrouper(fuzzy=False).group(files(
+        'logo_v1.psd', 'logo_v2.psd', 'banner_final.psd', 'banner_draft.psd',
+        'brand_guidelines.pdf', 'report.pdf', 'report.docx'
+    ))
+    
+    assert sorted(families) == ['banner', 'logo']
+    assert len(families['logo']) == 2
+
+def test_group_near_matches_respect_numbers():
+    families = VersionGrouper(fuzzy=True).group(files(
+        'brochure_summer_v1.ai', 'brochure_sumer_v2.ai',
+        'invoice_2023_v1.pdf', 'invoice_2024_v2.pdf'
+    ))
+    
+    assert list(families) == ['brochure summer']
+    assert len(families['brochure summer']) == 2
+
+def test_assign_targets():
+    file_infos = files('banner_final.psd', 'banner_draft.psd', 'logo_v1.psd', 'logo_v2.psd')
+    file_infos[0]['version_info'] = {'is_final': True}
+    file_infos[1]['version_info'] = {'is_draft': True}
+    file_infos[3]['target_folder'] = 'Ozel'
+    
+    VersionGrouper().assign_targets(file_infos)
+    
+    assert [f['target_folder'] for f in file_infos] == [
+        'Banner/Final', 'Banner/Taslaklar', 'Logo/Versiyonlar', 'Ozel'
+    ]
+
+def test_near_matches_agree_with_pairwise_comparison():
+    rng = random.Random(7)
+    words = ['brochure', 'summer', 'logo', 'report', 'banner', 'invoice', 'poster', 'menu']
+    stems = set()
+    for _ in range(400):
+        stem = ' '.join(rng.sample(words, rng.randint(1, 3)))
+        position = rng.randrange(len(stem))
+        stem = stem[:position] + rng.choice(['', 'e', 'x']) + stem[position + 1:]
+        stems.add(stem + rng.choice(['', ' 2023']))
+    stems = sorted(stems)
+    grouper = VersionGrouper()
+    
+    grams = [grouper._ngrams(stem) for stem in stems]
+    parent = list(range(len(stems)))
+    def find(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+    for i in range(len(stems)):
+        for j in range(i):
+            same_numbers = stems[i].endswith('2023') == stems[j].endswith('2023')
+            if same_numbers and len(grams[i] & grams[j]) / len(grams[i] | grams[j]) >= grouper.threshold:
+                parent[max(find(i), find(j))] = min(find(i), find(j))
+    expected = {stem: stems[find(i)] for i, stem in enumerate(stems) if find(i) != i}
+    
+    assert expected and grouper._merge_near_stems(stems) == expected
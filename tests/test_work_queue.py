@@ -0,0 +1,91 @@
+import os
+import pytest
+from src.core.folder_manager import FolderManager
+from src.core.work_queue import MoveQueue, DONE, FAILED, PENDING, _queue_worker
+
+@pytest.fixture
+def move_queue(tmp_path):
+    queue = MoveQueue(str(tmp_path / "moves.db"), max_attempts=2)
+    yield queue
+    queue.close()
+
+@pytest.fixture
+def source_files(tmp_path):
+    source_dir = tmp_path / "inbox"
+    source_dir.mkdir()
+    for name in ('a.pdf', 'b.jpg', 'c.pdf'):
+        (source_dir / name).write_text(name)
+    (tmp_path / "other").mkdir()
+    (tmp_path / "other" / "a.pdf").write_text("second a")
+    return tmp_path
+
+def categorized(root):
+    return {
+        'document': [{'path': str(root / "inbox" / "a.pdf")}, {'path': str(root / "inbox" / "c.pdf")},
+                     {'path': str(root / "other" / "a.pdf")}],
+        'media': [{'path': str(root / "inbox" / "b.jpg")}]
+    }
+
+def test_plan_moves_resolves_collisions(source_files):
+    moves = FolderManager().plan_moves(str(source_files), categorized(source_files))
+    targets = [os.path.relpath(move['target'], source_files) for move in moves]
+    
+    assert targets == [os.path.join('document', 'a.pdf'), os.path.join('document', 'c.pdf'),
+                       os.path.join('document', 'a_1.pdf'), os.path.join('media', 'b.jpg')]
+
+def test_claim_leases_and_expiry(move_queue):
+    move_queue.enqueue([{'source': f's{i}', 'target': f't{i}'} for i in range(5)])
+    
+    first = move_queue.claim('w1', batch_size=3, lease_seconds=60)
+    second = move_queue.claim('w2', batch_size=3, lease_seconds=60)
+    assert len(first) == 3 and len(second) == 2
+    assert move_queue.claim('w3') == []
+    
+    # An expired lease is handed out again
+    move_queue.renew([first[0]['id']], lease_seconds=-1)
+    assert [move['id'] for move in move_queue.claim('w3')] == [first[0]['id']]
+
+def test_fail_retries_until_max_attempts(move_queue):
+    move_queue.enqueue([{'source': 's', 'target': 't'}])
+    
+    move = move_queue.claim('w1')[0]
+    move_queue.fail(move['id'], 'disk full')
+    assert move_queue.stats()[PENDING] == 1
+    
+    move = move_queue.claim('w1')[0]
+    move_queue.fail(move['id'], 'disk full')
+    assert move_queue.stats()[FAILED] == 1
+    assert move_queue.failures()[0]['error'] == 'disk full'
+
+def test_expired_last_attempt_is_marked_failed(move_queue):
+    move_queue.enqueue([{'source': 's', 'target': 't'}])
+    for worker in ('w1', 'w2'):
+        # The worker dies without completing or failing its batch
+        move = move_queue.claim(worker)[0]
+        move_queue.renew([move['id']], lease_seconds=-1)
+        
+    assert move_queue.claim('w3') == []
+    assert move_queue.stats()[FAILED] == 1
+    assert move_queue.failures() == [{'source': 's', 'target': 't', 'error': 'lease expired'}]
+
+def test_process_queue_moves_files(source_files, move_queue):
+    manager = FolderManager()
+    move_queue.enqueue(manager.plan_moves(str(source_files), categorized(source_files)))
+    
+    results = manager.process_queue(move_queue, worker_id='test', batch_size=2)
+    
+    assert len(results['success']) == 4
+    assert move_queue.stats()[DONE] == 4
+    assert (source_files / "document" / "a_1.pdf").read_text() == "second a"
+    assert (source_files / "media" / "b.jpg").exists()
+
+def test_queue_worker_returns_counts_without_history(source_files, move_queue, monkeypatch):
+    move_queue.enqueue(FolderManager().plan_moves(str(source_files), categorized(source_files)))
+    recorded = []
+    monkeypatch.setattr(FolderManager, 'record_operation', lambda self, moves, **kwargs: recorded.append(moves))
+    
+    summary = _queue_worker(move_queue.path, 2, 60)
+    
+    assert summary == {'moved': 4, 'failed': 0, 'error': []}
+    assert recorded == []
+    assert move_queue.stats()[DONE] == 4